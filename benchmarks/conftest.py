@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+from elasticsearch import AsyncElasticsearch, Elasticsearch, TransportError
+from loguru import logger
+
+from benchmarks.fake_elasticsearch import FakeElasticsearch
+from src.loggingsfactory.loggers.asyncelk import AsyncElk
+from src.loggingsfactory.loggers.elk import Elk
+from src.loggingsfactory.loggers.loguru import Loguru
+
+ELK_CONFIG = {
+    "appname": "bench",
+    "debug": False,
+    "host": "localhost",
+    "index": "appindex",
+    "username": "user",
+    "pw": "pw",
+}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("fake elasticsearch")
+    group.addoption(
+        "--fake-es-latency",
+        type=float,
+        default=0,
+        help="seconds every fake elasticsearch request is delayed by",
+    )
+    group.addoption(
+        "--fake-es-failure-rate",
+        type=float,
+        default=0,
+        help="ratio of fake elasticsearch requests answered with a failure",
+    )
+    group.addoption(
+        "--fake-es-failure-status",
+        type=int,
+        default=503,
+        help="status of the failed fake elasticsearch requests",
+    )
+
+
+@pytest.fixture(scope="session")
+def fake_es(request):
+    fake = FakeElasticsearch(
+        latency=request.config.getoption("--fake-es-latency"),
+        failure_rate=request.config.getoption("--fake-es-failure-rate"),
+        failure_status=request.config.getoption("--fake-es-failure-status"),
+    ).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def fake_es_stats(fake_es, benchmark):
+    """Store the fake elasticsearch counters of the benchmark in the results"""
+    before = fake_es.stats()
+    yield fake_es
+    benchmark.extra_info.update(
+        {key: value - before[key] for key, value in fake_es.stats().items()}
+    )
+
+
+@pytest.fixture
+def ignore_failures(benchmark):
+    """Call the function and count the requests failed by the fake elasticsearch"""
+    benchmark.extra_info["failures"] = 0
+
+    def wrapper(func, *args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except TransportError:
+            benchmark.extra_info["failures"] += 1
+        return None
+
+    return wrapper
+
+
+@pytest.fixture
+def loguru_logger(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logger.remove()
+    yield Loguru(appname="bench")
+    logger.remove()
+
+
+@pytest.fixture
+def async_loguru_logger(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logger.remove()
+    loguru = Loguru(appname="bench", useasync=True)
+    yield loguru
+    loguru.writer.close(10)
+    logger.remove()
+
+
+@pytest.fixture
+def elk_logger(fake_es_stats):
+    elk = Elk(**ELK_CONFIG)
+    elk.es = Elasticsearch([fake_es_stats.url], max_retries=0)
+    yield elk
+    elk.es.close()
+
+
+@pytest.fixture
+def event_loop_runner():
+    """Run coroutines of the benchmarked function on a dedicated event loop"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def async_elk_logger(fake_es_stats, event_loop_runner):
+    elk = AsyncElk(**ELK_CONFIG)
+    elk.es = AsyncElasticsearch([fake_es_stats.url], max_retries=0)
+    yield elk
+    event_loop_runner(elk.es.close())
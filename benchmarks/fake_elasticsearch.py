@@ -0,0 +1,157 @@
+"""In-process fake Elasticsearch HTTP server used by the benchmarks"""
+import asyncio
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+
+class FakeElasticsearch:
+    """
+    Minimal Elasticsearch HTTP API served by aiohttp in a background thread.
+
+    Supports the product check, index, bulk and search requests used by the loggers.
+
+    - latency: float = seconds every request is delayed by.
+    - failure_rate: float = ratio of requests answered with the failure status.
+    - failure_status: int = status of the failed requests, 429 is used for es_rejected_execution_exception.
+    - seed: int = seed of the failures, keeps the failed requests identical between runs.
+    """
+
+    HEADERS: Dict[str, str] = {"X-Elastic-Product": "Elasticsearch"}
+
+    def __init__(
+        self,
+        latency: float = 0,
+        failure_rate: float = 0,
+        failure_status: int = 503,
+        seed: int = 0,
+    ) -> None:
+        self.latency: float = latency
+        self.failure_rate: float = failure_rate
+        self.failure_status: int = failure_status
+        self.random: random.Random = random.Random(seed)
+        self.requests: int = 0
+        self.documents: int = 0
+        self.bytes: int = 0
+        self.port: Optional[int] = None
+        self.loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self.thread: threading.Thread = threading.Thread(
+            target=self.loop.run_forever, daemon=True
+        )
+        self.runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        """Return the url of the server"""
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "FakeElasticsearch":
+        """Start the server on a free port"""
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and its event loop"""
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    async def _start(self) -> None:
+        app: web.Application = web.Application(client_max_size=1024**3)
+        app.router.add_get("/", self.info)
+        app.router.add_post("/_bulk", self.bulk)
+        app.router.add_put("/_bulk", self.bulk)
+        app.router.add_post("/{index}/_bulk", self.bulk)
+        app.router.add_post("/{index}/_doc", self.index)
+        app.router.add_put("/{index}/_doc/{id}", self.index)
+        app.router.add_route("*", "/{index}/_search", self.search)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site: web.TCPSite = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, request: web.Request) -> Optional[web.Response]:
+        """Apply the injected latency and return a failure response if any"""
+        self.requests += 1
+        body: bytes = await request.read()
+        self.bytes += len(body)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            return self._json(
+                {
+                    "error": {"type": "es_rejected_execution_exception"},
+                    "status": self.failure_status,
+                },
+                self.failure_status,
+            )
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Return the request counters of the server"""
+        return {
+            "requests": self.requests,
+            "documents": self.documents,
+            "bytes": self.bytes,
+        }
+
+    def _json(self, data: Any, status: int = 200) -> web.Response:
+        return web.json_response(data, status=status, headers=self.HEADERS)
+
+    async def info(self, request: web.Request) -> web.Response:
+        """Cluster info used by the client product check"""
+        return self._json(
+            {
+                "name": "fake",
+                "cluster_name": "fake",
+                "version": {"number": "7.15.0", "build_flavor": "default"},
+                "tagline": "You Know, for Search",
+            }
+        )
+
+    async def index(self, request: web.Request) -> web.Response:
+        """Index a single document"""
+        failure: Optional[web.Response] = await self._handle(request)
+        if failure is not None:
+            return failure
+        self.documents += 1
+        return self._json(
+            {
+                "_index": request.match_info["index"],
+                "_id": str(self.documents),
+                "result": "created",
+            },
+            201,
+        )
+
+    async def bulk(self, request: web.Request) -> web.Response:
+        """Index every document of a newline delimited bulk request"""
+        failure: Optional[web.Response] = await self._handle(request)
+        if failure is not None:
+            return failure
+        lines: List[bytes] = [
+            line for line in (await request.read()).splitlines() if line
+        ]
+        items: List[Dict[str, Any]] = [
+            {"index": {"_id": str(self.documents + i), "status": 201}}
+            for i in range(len(lines) // 2)
+        ]
+        self.documents += len(items)
+        return self._json({"took": 1, "errors": False, "items": items})
+
+    async def search(self, request: web.Request) -> web.Response:
+        """Return an empty search result"""
+        failure: Optional[web.Response] = await self._handle(request)
+        if failure is not None:
+            return failure
+        return self._json(
+            {
+                "took": 1,
+                "timed_out": False,
+                "hits": {"total": {"value": 0, "relation": "eq"}, "hits": []},
+            }
+        )
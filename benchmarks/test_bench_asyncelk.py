@@ -0,0 +1,31 @@
+BATCH_SIZE = 1000
+
+
+def test_async_elk_async_log(
+    benchmark, async_elk_logger, event_loop_runner, ignore_failures
+):
+    benchmark(
+        lambda: ignore_failures(
+            event_loop_runner, async_elk_logger.async_log("info", "log data")
+        )
+    )
+
+
+def test_async_elk_async_log_many(
+    benchmark, async_elk_logger, event_loop_runner, ignore_failures
+):
+    records = [("info", f"log data {i}") for i in range(BATCH_SIZE)]
+    benchmark.extra_info["records"] = BATCH_SIZE
+    benchmark(
+        lambda: ignore_failures(
+            event_loop_runner, async_elk_logger.async_log_many(records)
+        )
+    )
+
+
+def test_async_elk_async_query(
+    benchmark, async_elk_logger, event_loop_runner, ignore_failures
+):
+    benchmark(
+        lambda: ignore_failures(event_loop_runner, async_elk_logger.async_query())
+    )
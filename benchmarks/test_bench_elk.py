@@ -0,0 +1,31 @@
+from src.loggingsfactory.helpers.compression import Compressor
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+
+BATCH_SIZE = 1000
+
+
+def test_elk_log(benchmark, elk_logger, ignore_failures):
+    benchmark(ignore_failures, elk_logger.log, "info", "log data")
+
+
+def test_elk_log_custom_func_name(benchmark, elk_logger, ignore_failures):
+    benchmark(ignore_failures, elk_logger.log, "info", "log data", "bench")
+
+
+def test_elk_log_many(benchmark, elk_logger, ignore_failures):
+    records = [("info", f"log data {i}") for i in range(BATCH_SIZE)]
+    benchmark.extra_info["records"] = BATCH_SIZE
+    benchmark(ignore_failures, elk_logger.log_many, records)
+
+
+def test_elk_log_many_gzip(benchmark, elk_logger, ignore_failures):
+    elk_logger.compressor = Compressor("gzip", instrumentation=LoggerMetrics("bench"))
+    records = [("info", f"log data {i}") for i in range(BATCH_SIZE)]
+    benchmark.extra_info["records"] = BATCH_SIZE
+    benchmark(ignore_failures, elk_logger.log_many, records)
+    ratio = elk_logger.compressor.instrumentation.histograms["compression_ratio"]
+    benchmark.extra_info["compression_ratio"] = ratio.sum / ratio.count
+
+
+def test_elk_query(benchmark, elk_logger, ignore_failures):
+    benchmark(ignore_failures, elk_logger.query)
@@ -0,0 +1,86 @@
+import tracemalloc
+from src.loggingsfactory.helpers.context import contextualize
+from src.loggingsfactory.helpers.dedup import LogDeduplicator
+from src.loggingsfactory.helpers.formats import format_log_data, format_log_many
+
+BATCH_SIZE = 1000
+
+
+class MockLogger:
+    def __init__(self, minlevel=0, deduplicator=None):
+        self.appname = "bench"
+        self.version = "1.0"
+        self.minlevel = minlevel
+        self.deduplicator = deduplicator
+
+
+def test_format_log_data(benchmark):
+    self = MockLogger()
+    benchmark(format_log_data, self, "INFO", "log data", "", False, None, 0)
+
+
+def test_format_log_data_custom_func_name(benchmark):
+    self = MockLogger()
+    benchmark(format_log_data, self, "INFO", "log data", "bench", False, None, 0)
+
+
+def test_format_log_data_dict(benchmark):
+    self = MockLogger()
+    logdata = {"request_id": "abc", "user_id": 1, "items": list(range(10))}
+    benchmark(format_log_data, self, "INFO", logdata, "bench", False, None, 0)
+
+
+def test_format_log_data_bound_context(benchmark):
+    self = MockLogger()
+    with contextualize(request_id="abc", user_id=1, trace_id="0af7651916cd43dd"):
+        benchmark(format_log_data, self, "INFO", "log data", "bench", False, None, 0)
+
+
+def test_format_log_data_below_minlevel(benchmark):
+    self = MockLogger(minlevel=30)
+    benchmark(format_log_data, self, "INFO", lambda: repr(self), "", False, None, 0)
+
+
+def test_format_log_data_deduplicated(benchmark):
+    self = MockLogger(deduplicator=LogDeduplicator(60, 1024))
+    benchmark(format_log_data, self, "ERROR", "log data", "bench", False, None, 0)
+
+
+def test_format_log_many(benchmark):
+    self = MockLogger()
+    records = [("info", f"log data {i}") for i in range(BATCH_SIZE)]
+    benchmark.extra_info["records"] = BATCH_SIZE
+    benchmark(format_log_many, self, records)
+
+
+def traced_memory(func, *args):
+    """
+    Call the function BATCH_SIZE times,
+    return the size of the result and the peak traced memory per call in bytes,
+    the peak includes the intermediate allocations of the call
+    """
+    func(*args)
+    retained = peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(BATCH_SIZE):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = func(*args)
+            current, call_peak = tracemalloc.get_traced_memory()
+            retained += current - before
+            peak += call_peak - before
+            del result
+    finally:
+        tracemalloc.stop()
+    return retained / BATCH_SIZE, peak / BATCH_SIZE
+
+
+def test_format_log_data_memory(benchmark):
+    self = MockLogger()
+    args = (self, "INFO", "log data", "", False, None, 0)
+    retained, peak = traced_memory(format_log_data, *args)
+    benchmark.extra_info.update(
+        {"result_bytes_per_record": retained, "peak_bytes_per_record": peak}
+    )
+    benchmark(format_log_data, *args)
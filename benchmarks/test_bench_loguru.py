@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+
+BATCH_SIZE = 100
+
+
+def test_loguru_log(benchmark, loguru_logger):
+    benchmark(loguru_logger.log, "info", "log data")
+
+
+def test_loguru_log_custom_func_name(benchmark, loguru_logger):
+    benchmark(loguru_logger.log, "info", "log data", "bench")
+
+
+def test_loguru_log_many(benchmark, loguru_logger):
+    records = [("info", f"log data {i}") for i in range(BATCH_SIZE)]
+    benchmark.extra_info["records"] = BATCH_SIZE
+    benchmark(loguru_logger.log_many, records)
+
+
+def test_loguru_async_log(benchmark, loguru_logger, event_loop_runner):
+    benchmark(lambda: event_loop_runner(loguru_logger.async_log("info", "log data")))
+
+
+def test_loguru_async_log_background(benchmark, async_loguru_logger, event_loop_runner):
+    benchmark(
+        lambda: event_loop_runner(async_loguru_logger.async_log("info", "log data"))
+    )
+    event_loop_runner(async_loguru_logger.complete())
+
+
+async def log_with_heartbeat(loguru, records):
+    """
+    Log the records while a heartbeat task sleeps 1 ms at a time,
+    return the longest delay of the heartbeat, i.e. the worst event loop lag
+    """
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            started = loop.time()
+            await asyncio.sleep(0.001)
+            lags.append(loop.time() - started - 0.001)
+
+    task = asyncio.create_task(heartbeat())
+    for i in range(records):
+        await loguru.async_log("info", f"log data {i}")
+        if i % 10 == 0:
+            await asyncio.sleep(0)
+    await loguru.complete()
+    done.set()
+    await task
+    return max(lags, default=0)
+
+
+@pytest.mark.parametrize("useasync", [False, True], ids=["inline", "background"])
+def test_loguru_async_log_loop_lag(request, benchmark, event_loop_runner, useasync):
+    loguru = request.getfixturevalue(
+        "async_loguru_logger" if useasync else "loguru_logger"
+    )
+    lags = []
+    benchmark.extra_info["records"] = BATCH_SIZE
+    benchmark.pedantic(
+        lambda: lags.append(event_loop_runner(log_with_heartbeat(loguru, BATCH_SIZE))),
+        rounds=5,
+    )
+    benchmark.extra_info["max_loop_lag_seconds"] = max(lags)
@@ -0,0 +1,17 @@
+from time import perf_counter
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+
+
+def test_loggermetrics_record_format(benchmark):
+    metrics = LoggerMetrics("bench")
+    benchmark(lambda: metrics.record_format(perf_counter()))
+
+
+def test_loggermetrics_record_ship(benchmark):
+    metrics = LoggerMetrics("bench")
+    benchmark(lambda: metrics.record_ship(perf_counter(), 1, 200))
+
+
+def test_loguru_log_with_metrics(benchmark, loguru_logger):
+    loguru_logger.instrumentation = LoggerMetrics("bench")
+    benchmark(loguru_logger.log, "info", "log data", "bench")
@@ -0,0 +1,45 @@
+import threading
+import time
+import pytest
+from src.loggingsfactory.helpers.shipper import BulkShipper
+
+RECORDS = 1000
+DOCUMENT = (
+    '{"log": "log data", "version": "1.0", "logger_level": "INFO", '
+    '"functional_name": "bench", "app_name": "bench", '
+    '"timestamp": "2020-01-01T00:00:00.000000+00:00"}'
+)
+
+
+@pytest.mark.parametrize("chunksize", [1, 64], ids=["shared", "thread_buffers"])
+@pytest.mark.parametrize("threads", [1, 4, 16, 64])
+def test_bulk_shipper_put_threads(benchmark, threads, chunksize):
+    """Queue records from many threads at once, and store the mean latency of each put"""
+    shipper = BulkShipper(
+        lambda batch: None, 500, 0.01, threads * RECORDS * 10, chunksize=chunksize
+    )
+    latencies = []
+
+    def put_records(barrier):
+        barrier.wait()
+        started = time.perf_counter()
+        for _ in range(RECORDS):
+            shipper.put("INFO", DOCUMENT)
+        latencies.append((time.perf_counter() - started) / RECORDS)
+
+    def put_from_threads():
+        barrier = threading.Barrier(threads)
+        workers = [
+            threading.Thread(target=put_records, args=(barrier,))
+            for _ in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        shipper.flush(10)
+
+    benchmark.extra_info["records"] = threads * RECORDS
+    benchmark.pedantic(put_from_threads, rounds=5)
+    benchmark.extra_info["put_seconds"] = sum(latencies) / len(latencies)
+    shipper.close(10)
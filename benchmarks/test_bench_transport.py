@@ -0,0 +1,61 @@
+import multiprocessing
+import pytest
+from src.loggingsfactory.helpers.ringbuffer import RingBuffer
+
+RECORDS = 1000
+DOCUMENT = (
+    '{"log": "log data", "version": "1.0", "logger_level": "INFO", '
+    '"functional_name": "bench", "app_name": "bench", '
+    '"timestamp": "2020-01-01T00:00:00.000000+00:00"}'
+)
+
+
+@pytest.fixture
+def ring():
+    ring = RingBuffer()
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def test_ringbuffer_hand_off(benchmark, ring):
+    """Write a batch of records to the ring buffer and read them as memoryviews"""
+    prefix = b"\x04INFO"
+
+    def hand_off():
+        for _ in range(RECORDS):
+            ring.put(prefix, DOCUMENT.encode())
+        ring.drain(lambda record: str(record[5:], "utf-8"))
+
+    benchmark.extra_info["records"] = RECORDS
+    benchmark(hand_off)
+
+
+def test_multiprocessing_queue_hand_off(benchmark):
+    """Pickle a batch of records through a multiprocessing queue"""
+    queue = multiprocessing.Queue()
+
+    def hand_off():
+        for _ in range(RECORDS):
+            queue.put(("INFO", DOCUMENT))
+        for _ in range(RECORDS):
+            queue.get()
+
+    benchmark.extra_info["records"] = RECORDS
+    benchmark(hand_off)
+    queue.close()
+
+
+def test_pipe_hand_off(benchmark):
+    """Send serialized records through a pipe, read one by one to stay below the pipe capacity"""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+
+    def hand_off():
+        for _ in range(RECORDS):
+            sender.send_bytes(f"INFO\n{DOCUMENT}".encode())
+            receiver.recv_bytes().decode().partition("\n")
+
+    benchmark.extra_info["records"] = RECORDS
+    benchmark(hand_off)
+    sender.close()
+    receiver.close()
@@ -1,6 +1,6 @@
 """Logger related configurations"""
 from enum import IntEnum, Enum, Flag
-from typing import List
+from typing import Dict, List
 
 
 class BasicConfig(IntEnum):
@@ -14,6 +14,35 @@ class BasicConfig(IntEnum):
     MAX_SIZE = 25
     PORT = 9201
     DEFAULT_SIZE = 10000
+    DEDUP_SIZE = 1024
+    BATCH_SIZE = 500
+    FLUSH_INTERVAL = 1
+    QUEUE_SIZE = 10000
+    COLLECTOR_TIMEOUT = 10
+    COLLECTOR_CHECK_INTERVAL = 1
+    COLLECTOR_IDLE_TIMEOUT = 60
+    RING_SIZE = 4194304
+    COMPRESS_MIN_SIZE = 1024
+    DEAD_TIMEOUT = 60
+    MAX_QUERY_INDICES = 64
+    MAX_QUERY_BUCKETS = 10000
+    TEMPLATE_SHARDS = 1
+    TEMPLATE_REPLICAS = 1
+    TEMPLATE_PRIORITY = 200
+    CALLSITE_CACHE_SIZE = 4096
+    SAMPLING_SCOPE_SIZE = 1000
+    SAMPLING_TOTAL_SIZE = 100000
+    URGENT_BATCH_SIZE = 50
+    SHED_PERCENT = 80
+    MIN_BATCH_SIZE = 10
+    MAX_IN_FLIGHT = 4
+    TARGET_LATENCY = 1
+    BULK_RETRIES = 3
+    RETRY_BACKOFF_MS = 100
+    CHUNK_SIZE = 64
+    SHUTDOWN_TIMEOUT = 5
+    SESSION_CLOSE_TIMEOUT = 1
+    DEDUP_FLUSH_INTERVAL = 1
 
 
 class BoolConfig(Flag):
@@ -32,6 +61,32 @@ class StringConfig(Enum):
     VERSION = "1.0"
     SCHEME = "https"
     NUM_OF_DECORATORS = "num_of_decorators"
+    COLLECTOR_ADDRESS = "logs/collector.sock"
+    TEMPLATE_PREFIX = "loggingsfactory-"
+    REFRESH_INTERVAL = "5s"
+
+
+class Transports(Enum):
+    """Supported transports between the worker processes and the collector"""
+
+    SOCKET = "socket"
+    SHARED_MEMORY = "sharedmemory"
+
+
+class Compressions(Enum):
+    """Supported request body compressions of the Elasticsearch loggers"""
+
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
+class Selectors(Enum):
+    """Supported strategies selecting the Elasticsearch node of each request"""
+
+    ROUND_ROBIN = "roundrobin"
+    RANDOM = "random"
+    LATENCY = "latency"
+    LEAST_OUTSTANDING = "leastoutstanding"
 
 
 class LogLevels(Enum):
@@ -45,4 +100,18 @@ class LogLevels(Enum):
     EXCEPTION = "EXCEPTION"
 
 
+class LogLevelNumbers(IntEnum):
+    """Severity of the supported log levels"""
+
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+    EXCEPTION = 40
+    CRITICAL = 50
+
+
 LOG_LEVELS: List[str] = [level.value for level in LogLevels]
+LOG_LEVEL_NUMBERS: Dict[str, int] = {
+    name: level.value for name, level in LogLevelNumbers.__members__.items()
+}
@@ -14,3 +14,31 @@ class LoggerKeys(Enum):
     APPNAME = "appname"
     VERSION = "version"
     PORT = "port"
+    DEDUP_WINDOW = "dedupwindow"
+    DEDUP_SIZE = "dedupsize"
+    MIN_LEVEL = "minlevel"
+    METRICS = "metrics"
+    BUFFERED = "buffered"
+    BATCH_SIZE = "batchsize"
+    FLUSH_INTERVAL = "flushinterval"
+    QUEUE_SIZE = "queuesize"
+    MULTIPROCESS = "multiprocess"
+    COLLECTOR = "collector"
+    TRANSPORT = "transport"
+    RING_SIZE = "ringsize"
+    COMPRESSION = "compression"
+    COMPRESSION_LEVEL = "compressionlevel"
+    MAX_SIZE = "maxsize"
+    TIMEOUT = "timeout"
+    KEEP_ALIVE = "keepalive"
+    SNIFF = "sniff"
+    SNIFF_INTERVAL = "sniffinterval"
+    SELECTOR = "selector"
+    DEAD_TIMEOUT = "deadtimeout"
+    DATA_STREAM = "datastream"
+    TEE = "tee"
+    SAMPLING_SIZE = "samplingsize"
+    URGENT_LEVEL = "urgentlevel"
+    MAX_IN_FLIGHT = "maxinflight"
+    TARGET_LATENCY = "targetlatency"
+    SHUTDOWN_TIMEOUT = "shutdowntimeout"
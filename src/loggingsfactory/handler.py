@@ -0,0 +1,124 @@
+"""Standard library logging handler shipping the records with a Loggers backend"""
+import asyncio
+from bisect import bisect_right
+from concurrent.futures import Future
+import logging
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+from loguru import logger as loguru_logger
+
+from .constants.config import LogLevelNumbers, LogLevels
+from .helpers.formats import format_coalesced_log_data, format_log_data
+from .helpers.timestamps import timestamps
+from .loggers.asyncelk import AsyncElk
+
+# standard library level numbers and the matching log levels, sorted by number
+LEVELS: List[Tuple[int, str]] = [
+    (LogLevelNumbers.DEBUG.value, LogLevels.DEBUG.value),
+    (LogLevelNumbers.INFO.value, LogLevels.INFO.value),
+    (LogLevelNumbers.WARNING.value, LogLevels.WARNING.value),
+    (LogLevelNumbers.ERROR.value, LogLevels.ERROR.value),
+    (LogLevelNumbers.CRITICAL.value, LogLevels.CRITICAL.value),
+]
+LEVEL_NUMBERS: List[int] = [number for number, _ in LEVELS]
+THREAD_PREFIX: str = "loggingsfactory-"
+
+
+class LoggersHandler(logging.Handler):
+    """
+    Standard library logging handler, e.g. for the logs of urllib3, aiohttp or sqlalchemy,
+    shipping the records with a Loguru, Elk, AsyncElk or Tee logger.
+
+    The function name, level and creation time of the standard library records are used
+    as the functional_name, logger_level and timestamp of the documents,
+    without inspecting the call stack. Records go through the minimum log level,
+    deduplication, bound context and shipping path of the logger,
+    use a buffered Elk, an async Loguru or a Tee logger to ship them from a background thread.
+
+    Records logged by the loggingsfactory threads, by the excluded loggers,
+    or while the handler is shipping a record are dropped, so shipping never logs itself.
+    """
+
+    def __init__(
+        self,
+        logger: Any,
+        level: int = logging.NOTSET,
+        exclude: Sequence[str] = ("elasticsearch",),
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        """
+        Initialize handler
+
+        - logger: Loguru, Elk, AsyncElk or Tee = logger shipping the records, e.g. Loggers(...).
+        - level: int = minimum standard library level of the records.
+        - exclude: Sequence[str] = names of the loggers whose records are dropped, including their children.
+        - loop: asyncio.AbstractEventLoop = event loop of an AsyncElk logger, the records are shipped
+                                            by tasks of the loop. Default is the running loop.
+        """
+        super().__init__(level)
+        self.logger: Any = logger
+        self.exclude: Tuple[str, ...] = tuple(exclude)
+        self.loop: Optional[asyncio.AbstractEventLoop] = loop
+        if isinstance(logger, AsyncElk) and loop is None:
+            self.loop = asyncio.get_running_loop()
+        self.shipping: threading.local = threading.local()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Format the record and ship it with the logger"""
+        if (
+            getattr(self.shipping, "active", False)
+            or threading.current_thread().name.startswith(THREAD_PREFIX)
+            or self._excluded(record.name)
+        ):
+            return
+
+        self.shipping.active = True
+        try:
+            level: str = LEVELS[
+                max(bisect_right(LEVEL_NUMBERS, record.levelno) - 1, 0)
+            ][1]
+            document: Optional[str] = format_log_data(
+                self.logger,
+                level,
+                self.format(record),
+                record.funcName or record.name,
+                False,
+                timestamps.format(record.created),
+                0,
+            )
+            if document is not None:
+                self._ship(level, document)
+            for summary_level, summary in format_coalesced_log_data(self.logger):
+                self._ship(summary_level, summary)
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+        finally:
+            self.shipping.active = False
+
+    def _excluded(self, name: str) -> bool:
+        """Return True if the records of the logger name are dropped"""
+        return any(
+            name == excluded or name.startswith(f"{excluded}.")
+            for excluded in self.exclude
+        )
+
+    def _ship(self, level: str, document: str) -> None:
+        """Ship a document with the background writer, the event loop or the logger"""
+        # pylint: disable=protected-access
+        writer: Any = getattr(self.logger, "writer", None)
+        if writer is not None:
+            writer.put(level, document)
+        elif self.loop is not None:
+            asyncio.run_coroutine_threadsafe(
+                self.logger._ship(level, document), self.loop
+            ).add_done_callback(_report_failure)
+        else:
+            self.logger._ship(level, document)
+
+
+def _report_failure(future: "Future[None]") -> None:
+    """Warn about a record the event loop failed to ship"""
+    if not future.cancelled() and future.exception() is not None:
+        loguru_logger.warning(
+            f"LoggersHandler failed to ship a record: {future.exception()!r}"
+        )
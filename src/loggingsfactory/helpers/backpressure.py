@@ -0,0 +1,64 @@
+"""Adapt the bulk request size and concurrency to the Elasticsearch backpressure"""
+import threading
+from typing import Optional
+
+from ..constants.config import BasicConfig
+from ..helpers.metrics import LoggerMetrics
+
+
+class AdaptiveBatch:
+    """
+    Additive increase, multiplicative decrease (AIMD) of the bulk request size and concurrency.
+
+    A request that was rejected, e.g. with 429 es_rejected_execution_exception, or slower than
+    the target latency halves the batch size and the number of concurrent requests.
+    A fast request grows the batch size by a tenth of its maximum, and once the batch size
+    is at its maximum, allows one more concurrent request.
+
+    - self.size: int = current maximum number of documents per request.
+    - self.concurrency: int = current maximum number of requests in flight.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        maxconcurrency: int = BasicConfig.MAX_IN_FLIGHT.value,
+        targetlatency: float = BasicConfig.TARGET_LATENCY.value,
+        instrumentation: Optional[LoggerMetrics] = None,
+    ) -> None:
+        """
+        Initialize controller, starting with the maximum batch size and a single request in flight
+
+        - maxsize: int = maximum number of documents per request.
+        - maxconcurrency: int = maximum number of requests in flight.
+        - targetlatency: float = number of seconds above which a request is considered slow.
+        - instrumentation: LoggerMetrics = records the batch_limit and in_flight_limit gauges.
+        """
+        self.maxsize: int = maxsize
+        self.minsize: int = min(BasicConfig.MIN_BATCH_SIZE.value, maxsize)
+        self.increment: int = max(maxsize // 10, 1)
+        self.maxconcurrency: int = maxconcurrency
+        self.targetlatency: float = targetlatency
+        self.instrumentation: Optional[LoggerMetrics] = instrumentation
+        self.size: int = maxsize
+        self.concurrency: int = 1
+        self.lock: threading.Lock = threading.Lock()
+        self._report()
+
+    def record(self, latency: float, rejected: bool) -> None:
+        """Adapt the batch size and concurrency to the latency and rejection of a request"""
+        with self.lock:
+            if rejected or latency > self.targetlatency:
+                self.size = max(self.size // 2, self.minsize)
+                self.concurrency = max(self.concurrency // 2, 1)
+            elif self.size < self.maxsize:
+                self.size = min(self.size + self.increment, self.maxsize)
+            else:
+                self.concurrency = min(self.concurrency + 1, self.maxconcurrency)
+            self._report()
+
+    def _report(self) -> None:
+        """Record the current batch size and concurrency"""
+        if self.instrumentation is not None:
+            self.instrumentation.set("batch_limit", self.size)
+            self.instrumentation.set("in_flight_limit", self.concurrency)
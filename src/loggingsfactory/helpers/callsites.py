@@ -0,0 +1,53 @@
+"""Cache of the static metadata of the functions calling the log functions"""
+import sys
+from types import CodeType, FrameType
+from typing import NamedTuple
+from weakref import WeakKeyDictionary
+
+from ..constants.config import BasicConfig
+
+
+class CallSite(NamedTuple):
+    """
+    Static metadata of a function calling a log function
+
+    - name: str = function name, used as the functional_name of the records.
+    - qualname: str = qualified name of the function, e.g. Class.method.
+    - module: str = name of the module defining the function.
+    - filename: str = file defining the function.
+    - line: int = first line of the function.
+    """
+
+    name: str
+    qualname: str
+    module: str
+    filename: str
+    line: int
+
+
+# call sites keyed by the code object of the function, dropped with the code object
+callsites: "WeakKeyDictionary[CodeType, CallSite]" = WeakKeyDictionary()
+
+
+def get_callsite(depth: int) -> CallSite:
+    """
+    Return the call site of the frame 'depth' frames above the caller of this function,
+    e.g. 0 is the caller, 1 is the caller of the caller.
+
+    Only the frame is looked up on repeated calls from the same function,
+    the cache is cleared once it holds CALLSITE_CACHE_SIZE call sites.
+    """
+    frame: FrameType = sys._getframe(depth + 1)  # pylint: disable=protected-access
+    code: CodeType = frame.f_code
+    callsite: CallSite = callsites.get(code)
+    if callsite is None:
+        if len(callsites) >= BasicConfig.CALLSITE_CACHE_SIZE.value:
+            callsites.clear()
+        callsite = callsites[code] = CallSite(
+            code.co_name,
+            getattr(code, "co_qualname", code.co_name),
+            frame.f_globals.get("__name__", ""),
+            code.co_filename,
+            code.co_firstlineno,
+        )
+    return callsite
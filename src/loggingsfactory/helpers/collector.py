@@ -0,0 +1,515 @@
+"""
+Multiprocess logging: worker processes send formatted records to a single collector process.
+
+The collector process owns the Loguru file sink or the Elk bulk shipper,
+and receives the records from the workers over a Unix socket,
+or through a shared memory ring buffer per worker.
+"""
+import atexit
+from collections import deque
+import json
+from multiprocessing.connection import Client, Connection, Listener
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Deque, Dict, Optional
+
+from ..constants.config import BasicConfig
+from ..constants.keys import LoggerKeys
+from ..helpers.metrics import LoggerMetrics
+from ..helpers.ringbuffer import RingBuffer
+
+FAMILY: str = "AF_UNIX"
+RING: bytes = b"\x00ring\n"
+STOP: bytes = b"\x00stop\n"
+RING_POLL_INTERVAL: float = 0.01
+
+
+def is_collector_running(address: str) -> bool:
+    """Return True if a collector accepts connections on the address"""
+    try:
+        Client(address, family=FAMILY).close()
+    except OSError:
+        return False
+    return True
+
+
+def start_collector(address: str, config: Dict[str, Any]) -> Optional[subprocess.Popen]:
+    """
+    Start a collector process unless one is already running on the address.
+    Return the started process, or None if a collector was already running.
+
+    The collector is started in a new interpreter, so it does not inherit
+    the locks, threads and sinks of the process starting it, and in a new session,
+    so it outlives the process starting it and is not interrupted with its process group.
+    It exits once no worker was connected for COLLECTOR_IDLE_TIMEOUT seconds, or on stop_collector.
+    """
+    # POSIX only like the Unix sockets, imported here so the package imports on Windows
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    os.makedirs(os.path.dirname(os.path.abspath(address)), exist_ok=True)
+    with open(f"{address}.lock", "w", encoding="utf-8") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if is_collector_running(address):
+            return None
+        if os.path.exists(address):
+            os.unlink(address)
+
+        process: subprocess.Popen = subprocess.Popen(
+            [sys.executable, "-m", __name__],
+            stdin=subprocess.PIPE,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, sys.path))},
+            start_new_session=True,
+        )
+        try:
+            process.stdin.write(json.dumps({**config, "address": address}).encode())
+            process.stdin.close()
+        except BrokenPipeError:
+            # the process already exited, reported below
+            pass
+
+        deadline: float = time.monotonic() + BasicConfig.COLLECTOR_TIMEOUT.value
+        while not is_collector_running(address):
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError(f"Log collector failed to start on '{address}'")
+            time.sleep(0.01)
+        return process
+
+
+def stop_collector(address: str) -> bool:
+    """
+    Ask the collector running on the address to ship its pending records and exit.
+    Return False if no collector was running.
+    """
+    try:
+        with Client(address, family=FAMILY) as connection:
+            connection.send_bytes(STOP)
+    except OSError:
+        return False
+    return True
+
+
+class CollectorSupervisor:
+    """
+    Restart the collector process started by this process when it crashes.
+    The collector outlives this process, the clients of every worker restart it
+    once it exited when idle or was stopped, stop it with the stop method or stop_collector.
+    """
+
+    def __init__(
+        self, address: str, config: Dict[str, Any], process: subprocess.Popen
+    ) -> None:
+        """Initialize supervisor and start its thread"""
+        self.address: str = address
+        self.config: Dict[str, Any] = config
+        self.process: Optional[subprocess.Popen] = process
+        self.pid: int = os.getpid()
+        self.stopped: threading.Event = threading.Event()
+        self.thread: threading.Thread = threading.Thread(
+            target=self._run, name="loggingsfactory-collector-supervisor", daemon=True
+        )
+        self.thread.start()
+
+    def _run(self) -> None:
+        """Restart the collector if it crashed, until another process started it"""
+        while not self.stopped.wait(BasicConfig.COLLECTOR_CHECK_INTERVAL.value):
+            if self.process is not None:
+                if self.process.poll() is None:
+                    continue
+                if self.process.returncode == 0:
+                    return
+            try:
+                process: Optional[subprocess.Popen] = start_collector(
+                    self.address, self.config
+                )
+            except RuntimeError:
+                self.process = None
+                continue
+            if process is None:
+                return
+            self.process = process
+
+    def stop(self, timeout: float = BasicConfig.COLLECTOR_TIMEOUT.value) -> None:
+        """Stop the collector, the collector ships its pending records before exiting"""
+        if self.pid != os.getpid():
+            return
+        self.stopped.set()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class CollectorClient:
+    """
+    Send formatted records from a worker process to the collector.
+
+    The connection is opened lazily per process, so a client created before forking
+    opens its own connection in each forked worker.
+    Records are kept in a bounded buffer while the collector is unreachable,
+    e.g. while it is restarting, and are sent once it is reachable again.
+    With a configuration, the client restarts the collector from a background thread
+    when it is unreachable, whichever worker started it.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        pendingsize: int,
+        instrumentation: Optional[LoggerMetrics] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Initialize client
+
+        - address: str = Unix socket address of the collector.
+        - pendingsize: int = maximum number of records kept while the collector is unreachable,
+                             the oldest records are dropped first.
+        - instrumentation: LoggerMetrics = records the enqueue time, pending records and drops.
+        - config: Dict[str, Any] = configuration of the collector restarted by the client,
+                                   the collector is not restarted if None.
+        """
+        self.address: str = address
+        self.pendingsize: int = pendingsize
+        self.instrumentation: Optional[LoggerMetrics] = instrumentation
+        self.config: Optional[Dict[str, Any]] = config
+        self.pid: Optional[int] = None
+        self.lock: threading.Lock = threading.Lock()
+        self.connection: Optional[Connection] = None
+        self.pending: Deque[bytes] = deque()
+        self.retry_at: float = 0
+        self.restarter: Optional[threading.Thread] = None
+
+    def _reset(self) -> None:
+        """Reset the connection state of the current process"""
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.pending = deque()
+        self.retry_at = 0
+        self.restarter = None
+
+    def send(self, level: str, document: str) -> None:
+        """Send a formatted record to the collector"""
+        if self.pid != os.getpid():
+            self._reset()
+
+        started: float = time.perf_counter()
+        payload: bytes = f"{level}\n{document}".encode()
+        with self.lock:
+            if self.connection is None and not self._connect():
+                self._buffer(payload)
+            else:
+                try:
+                    while self.pending:
+                        self.connection.send_bytes(self.pending[0])
+                        self.pending.popleft()
+                    self.connection.send_bytes(payload)
+                except OSError:
+                    self.connection = None
+                    self._buffer(payload)
+        if self.instrumentation is not None:
+            self.instrumentation.record_enqueue(started, len(self.pending))
+
+    def close(self) -> int:
+        """
+        Send the records kept while the collector was unreachable and close the connection.
+        Return the number of records left unsent.
+        """
+        if self.pid != os.getpid():
+            return 0
+
+        with self.lock:
+            if self.connection is None and not self._connect(restart=False):
+                return len(self.pending)
+            try:
+                while self.pending:
+                    self.connection.send_bytes(self.pending[0])
+                    self.pending.popleft()
+            except OSError:
+                pass
+            self.connection.close()
+            self.connection = None
+            return len(self.pending)
+
+    def _connect(self, restart: bool = True) -> bool:
+        """
+        Connect to the collector, retried at most once per reconnect interval.
+        Restart the collector if it is unreachable, unless restart is False.
+        """
+        now: float = time.monotonic()
+        if now < self.retry_at:
+            return False
+        try:
+            self.connection = Client(self.address, family=FAMILY)
+        except OSError:
+            self.retry_at = now + BasicConfig.COLLECTOR_CHECK_INTERVAL.value
+            if restart:
+                self._restart()
+            return False
+        return True
+
+    def _restart(self) -> None:
+        """Restart the collector from a background thread, unless a restart is in progress"""
+        if self.config is None or (
+            self.restarter is not None and self.restarter.is_alive()
+        ):
+            return
+        self.restarter = threading.Thread(
+            target=_restart_collector,
+            args=(self.address, self.config),
+            name="loggingsfactory-collector-restart",
+            daemon=True,
+        )
+        self.restarter.start()
+
+    def _buffer(self, payload: bytes) -> None:
+        """Keep a record until the collector is reachable, dropping the oldest record if full"""
+        if len(self.pending) >= self.pendingsize:
+            self.pending.popleft()
+            if self.instrumentation is not None:
+                self.instrumentation.increment("drops")
+        self.pending.append(payload)
+
+
+class SharedMemoryClient(CollectorClient):
+    """
+    Send formatted records from a worker process to the collector through a shared memory ring buffer.
+
+    Each worker process writes to a ring buffer of its own, registered with the collector
+    over the Unix socket, which is only used to detect that the collector exited.
+    Records are kept in the ring buffer while the collector is unreachable,
+    and dropped when the ring buffer is full.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        ringsize: int,
+        instrumentation: Optional[LoggerMetrics] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Initialize client
+
+        - address: str = Unix socket address of the collector.
+        - ringsize: int = number of bytes of the ring buffer of each worker process.
+        - instrumentation: LoggerMetrics = records the enqueue time and drops.
+        - config: Dict[str, Any] = configuration of the collector restarted by the client.
+        """
+        super().__init__(address, 0, instrumentation, config)
+        self.ringsize: int = ringsize
+        self.prefixes: Dict[str, bytes] = {}
+        self.ring: Optional[RingBuffer] = None
+        self.check_at: float = 0
+
+    def _reset(self) -> None:
+        """Create the ring buffer of the current process"""
+        super()._reset()
+        self.ring = RingBuffer(size=self.ringsize)
+        self.check_at = 0
+        atexit.register(_unlink, self.ring, self.pid)
+
+    def send(self, level: str, document: str) -> None:
+        """Write a formatted record to the ring buffer"""
+        if self.pid != os.getpid():
+            self._reset()
+
+        started: float = time.perf_counter()
+        prefix: Optional[bytes] = self.prefixes.get(level)
+        if prefix is None:
+            prefix = self.prefixes[level] = bytes((len(level),)) + level.encode()
+        with self.lock:
+            if time.monotonic() >= self.check_at:
+                self._register()
+            written: bool = self.ring.put(prefix, document.encode())
+        if self.instrumentation is not None:
+            if written:
+                self.instrumentation.enqueue_seconds.observe(
+                    time.perf_counter() - started
+                )
+            else:
+                self.instrumentation.increment("drops")
+
+    def close(self) -> int:
+        """Close the connection, the collector ships the records left in the ring buffer"""
+        if self.pid != os.getpid():
+            return 0
+
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+        return 0
+
+    def _register(self) -> None:
+        """Register the ring buffer with the collector, unless the collector is still connected"""
+        self.check_at = time.monotonic() + BasicConfig.COLLECTOR_CHECK_INTERVAL.value
+        if self.connection is not None:
+            try:
+                # the collector never sends after its acknowledgement, readable means closed
+                if not self.connection.poll():
+                    return
+            except OSError:
+                pass
+            self.connection.close()
+            self.connection = None
+
+        if self._connect():
+            try:
+                self.connection.send_bytes(RING + self.ring.name.encode())
+                self.connection.recv_bytes()
+            except (EOFError, OSError):
+                self.connection = None
+
+
+def _restart_collector(address: str, config: Dict[str, Any]) -> None:
+    """Start the collector unless another worker restarted it, a failed start is retried later"""
+    try:
+        start_collector(address, config)
+    except RuntimeError:
+        pass
+
+
+def _unlink(ring: RingBuffer, pid: int) -> None:
+    """
+    Remove the ring buffer segment of a worker process when it exits,
+    the collector keeps its mapping of the segment to ship the remaining records.
+    """
+    if pid == os.getpid():
+        ring.close()
+        ring.unlink()
+
+
+def _ship_record(backend: Any, record: memoryview) -> None:
+    """Ship a ring buffer record, made of the level size, the level and the document"""
+    size: int = record[0]
+    backend._ship(  # pylint: disable=protected-access
+        str(record[1 : size + 1], "ascii"), str(record[size + 1 :], "utf-8")
+    )
+
+
+def _drain(backend: Any, connection: Connection, name: str) -> None:
+    """Ship the records of a worker ring buffer until the worker disconnects"""
+    ring: RingBuffer = RingBuffer(name)
+
+    def ship(record: memoryview) -> None:
+        _ship_record(backend, record)
+
+    try:
+        connection.send_bytes(b"")
+        wait: float = 0
+        while not connection.poll(wait):
+            wait = (
+                0 if ring.drain(ship) else min(wait * 2 or 0.0001, RING_POLL_INTERVAL)
+            )
+    except OSError:
+        pass
+    finally:
+        ring.drain(ship)
+        ring.close()
+
+
+def _receive(backend: Any, connection: Connection) -> None:
+    """Ship the records received from a worker until it disconnects"""
+    with connection:
+        while True:
+            try:
+                payload: bytes = connection.recv_bytes()
+            except (EOFError, OSError):
+                return
+            if payload.startswith(RING):
+                _drain(backend, connection, payload[len(RING) :].decode())
+                return
+            if payload == STOP:
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            level, _, document = payload.decode().partition("\n")
+            backend._ship(level, document)  # pylint: disable=protected-access
+
+
+class WorkerCount:
+    """Number of workers connected to the collector, exiting the collector once idle"""
+
+    def __init__(self) -> None:
+        """Initialize count, the collector is idle since it started"""
+        self.connected: int = 0
+        self.idle_since: float = time.monotonic()
+        self.lock: threading.Lock = threading.Lock()
+
+    def serve(self, backend: Any, connection: Connection) -> None:
+        """Ship the records of a worker while counting it as connected"""
+        with self.lock:
+            self.connected += 1
+        try:
+            _receive(backend, connection)
+        finally:
+            with self.lock:
+                self.connected -= 1
+                self.idle_since = time.monotonic()
+
+    def exit_when_idle(self) -> None:
+        """Send SIGTERM to the collector once no worker was connected for COLLECTOR_IDLE_TIMEOUT seconds"""
+        while True:
+            time.sleep(BasicConfig.COLLECTOR_CHECK_INTERVAL.value)
+            with self.lock:
+                idle: bool = (
+                    not self.connected
+                    and time.monotonic() - self.idle_since
+                    >= BasicConfig.COLLECTOR_IDLE_TIMEOUT.value
+                )
+            if idle:
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+
+
+def run_collector(address: str, config: Dict[str, Any]) -> None:
+    """
+    Accept worker connections and ship their records with the configured backend.
+    Ship the pending records and exit on SIGTERM, on stop_collector,
+    or once no worker was connected for COLLECTOR_IDLE_TIMEOUT seconds.
+    """
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from ..logging import Loggers
+
+    backend: Any = Loggers(
+        **{
+            **config,
+            LoggerKeys.MULTIPROCESS.value: False,
+            LoggerKeys.ASYNC.value: False,
+            LoggerKeys.BUFFERED.value: True,
+        }
+    )
+    listener: Listener = Listener(address, family=FAMILY)
+
+    def terminate(*_: Any) -> None:
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, terminate)
+    workers: WorkerCount = WorkerCount()
+    threading.Thread(target=workers.exit_when_idle, daemon=True).start()
+    try:
+        while True:
+            connection: Connection = listener.accept()
+            threading.Thread(
+                target=workers.serve, args=(backend, connection), daemon=True
+            ).start()
+    finally:
+        listener.close()
+        backend.close(BasicConfig.COLLECTOR_TIMEOUT.value)
+
+
+def main() -> None:
+    """Run the collector with the configuration received on stdin"""
+    config: Dict[str, Any] = json.loads(sys.stdin.read())
+    run_collector(config.pop("address"), config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Request body compression of the Elasticsearch loggers"""
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+import zlib
+
+from ..constants.config import BasicConfig, Compressions
+from ..helpers.metrics import LoggerMetrics
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# zlib window bits of the gzip container
+GZIP_WBITS: int = 31
+DEFAULT_LEVELS: Dict[str, int] = {
+    Compressions.GZIP.value: 6,
+    Compressions.ZSTD.value: 3,
+}
+
+
+class Compressor:
+    """
+    Compress the request bodies with gzip, or with zstd if the zstandard package is installed.
+
+    Elasticsearch decodes gzip request bodies,
+    zstd requires a proxy decoding them in front of the cluster.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        level: Optional[int] = None,
+        minsize: int = BasicConfig.COMPRESS_MIN_SIZE.value,
+        instrumentation: Optional[LoggerMetrics] = None,
+    ) -> None:
+        """
+        Initialize compressor
+
+        - algorithm: str = gzip or zstd.
+        - level: int = compression level, default is 6 for gzip and 3 for zstd.
+        - minsize: int = bodies smaller than this number of bytes are sent uncompressed.
+        - instrumentation: LoggerMetrics = records the compression ratio.
+        """
+        if algorithm not in DEFAULT_LEVELS:
+            raise ValueError(
+                f"Compression '{algorithm}' is not supported, "
+                + f"supported compressions are: {list(DEFAULT_LEVELS)}"
+            )
+        if algorithm == Compressions.ZSTD.value and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+
+        self.algorithm: str = algorithm
+        self.level: int = DEFAULT_LEVELS[algorithm] if level is None else level
+        self.minsize: int = minsize
+        self.instrumentation: Optional[LoggerMetrics] = instrumentation
+        self.headers: Dict[str, str] = {"content-encoding": algorithm}
+        self._compress: Callable[[bytes], bytes] = (
+            self._gzip if algorithm == Compressions.GZIP.value else self._zstd
+        )
+
+    def compress(self, body: str) -> Tuple[Union[str, bytes], Optional[Dict[str, str]]]:
+        """Return the body to send and its request headers"""
+        data: bytes = body.encode()
+        if len(data) < self.minsize:
+            return body, None
+
+        compressed: bytes = self._compress(data)
+        if self.instrumentation is not None:
+            self.instrumentation.record_compression(len(data), len(compressed))
+        return compressed, self.headers
+
+    def _gzip(self, data: bytes) -> bytes:
+        """Compress with gzip, zlib releases the GIL while compressing"""
+        compressor: Any = zlib.compressobj(self.level, zlib.DEFLATED, GZIP_WBITS)
+        return compressor.compress(data) + compressor.flush()
+
+    def _zstd(self, data: bytes) -> bytes:
+        """Compress with zstd, compressor instances are not thread safe"""
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
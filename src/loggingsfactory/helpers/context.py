@@ -0,0 +1,69 @@
+"""Fields bound to the current context and merged into every log record"""
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+# fields of the log record envelope, which bound fields cannot replace
+RESERVED_FIELDS: Tuple[str, ...] = (
+    "log",
+    "version",
+    "logger_level",
+    "functional_name",
+    "app_name",
+    "timestamp",
+    "count",
+    "first_seen",
+    "last_seen",
+)
+
+# bound fields, and their json members serialized when bound, e.g. ', "request_id": "abc"'
+bound_context: "ContextVar[Tuple[Dict[str, Any], str]]" = ContextVar(
+    "loggingsfactory_context", default=({}, "")
+)
+
+
+def bind_context(**fields: Any) -> Token:
+    """
+    Bind fields to the current context, e.g. the current asyncio task or thread,
+    in addition to the fields already bound.
+    Return a token restoring the previously bound fields with 'reset_context'.
+
+    The fields are serialized once when bound, so merging them into a record
+    does not encode them again.
+    """
+    reserved: Tuple[str, ...] = tuple(
+        field for field in fields if field in RESERVED_FIELDS
+    )
+    if reserved:
+        raise ValueError(f"Cannot bind the log record fields {', '.join(reserved)}")
+
+    merged: Dict[str, Any] = {**bound_context.get()[0], **fields}
+    return bound_context.set(
+        (merged, f", {json.dumps(merged)[1:-1]}" if merged else "")
+    )
+
+
+def reset_context(token: Token) -> None:
+    """Restore the fields bound before the token was returned"""
+    bound_context.reset(token)
+
+
+@contextmanager
+def contextualize(**fields: Any) -> Iterator[None]:
+    """Bind fields to the current context within the with block"""
+    token: Token = bind_context(**fields)
+    try:
+        yield
+    finally:
+        reset_context(token)
+
+
+def get_context() -> Dict[str, Any]:
+    """Return a copy of the fields bound to the current context"""
+    return dict(bound_context.get()[0])
+
+
+def serialized_context() -> str:
+    """Return the json members of the fields bound to the current context, empty if none"""
+    return bound_context.get()[1]
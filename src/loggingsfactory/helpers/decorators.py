@@ -1,12 +1,31 @@
 """Decorator helper functions for logging"""
 import functools
 from types import FunctionType
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Type
 from loguru import logger
 from elasticsearch import Elasticsearch, AsyncElasticsearch
+from elasticsearch.connection_pool import (
+    ConnectionSelector,
+    RandomSelector,
+    RoundRobinSelector,
+)
 
-from ..constants.config import BasicConfig, BoolConfig
-from ..helpers.formats import format_elk_url
+from ..constants.config import BasicConfig, BoolConfig, Selectors
+from ..constants.keys import LoggerKeys
+from ..helpers.formats import format_elk_urls
+from ..helpers.nodes import (
+    AsyncTrackedConnection,
+    LatencySelector,
+    LeastOutstandingSelector,
+    TrackedConnection,
+)
+
+SELECTORS: Dict[str, Type[ConnectionSelector]] = {
+    Selectors.ROUND_ROBIN.value: RoundRobinSelector,
+    Selectors.RANDOM.value: RandomSelector,
+    Selectors.LATENCY.value: LatencySelector,
+    Selectors.LEAST_OUTSTANDING.value: LeastOutstandingSelector,
+}
 
 
 def print_retry_exception_msg(
@@ -29,6 +48,44 @@ def print_retry_exception_msg(
     )
 
 
+def format_elk_client_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the connection pool, timeout, keep-alive, sniffing, node selection
+    and dead node quarantine options of the Elasticsearch and AsyncElasticsearch clients.
+
+    A failed node is quarantined for deadtimeout seconds,
+    doubled on each consecutive failure up to 32 times deadtimeout.
+    """
+    selector: str = kwargs.get(LoggerKeys.SELECTOR.value) or Selectors.ROUND_ROBIN.value
+    if selector not in SELECTORS:
+        raise ValueError(
+            f"Selector '{selector}' is not supported, "
+            + f"supported selectors are: {list(SELECTORS)}"
+        )
+
+    headers: Dict[str, str] = {}
+    if kwargs.get(LoggerKeys.COMPRESSION.value):
+        # accept compressed responses if the request bodies are compressed
+        headers["accept-encoding"] = "gzip,deflate"
+    if kwargs.get(LoggerKeys.KEEP_ALIVE.value) is False:
+        headers["connection"] = "close"
+
+    sniff: bool = bool(kwargs.get(LoggerKeys.SNIFF.value))
+    return {
+        "headers": headers,
+        "timeout": kwargs.get(LoggerKeys.TIMEOUT.value) or BasicConfig.TIMEOUT.value,
+        "maxsize": kwargs.get(LoggerKeys.MAX_SIZE.value) or BasicConfig.MAX_SIZE.value,
+        "sniff_on_start": sniff,
+        "sniff_on_connection_fail": sniff,
+        "sniffer_timeout": kwargs.get(LoggerKeys.SNIFF_INTERVAL.value)
+        if sniff
+        else None,
+        "selector_class": SELECTORS[selector],
+        "dead_timeout": kwargs.get(LoggerKeys.DEAD_TIMEOUT.value)
+        or BasicConfig.DEAD_TIMEOUT.value,
+    }
+
+
 def connect_elk(func):
     """
     Connect to Sync elasticsearch library.
@@ -38,13 +95,17 @@ def connect_elk(func):
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         result = func(self, *args, **kwargs)
+        options: Dict[str, Any] = format_elk_client_options(kwargs)
         for retry_attempt in range(BasicConfig.MAX_RETRIES.value):
             try:
                 self.es = Elasticsearch(
-                    [format_elk_url(kwargs)],
+                    format_elk_urls(kwargs),
+                    connection_class=TrackedConnection,
+                    instrumentation=getattr(self, "instrumentation", None),
                     use_ssl=BoolConfig.USE_SSL.value,
                     http_auth=(self.username, self.pw),
                     verify_certs=BoolConfig.VERIFY_CERTS.value,
+                    **options,
                 )
                 break
             except Exception as e:
@@ -63,15 +124,19 @@ def connect_async_elk(func):
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         result = func(self, *args, **kwargs)
+        options: Dict[str, Any] = format_elk_client_options(kwargs)
         for retry_attempt in range(BasicConfig.MAX_RETRIES.value):
             try:
                 self.es = AsyncElasticsearch(
-                    [format_elk_url(kwargs)],
+                    format_elk_urls(kwargs),
+                    connection_class=AsyncTrackedConnection,
+                    instrumentation=getattr(self, "instrumentation", None),
                     use_ssl=BoolConfig.USE_SSL.value,
                     http_auth=(self.username, self.pw),
                     verify_certs=BoolConfig.VERIFY_CERTS.value,
                     max_retries=BasicConfig.MAX_RETRIES.value,
                     retry_on_timeout=BoolConfig.RETRY_ON_TIMEOUT.value,
+                    **options,
                 )
                 break
             except Exception as e:
@@ -0,0 +1,182 @@
+"""Coalesce repeated log records within a time window"""
+from collections import OrderedDict
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+import weakref
+from loguru import logger
+
+from ..constants.config import BasicConfig
+
+
+class CoalescedLog:
+    """Repeated log record tracked by the LogDeduplicator"""
+
+    __slots__ = (
+        "level",
+        "functionname",
+        "data",
+        "count",
+        "first_seen",
+        "last_seen",
+        "started",
+    )
+
+    def __init__(
+        self, level: str, functionname: str, data: str, date: str, now: float
+    ) -> None:
+        """
+        Initialize coalesced log record
+
+        - self.data: str = json encoded log data.
+        - self.count: int = number of times the record was logged within the window,
+                            including the first record which is shipped as usual.
+        - self.first_seen: str = date of the first record of the window.
+        - self.last_seen: str = date of the latest record of the window.
+        - self.started: float = clock value when the window started.
+        """
+        self.level: str = level
+        self.functionname: str = functionname
+        self.data: str = data
+        self.count: int = 1
+        self.first_seen: str = date
+        self.last_seen: str = date
+        self.started: float = now
+
+
+class LogDeduplicator:
+    """
+    Collapse identical (level, functional_name, log) records within a time window.
+
+    The first record of a window is shipped as usual, following identical records are suppressed
+    and counted. Once the window closes, the record is returned by 'expired' as a CoalescedLog
+    so that a single summary document with count, first_seen and last_seen can be shipped.
+
+    Each window lasts 'window' seconds from its first record, even if the record keeps repeating.
+    Records are tracked in a bounded dict keyed by the level, the function name and the json encoded
+    log data of the record, in the order their window started,
+    the oldest window is closed early when the dict is full.
+    """
+
+    def __init__(
+        self, window: float, maxsize: int, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        Initialize deduplicator
+
+        - window: float = number of seconds identical records are collapsed for.
+        - maxsize: int = maximum number of distinct records tracked at once.
+        - clock: Callable[[], float] = monotonic clock used for the window.
+        """
+        self.window: float = window
+        self.maxsize: int = maxsize
+        self.clock: Callable[[], float] = clock
+        self.records: "OrderedDict[Tuple[str, str, str], CoalescedLog]" = OrderedDict()
+        self.closed: List[CoalescedLog] = []
+        self.lock: threading.Lock = threading.Lock()
+
+    def is_duplicate(self, level: str, functionname: str, data: str, date: str) -> bool:
+        """Track the record and return True if it should be suppressed"""
+        key: Tuple[str, str, str] = (level, functionname, data)
+        now: float = self.clock()
+        with self.lock:
+            record: CoalescedLog = self.records.get(key)
+            if record is not None and now - record.started < self.window:
+                record.count += 1
+                record.last_seen = date
+                return True
+
+            if record is not None:
+                del self.records[key]
+                self._close(record)
+            elif len(self.records) >= self.maxsize:
+                self._close(self.records.popitem(last=False)[1])
+            self.records[key] = CoalescedLog(level, functionname, data, date, now)
+            return False
+
+    def expired(self) -> List[CoalescedLog]:
+        """Return the repeated records whose window has closed"""
+        now: float = self.clock()
+        with self.lock:
+            while self.records:
+                record: CoalescedLog = next(iter(self.records.values()))
+                if now - record.started < self.window:
+                    break
+                self.records.popitem(last=False)
+                self._close(record)
+            closed, self.closed = self.closed, []
+        return closed
+
+    def flush(self) -> List[CoalescedLog]:
+        """Close every window and return the repeated records"""
+        with self.lock:
+            for record in self.records.values():
+                self._close(record)
+            self.records.clear()
+            closed, self.closed = self.closed, []
+        return closed
+
+    def _close(self, record: CoalescedLog) -> None:
+        """Keep closed records that were repeated, single records were already shipped"""
+        if record.count > 1:
+            self.closed.append(record)
+
+
+class SummaryFlusher:
+    """
+    Ship the summaries of the closed deduplication windows of every logger from a background thread,
+    so that a summary is shipped once its window closes, even if nothing else is logged.
+
+    The thread wakes up every DEDUP_FLUSH_INTERVAL seconds, or every window if shorter,
+    and is started by the first logger with a deduplicator of each process.
+
+    - self.loggers: weakref.WeakSet = the loggers with a deduplicator that are not closed yet.
+    """
+
+    def __init__(self) -> None:
+        """Initialize flusher, its thread is started by the first registered logger"""
+        self.loggers: weakref.WeakSet = weakref.WeakSet()
+        self.lock: threading.Lock = threading.Lock()
+        self.pid: Optional[int] = None
+
+    def register(self, item: Any) -> None:
+        """Ship the summaries of the logger until it is closed"""
+        with self.lock:
+            self.loggers.add(item)
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                threading.Thread(
+                    target=self._run, name="loggingsfactory-dedup", daemon=True
+                ).start()
+
+    def unregister(self, item: Any) -> None:
+        """Forget a closed logger"""
+        with self.lock:
+            self.loggers.discard(item)
+
+    def _run(self) -> None:
+        """Ship the summaries of the closed windows of every logger until the process exits"""
+        while True:
+            with self.lock:
+                interval: float = min(
+                    [item.deduplicator.window for item in self.loggers]
+                    + [BasicConfig.DEDUP_FLUSH_INTERVAL.value]
+                )
+            time.sleep(interval)
+            self._flush()
+
+    def _flush(self) -> None:
+        """Ship the summaries of the closed windows, the loggers are only referenced meanwhile"""
+        with self.lock:
+            loggers: List[Any] = list(self.loggers)
+        for item in loggers:
+            try:
+                item._ship_summaries()  # pylint: disable=protected-access
+            except Exception as error:  # pylint: disable=broad-except
+                logger.warning(
+                    f"{type(item).__name__} logger failed to ship the deduplication summaries: {error!r}"
+                )
+
+
+summary_flusher: SummaryFlusher = SummaryFlusher()
@@ -1,24 +1,82 @@
 """Helper functions"""
-from datetime import datetime
 import json
-import inspect
+from json.encoder import encode_basestring_ascii
 from collections.abc import Mapping
-from typing import Any, Dict, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse
+from loguru import logger
 
-from ..constants.config import LOG_LEVELS, BasicConfig, StringConfig
+from ..constants.config import (
+    LOG_LEVEL_NUMBERS,
+    LOG_LEVELS,
+    BasicConfig,
+    StringConfig,
+)
 from ..constants.keys import LoggerKeys
+from ..helpers.callsites import get_callsite
+from ..helpers.context import serialized_context
+from ..helpers.records import LogRecord
+from ..helpers.sampling import hold_record, release_records
+from ..helpers.timestamps import timestamps
 
 
 def format_elk_url(config: Dict[str, Any], use_es_db: bool = False) -> str:
     """
     Return the correct elk url format for different environments and elk libraries.
     Supports https://elasticsearch.com:9201, https://elasticsearch.com, elasticsearch.com
+    Returns the url of the first node if the host is a list of nodes.
     """
-    raw_host: Any = urlparse(config.get(LoggerKeys.HOST.value))
-    host: str = raw_host.hostname or raw_host[BasicConfig.URLPARSE_PATH_INDEX.value]
+    return format_elk_urls(config, use_es_db)[0]
+
+
+def format_elk_urls(config: Dict[str, Any], use_es_db: bool = False) -> List[str]:
+    """
+    Return the elk url of each node of the host,
+    the host is a node, a comma separated string of nodes, or a list of nodes.
+    """
+    nodes: Any = config.get(LoggerKeys.HOST.value)
+    if isinstance(nodes, str):
+        nodes = nodes.split(",")
     port: str = config.get(LoggerKeys.PORT.value) or BasicConfig.PORT.value
-    return host if use_es_db else f"{StringConfig.SCHEME.value}://{host}:{port}"
+
+    urls: List[str] = []
+    for node in nodes or [None]:
+        raw_host: Any = urlparse(node.strip() if isinstance(node, str) else node)
+        host: str = raw_host.hostname or raw_host[BasicConfig.URLPARSE_PATH_INDEX.value]
+        urls.append(
+            host if use_es_db else f"{StringConfig.SCHEME.value}://{host}:{port}"
+        )
+    return urls
+
+
+LogData = Union[str, Mapping, Callable[[], Union[str, Mapping]]]
+
+
+def evaluate_log_data(
+    logdata: LogData, logargs: Optional[Sequence[Any]] = None
+) -> Union[str, Mapping]:
+    """
+    Evaluate lazy log data, only called once the record is known to be logged.
+
+    - logdata: str, dict or a zero-arg callable returning either of them.
+    - logargs: arguments used to format the logdata template with str.format,
+               callable arguments are called to get their value.
+    """
+    if callable(logdata):
+        logdata = logdata()
+    if logargs:
+        logdata = logdata.format(*[arg() if callable(arg) else arg for arg in logargs])
+    return logdata
 
 
 def _format_log_data(*args: Union[str, bool, Mapping]) -> str:
@@ -35,6 +93,8 @@ def _format_log_data(*args: Union[str, bool, Mapping]) -> str:
                               Adding this value will allow custom naming of the function name.
       use_custom_logdata: bool = if False use default logdata format,
                                  if True use custom logdata format.
+
+    The fields bound to the current context are merged into the default logdata format.
     """
     (
         level,
@@ -53,35 +113,73 @@ def _format_log_data(*args: Union[str, bool, Mapping]) -> str:
 
     functionname: str = (
         custom_func_name
-        or inspect.stack()[
+        or get_callsite(
             BasicConfig.FUNCTION_LOCATION_INDEX.value + _reduce_stack_level
-        ][BasicConfig.FUNCTION_NAME_INDEX.value]
+        ).name
     )
 
-    return json.dumps(
-        {
-            "log": data,
-            "version": version,
-            "logger_level": level,
-            "functional_name": functionname,
-            "app_name": appname,
-            "timestamp": date,
-        }
+    return format_record(
+        LogRecord(
+            LOG_LEVEL_NUMBERS[level],
+            level,
+            data,
+            date,
+            functionname,
+            serialized_context(),
+        ),
+        appname,
+        version,
     )
 
 
-def format_log_data(self, *args: Union[str, bool, Mapping]) -> str:
+def _encode(value: Any) -> str:
+    """Return the json encoding of a value, strings are encoded without the json encoder"""
+    return (
+        encode_basestring_ascii(value) if isinstance(value, str) else json.dumps(value)
+    )
+
+
+def format_record(
+    record: LogRecord, appname: str, version: str, message: Optional[str] = None
+) -> str:
     """
-    Format or return custom format of log data
+    Return the default logdata format of a record,
+    identical to json.dumps of the fields followed by the fields bound to its context.
+
+    - message: str = json encoding of the log data if already encoded, e.g. by the deduplicator key.
+    """
+    return (
+        f'{{"log": {_encode(record.message) if message is None else message}, '
+        f'"version": {_encode(version)}, '
+        f'"logger_level": {_encode(record.level)}, '
+        f'"functional_name": {_encode(record.functionname)}, '
+        f'"app_name": {_encode(appname)}, "timestamp": {_encode(record.timestamp)}'
+        f"{record.context}}}"
+    )
+
+
+def format_log_data(
+    self,
+    *args: Union[str, bool, LogData],
+    logargs: Optional[Sequence[Any]] = None,
+) -> Optional[str]:
+    """
+    Format or return custom format of log data.
+    Return None if the record is below the minimum log level, suppressed by the deduplicator,
+    or held by the tail sampling scope of the current context.
+    Lazy log data is only evaluated once the record passed the minimum log level.
 
     Requires:
         level: str = one of the LogLevel member
-        logdata: str or dict = default log data, or entire custom log format data
+        logdata: str, dict or callable = default log data, or entire custom log format data
         version: str = log version
         custom_func_name: str = by default name of the function that uses the logging will be used.
                                 Adding this value will allow custom naming of the function name.
         use_custom_logdata: bool = if False use default logdata format,
                                    if True use custom logdata format.
+
+    Optional:
+        logargs: list = arguments used to format the logdata template.
     """
     (
         level,
@@ -91,23 +189,283 @@ def format_log_data(self, *args: Union[str, bool, Mapping]) -> str:
         custom_date,
         _reduce_stack_level,
     ) = args
-    date: str = custom_date or datetime.now().isoformat()
-    return _format_log_data(
+    levelno: int = LOG_LEVEL_NUMBERS[level]
+    if levelno < getattr(self, "minlevel", 0):
+        _count_filtered(self)
+        return None
+
+    logdata = evaluate_log_data(logdata, logargs)
+    data: str = json.dumps(logdata) if isinstance(logdata, Mapping) else logdata
+    if use_custom_logdata:
+        return hold_record(self, levelno, level, data)
+
+    record: LogRecord = LogRecord(
+        levelno,
         level,
-        logdata,
-        date,
-        self.appname,
-        self.version,
-        custom_func_name,
-        use_custom_logdata,
-        _reduce_stack_level,
+        data,
+        custom_date or timestamps.now(),
+        custom_func_name
+        or get_callsite(
+            BasicConfig.FUNCTION_LOCATION_INDEX.value - 1 + _reduce_stack_level
+        ).name,
+        serialized_context(),
+    )
+
+    # the deduplicator keys on the serialized log data, any json serializable log data is hashable
+    message: str = _encode(record.message)
+    deduplicator: Any = getattr(self, "deduplicator", None)
+    if deduplicator is not None and deduplicator.is_duplicate(
+        record.level, record.functionname, message, record.timestamp
+    ):
+        _count_filtered(self)
+        return None
+
+    return hold_record(
+        self,
+        levelno,
+        level,
+        format_record(record, self.appname, self.version, message),
+    )
+
+
+def _count_filtered(self, count: int = 1) -> None:
+    """Count filtered records if the logger records metrics"""
+    instrumentation: Any = getattr(self, "instrumentation", None)
+    if instrumentation is not None:
+        instrumentation.increment("filtered", count)
+
+
+LOG_RECORD_DEFAULTS: Tuple[Any, ...] = ("", False, None, None)
+# status of the bulk items which may succeed if retried
+RETRY_STATUSES: Tuple[int, ...] = (429, 502, 503, 504)
+
+
+def format_log_many(
+    self,
+    records: Iterable[Sequence[Any]],
+    _reduce_stack_level: int = 0,
+    functionname: Optional[str] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Format a batch of log records.
+    Return a list of (level, document) for the records that are not suppressed,
+    followed by the repeated records whose deduplication window has closed.
+
+    Log levels are validated once per distinct level, the date, the name of the function
+    calling the log function, the minimum log level, the deduplicator and the context fields
+    are resolved once per batch, and the filtered records are counted once per batch.
+
+    Requires:
+        records: Iterable[Sequence] = each record holds the log arguments
+                                      (level, logdata, custom_func_name, use_custom_logdata, date, logargs),
+                                      only level and logdata are required.
+                                      Raise ValueError if a record has fewer or more values.
+
+    Optional:
+        functionname: str = name of the function calling the log function,
+                            resolved from the call stack if not set.
+    """
+    records = [tuple(record) for record in records]
+    for index, record in enumerate(records):
+        if not 2 <= len(record) <= 2 + len(LOG_RECORD_DEFAULTS):
+            raise ValueError(
+                f"Log record {index} has {len(record)} values, "
+                + "expected (level, logdata, custom_func_name, use_custom_logdata, date, logargs) "
+                + "of which only level and logdata are required"
+            )
+    records = [record + LOG_RECORD_DEFAULTS[len(record) - 2 :] for record in records]
+    levels: Dict[str, str] = {}
+    for record in records:
+        if record[0] not in levels:
+            check_log_level(record[0])
+            levels[record[0]] = record[0].upper()
+
+    batch_date: str = timestamps.now()
+    functionname = (
+        functionname
+        or get_callsite(
+            BasicConfig.FUNCTION_LOCATION_INDEX.value - 1 + _reduce_stack_level
+        ).name
     )
 
+    minlevel: int = getattr(self, "minlevel", 0)
+    deduplicator: Any = getattr(self, "deduplicator", None)
+    context: str = serialized_context()
+    filtered: int = 0
+    documents: List[Tuple[str, str]] = []
+    for level, logdata, custom_func_name, use_custom_logdata, date, logargs in records:
+        level = levels[level]
+        levelno: int = LOG_LEVEL_NUMBERS[level]
+        if levelno < minlevel:
+            filtered += 1
+            continue
+
+        logdata = evaluate_log_data(logdata, logargs)
+        document: Optional[str] = (
+            json.dumps(logdata) if isinstance(logdata, Mapping) else logdata
+        )
+        if not use_custom_logdata:
+            record: LogRecord = LogRecord(
+                levelno,
+                level,
+                document,
+                date or batch_date,
+                custom_func_name or functionname,
+                context,
+            )
+            message: str = _encode(record.message)
+            if deduplicator is not None and deduplicator.is_duplicate(
+                record.level, record.functionname, message, record.timestamp
+            ):
+                filtered += 1
+                continue
+            document = format_record(record, self.appname, self.version, message)
+
+        document = hold_record(self, levelno, level, document)
+        if document is not None:
+            documents.append((level, document))
+    if filtered:
+        _count_filtered(self, filtered)
+    documents.extend(format_coalesced_log_data(self))
+    return documents
+
+
+def format_bulk_body(
+    index: str, documents: Iterable[Tuple[str, str]], optype: str = "index"
+) -> str:
+    """
+    Return the newline delimited body of an elk bulk request indexing every document
+
+    - optype: str = index, or create which data streams require.
+    """
+    action: str = json.dumps({optype: {"_index": index}})
+    return "".join(f"{action}\n{document}\n" for _, document in documents)
+
+
+def get_bulk_failures(
+    response: Any, documents: Sequence[Tuple[str, str]]
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    Return the (level, document) of the bulk request items that failed,
+    as a tuple of the items that may be retried, e.g. rejected with 429 es_rejected_execution_exception,
+    and of the items that failed for another reason, e.g. a mapping error.
+    """
+    retried: List[Tuple[str, str]] = []
+    rejected: List[Tuple[str, str]] = []
+    if not isinstance(response, Mapping) or not response.get("errors"):
+        return retried, rejected
+    for document, item in zip(documents, response.get("items", [])):
+        status: int = next(iter(item.values()), {}).get("status", 0)
+        if status in RETRY_STATUSES:
+            retried.append(document)
+        elif status >= 300:
+            rejected.append(document)
+    return retried, rejected
+
+
+def report_bulk_failures(self, failed: Sequence[Tuple[str, str]]) -> None:
+    """Warn about the bulk request items that failed and are not retried, and count them as failures"""
+    if not failed:
+        return
+    logger.warning(f"Dropped {len(failed)} log documents, Elasticsearch rejected them")
+    instrumentation: Any = getattr(self, "instrumentation", None)
+    if instrumentation is not None:
+        instrumentation.increment("failures", len(failed))
+
+
+def format_coalesced_log_data(self, flush: bool = False) -> List[Tuple[str, str]]:
+    """
+    Format the repeated log records whose deduplication window has closed.
+
+    Return a list of (level, document) of the records released by the tail sampling scope
+    of the current context, followed by the summaries of the repeated records.
+    Each summary uses the default log data format with the number of collapsed records,
+    and the date of the first and last record, the log data was already serialized by format_record.
+
+    - flush: bool = if True close every window, used when the logger is shutting down.
+    """
+    released: List[Tuple[str, str]] = release_records(self)
+    deduplicator: Any = getattr(self, "deduplicator", None)
+    if deduplicator is None:
+        return released
+
+    return released + [
+        (
+            record.level,
+            f'{{"log": {record.data}, '
+            + json.dumps(
+                {
+                    "version": self.version,
+                    "logger_level": record.level,
+                    "functional_name": record.functionname,
+                    "app_name": self.appname,
+                    "timestamp": record.last_seen,
+                    "count": record.count,
+                    "first_seen": record.first_seen,
+                    "last_seen": record.last_seen,
+                }
+            )[1:],
+        )
+        for record in (deduplicator.flush() if flush else deduplicator.expired())
+    ]
+
+
+def format_index_template(
+    pattern: str, shards: int, replicas: int, refreshinterval: str
+) -> Dict[str, Any]:
+    """
+    Return the body of a composable index template mapping the log documents fields
+
+    - pattern: str = index pattern the template applies to.
+    - shards: int = number of primary shards of each index.
+    - replicas: int = number of replicas of each primary shard.
+    - refreshinterval: str = how often new documents become searchable, e.g. 5s.
+    """
+    keyword: Dict[str, Any] = {"type": "keyword", "ignore_above": 256}
+    return {
+        "index_patterns": [pattern],
+        "priority": BasicConfig.TEMPLATE_PRIORITY.value,
+        "template": {
+            "settings": {
+                "number_of_shards": shards,
+                "number_of_replicas": replicas,
+                "refresh_interval": refreshinterval,
+            },
+            "mappings": {
+                "dynamic_templates": [
+                    {
+                        "strings_as_keywords": {
+                            "match_mapping_type": "string",
+                            "mapping": keyword,
+                        }
+                    }
+                ],
+                "properties": {
+                    "log": {"type": "text", "norms": False, "index_options": "freqs"},
+                    "version": keyword,
+                    "logger_level": keyword,
+                    "functional_name": keyword,
+                    "app_name": keyword,
+                    "timestamp": {"type": "date"},
+                },
+            },
+        },
+    }
+
 
 def format_elk_query_payload(
-    appname: str, current_datetime: str, payload: Optional[Dict[str, Any]] = None
+    appname: str,
+    current_datetime: str,
+    payload: Optional[Dict[str, Any]] = None,
+    start: Optional[str] = None,
+    mapped: bool = False,
 ):
-    """Set and get the standard payload required for the elk search"""
+    """
+    Set and get the standard payload required for the elk search
+
+    - mapped: bool = set to True if app_name is mapped as a keyword by the index template,
+                     instead of the app_name.keyword sub-field of the dynamic mapping.
+    """
     if payload:
         return payload
 
@@ -117,14 +475,22 @@ def format_elk_query_payload(
                 "filter": [
                     {
                         "bool": {
-                            "should": [{"match_phrase": {"app_name.keyword": appname}}],
+                            "should": [
+                                {
+                                    "match_phrase": {
+                                        "app_name"
+                                        if mapped
+                                        else "app_name.keyword": appname
+                                    }
+                                }
+                            ],
                             "minimum_should_match": 1,
                         }
                     },
                     {
                         "range": {
                             "timestamp": {
-                                "gte": "2021-09-24T02:58:43.647Z",
+                                "gte": start or "2021-09-24T02:58:43.647Z",
                                 "lte": current_datetime,
                                 "format": "strict_date_optional_time",
                             }
@@ -0,0 +1,122 @@
+"""Index name resolution of the Elasticsearch loggers"""
+from datetime import datetime, timezone
+import re
+from string import Formatter
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from ..constants.config import BasicConfig, StringConfig
+
+DATE_FIELD: str = "date"
+# seconds between two changes of the index name, keyed by the strftime directives
+DIRECTIVE_INTERVALS: Dict[str, int] = {
+    **dict.fromkeys("SsTXcf", 1),
+    **dict.fromkeys("MR", 60),
+    **dict.fromkeys("HIkl", 3600),
+}
+DAY: int = 86400
+# index templates installed by this process, keyed by the hosts and the template name
+installed_templates: Set[Tuple[str, str]] = set()
+
+
+class _Wildcard:
+    """Format every date field as a wildcard"""
+
+    def __format__(self, spec: str) -> str:
+        return "*"
+
+
+class IndexRouter:
+    """
+    Resolve the index name of the records from an index name template.
+
+    The template may contain {appname} and {date:<strftime format>},
+    e.g. logs-{appname}-{date:%Y.%m.%d} writes to one index per UTC day.
+    The resolved name is cached until the current time leaves its time bucket.
+    Names without a date field, e.g. a rollover alias or a data stream, are resolved once.
+
+    - self.template_name: str = name of the index template matching the indices.
+    """
+
+    def __init__(
+        self, template: str, appname: str, clock: Callable[[], float] = time.time
+    ) -> None:
+        """
+        Initialize router
+
+        - template: str = index name template.
+        - appname: str = value of the appname field.
+        - clock: Callable = returns the current unix time.
+        """
+        self.template: str = template
+        self.appname: str = appname
+        self.clock: Callable[[], float] = clock
+        self.interval: Optional[int] = None
+        for _, field, spec, _ in Formatter().parse(template):
+            if field == DATE_FIELD:
+                self.interval = min(
+                    [self.interval or DAY]
+                    + [
+                        DIRECTIVE_INTERVALS.get(directive, DAY)
+                        for directive in (spec or "").split("%")[1:]
+                        if directive
+                    ]
+                )
+        self.pattern: str = template.format(appname=appname, date=_Wildcard())
+        self.cache: Tuple[int, str] = (-1, self.pattern)
+        self.template_name: str = StringConfig.TEMPLATE_PREFIX.value + re.sub(
+            r"[^a-z0-9_.-]+", "-", self.pattern.lower()
+        ).strip("-_.")
+
+    @property
+    def dated(self) -> bool:
+        """Return True if the index name changes over time"""
+        return self.interval is not None
+
+    def resolve(self) -> str:
+        """Return the index name of the current time bucket"""
+        if self.interval is None:
+            return self.pattern
+
+        bucket: int = int(self.clock() // self.interval)
+        if bucket != self.cache[0]:
+            self.cache = (bucket, self._format(bucket))
+        return self.cache[1]
+
+    def indices(self, start: Optional[str] = None, end: Optional[str] = None) -> str:
+        """
+        Return the comma separated names of the indices overlapping the time range,
+        or the wildcard pattern of every index if the range is open or spans too many indices.
+
+        - start: str = iso formatted start of the range.
+        - end: str = iso formatted end of the range, default is now.
+        """
+        if self.interval is None or start is None:
+            return self.pattern
+
+        first: int = int(_parse(start) // self.interval)
+        last: int = int((self.clock() if end is None else _parse(end)) // self.interval)
+        if last - first >= BasicConfig.MAX_QUERY_BUCKETS.value:
+            return self.pattern
+
+        names: Dict[str, None] = dict.fromkeys(
+            self._format(bucket) for bucket in range(first, last + 1)
+        )
+        if len(names) > BasicConfig.MAX_QUERY_INDICES.value:
+            return self.pattern
+        return ",".join(names)
+
+    def _format(self, bucket: int) -> str:
+        """Return the index name of a time bucket"""
+        return self.template.format(
+            appname=self.appname,
+            date=datetime.fromtimestamp(bucket * self.interval, timezone.utc),
+        )
+
+
+def _parse(date: str) -> float:
+    """Return the unix time of an iso formatted date, naive dates are UTC"""
+    parsed: datetime = datetime.fromisoformat(date.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
@@ -0,0 +1,105 @@
+"""Close the loggers within a deadline when the process exits or is terminated"""
+import atexit
+import signal
+import threading
+import time
+from types import FrameType
+from typing import Any, List, Optional
+import weakref
+from loguru import logger
+
+
+class Lifecycle:
+    """
+    Track the loggers of the process that are not closed yet, and close them
+    within a shared deadline when the process exits.
+
+    The hooks are installed by the first logger. SIGTERM, e.g. sent when a container is stopped,
+    exits the process with status 143, so that the loggers are closed by the exit hook
+    once the main thread unwound, instead of within the signal handler, which could interrupt
+    a logging call holding a queue lock. A SIGTERM handler installed before the first logger
+    is called instead, e.g. the graceful shutdown of a web server, and the loggers are closed
+    when the process exits. The SIGTERM handler is only installed from the main thread,
+    and not if SIGTERM is ignored.
+
+    - self.loggers: weakref.WeakSet = the loggers that are not closed yet.
+    """
+
+    def __init__(self) -> None:
+        """Initialize lifecycle, the hooks are installed by the first registered logger"""
+        self.loggers: weakref.WeakSet = weakref.WeakSet()
+        self.lock: threading.RLock = threading.RLock()
+        self.installed: bool = False
+        self.previous: Any = None
+
+    def register(self, item: Any) -> None:
+        """Close the logger when the process exits, unless it was closed before"""
+        with self.lock:
+            self.loggers.add(item)
+            if not self.installed:
+                self._install()
+
+    def unregister(self, item: Any) -> None:
+        """Forget a closed logger, or a logger closed by another logger, e.g. a tee backend"""
+        with self.lock:
+            self.loggers.discard(item)
+
+    def _install(self) -> None:
+        """Install the exit hook, and the SIGTERM handler from the main thread"""
+        self.installed = True
+        atexit.register(self.close_all)
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous: Any = signal.getsignal(signal.SIGTERM)
+        if previous in (signal.SIG_IGN, None):
+            return
+        self.previous = previous
+        signal.signal(signal.SIGTERM, self.terminate)
+
+    def terminate(self, signum: int, frame: Optional[FrameType]) -> None:
+        """Call the previous SIGTERM handler, or exit so that the exit hook closes the loggers"""
+        if callable(self.previous):
+            self.previous(signum, frame)
+            return
+        raise SystemExit(128 + signum)
+
+    def close_all(self, timeout: Optional[float] = None) -> int:
+        """
+        Close every logger that is not closed yet, refer to LoggerInterface.close.
+        Return the number of records left unsent.
+
+        - timeout: float = maximum number of seconds to wait for the queued records of every logger,
+                           default is the largest shutdowntimeout of the loggers.
+        """
+        with self.lock:
+            loggers: List[Any] = list(self.loggers)
+        return close_loggers(loggers, timeout)
+
+
+def close_loggers(loggers: List[Any], timeout: Optional[float] = None) -> int:
+    """
+    Close the loggers within a shared deadline, return the number of records left unsent.
+    A logger failing to close is reported with a warning, the other loggers are still closed.
+    """
+    if timeout is None:
+        timeout = max((item.shutdowntimeout for item in loggers), default=0)
+    deadline: float = time.monotonic() + timeout
+    unsent: int = 0
+    for item in loggers:
+        try:
+            unsent += item.close(max(deadline - time.monotonic(), 0))
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning(f"{type(item).__name__} logger failed to close: {error!r}")
+    return unsent
+
+
+def report_unsent(item: Any, unsent: int) -> int:
+    """Warn about the records a closed logger left unsent, and return their number"""
+    if unsent:
+        logger.warning(
+            f"{type(item).__name__} logger closed with {unsent} records left unsent"
+        )
+    return unsent
+
+
+lifecycle: Lifecycle = Lifecycle()
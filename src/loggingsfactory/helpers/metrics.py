@@ -0,0 +1,229 @@
+"""Self instrumentation of the loggers"""
+from bisect import bisect_left
+import threading
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+SECONDS_BUCKETS: Sequence[float] = (
+    0.000001,
+    0.000005,
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+)
+SIZE_BUCKETS: Sequence[float] = (1, 10, 100, 1000, 10000)
+BYTES_BUCKETS: Sequence[float] = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+RATIO_BUCKETS: Sequence[float] = (1, 2, 4, 8, 16, 32)
+
+
+class Histogram:
+    """Fixed buckets histogram, observed from any thread"""
+
+    __slots__ = ("bounds", "counts", "count", "sum", "lock")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        """
+        Initialize histogram
+
+        - self.bounds: Sequence[float] = upper bound of each bucket, sorted.
+        - self.counts: List[int] = number of values per bucket, the last bucket is +Inf.
+        """
+        self.bounds: Sequence[float] = bounds
+        self.counts: List[int] = [0] * (len(bounds) + 1)
+        self.count: int = 0
+        self.sum: float = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram"""
+        index: int = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self) -> Dict[str, int]:
+        """Return the cumulative count of each bucket keyed by its upper bound"""
+        return self.read()[2]
+
+    def read(self) -> Tuple[int, float, Dict[str, int]]:
+        """Return the count, the sum and the cumulative buckets, consistent with each other"""
+        with self.lock:
+            count, total_sum, counts = self.count, self.sum, list(self.counts)
+        buckets: Dict[str, int] = {}
+        total: int = 0
+        for bound, bucket in zip([*self.bounds, "+Inf"], counts):
+            total += bucket
+            buckets[str(bound)] = total
+        return count, total_sum, buckets
+
+
+class LoggerMetrics:
+    """
+    Histograms, counters and gauges of a logger backend.
+    Histograms and counters are updated under a lock, the logging threads,
+    the shipper threads and their pools record the same metrics.
+
+    Histograms:
+        - format_seconds: time spent formatting the log data per call.
+        - enqueue_seconds: time spent handing records to a queue per call.
+        - ship_seconds: latency of the elk requests, or of the loguru sink writes.
+        - batch_size: number of documents per elk request or loguru write.
+        - shipped_bytes: size of the documents per elk request or loguru write, after compression.
+        - compression_ratio: uncompressed size divided by compressed size per elk request.
+
+    Counters:
+        - records: records shipped, including the deduplication summaries.
+        - filtered: records below the minimum log level or suppressed by the deduplicator.
+        - failures: elk requests that raised an exception,
+                    and bulk request items that failed and were not retried.
+        - retries: records retried by a shipper, e.g. the bulk items rejected with 429.
+        - drops: records dropped by a shipper.
+        - sampled: records dropped by tail sampling, held by a scope without an error or over its limits.
+
+    Gauges:
+        - queue_depth: number of records waiting in a queue.
+        - batch_limit: current maximum number of documents per bulk request of an adaptive shipper.
+        - in_flight: number of bulk requests in flight of an adaptive shipper.
+        - in_flight_limit: current maximum number of bulk requests in flight of an adaptive shipper.
+
+    Nodes:
+        - node_seconds: latency of the elk requests per node, including the queries.
+    """
+
+    def __init__(self, backend: str) -> None:
+        """Initialize metrics of the backend name"""
+        self.backend: str = backend
+        self.histograms: Dict[str, Histogram] = {
+            "format_seconds": Histogram(SECONDS_BUCKETS),
+            "enqueue_seconds": Histogram(SECONDS_BUCKETS),
+            "ship_seconds": Histogram(SECONDS_BUCKETS),
+            "batch_size": Histogram(SIZE_BUCKETS),
+            "shipped_bytes": Histogram(BYTES_BUCKETS),
+            "compression_ratio": Histogram(RATIO_BUCKETS),
+        }
+        self.counters: Dict[str, int] = {
+            "records": 0,
+            "filtered": 0,
+            "failures": 0,
+            "retries": 0,
+            "drops": 0,
+            "sampled": 0,
+        }
+        self.gauges: Dict[str, float] = {
+            "queue_depth": 0,
+            "batch_limit": 0,
+            "in_flight": 0,
+            "in_flight_limit": 0,
+        }
+        self.nodes: Dict[str, Histogram] = {}
+        self.lock: threading.Lock = threading.Lock()
+        self.format_seconds: Histogram = self.histograms["format_seconds"]
+        self.enqueue_seconds: Histogram = self.histograms["enqueue_seconds"]
+        self.ship_seconds: Histogram = self.histograms["ship_seconds"]
+        self.batch_size: Histogram = self.histograms["batch_size"]
+        self.shipped_bytes: Histogram = self.histograms["shipped_bytes"]
+
+    def observe(self, name: str, value: float) -> None:
+        """Add a value to a histogram"""
+        self.histograms[name].observe(value)
+
+    def increment(self, name: str, count: int = 1) -> None:
+        """Increment a counter"""
+        with self.lock:
+            self.counters[name] += count
+
+    def set(self, name: str, value: float) -> None:
+        """Set a gauge"""
+        self.gauges[name] = value
+
+    def record_format(self, started: float) -> None:
+        """Record the format time of a call"""
+        self.format_seconds.observe(perf_counter() - started)
+
+    def record_ship(self, started: float, documents: int, size: int) -> None:
+        """Record the latency, number of documents and size of a request or write"""
+        self.ship_seconds.observe(perf_counter() - started)
+        self.batch_size.observe(documents)
+        self.shipped_bytes.observe(size)
+        with self.lock:
+            self.counters["records"] += documents
+
+    def record_enqueue(self, started: float, depth: int) -> None:
+        """Record the enqueue time of a record and the queue depth"""
+        self.enqueue_seconds.observe(perf_counter() - started)
+        self.gauges["queue_depth"] = depth
+
+    def record_compression(self, size: int, compressed: int) -> None:
+        """Record the compression ratio of a request body"""
+        self.histograms["compression_ratio"].observe(size / compressed)
+
+    def record_node(self, node: str, latency: float) -> None:
+        """Record the latency of a request to a node"""
+        histogram: Optional[Histogram] = self.nodes.get(node)
+        if histogram is None:
+            histogram = self.nodes.setdefault(node, Histogram(SECONDS_BUCKETS))
+        histogram.observe(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of the current metrics"""
+        with self.lock:
+            counters: Dict[str, int] = dict(self.counters)
+        return {
+            "backend": self.backend,
+            "histograms": {
+                name: _read(histogram) for name, histogram in self.histograms.items()
+            },
+            "counters": counters,
+            "gauges": dict(self.gauges),
+            "nodes": {
+                node: _read(histogram) for node, histogram in list(self.nodes.items())
+            },
+        }
+
+    def to_prometheus(self, prefix: str = "loggingsfactory") -> str:
+        """Return the metrics in the Prometheus text exposition format"""
+        label: str = f'backend="{self.backend}"'
+        lines: List[str] = []
+        for name, histogram in self.histograms.items():
+            count, total, buckets = histogram.read()
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for bound, bucket in buckets.items():
+                lines.append(f'{prefix}_{name}_bucket{{{label},le="{bound}"}} {bucket}')
+            lines.append(f"{prefix}_{name}_sum{{{label}}} {total}")
+            lines.append(f"{prefix}_{name}_count{{{label}}} {count}")
+        with self.lock:
+            counters: Dict[str, int] = dict(self.counters)
+        for name, value in counters.items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total{{{label}}} {value}")
+        for name, value in self.gauges.items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name}{{{label}}} {value}")
+        if self.nodes:
+            lines.append(f"# TYPE {prefix}_node_seconds histogram")
+        for node, histogram in list(self.nodes.items()):
+            node_label: str = f'{label},node="{node}"'
+            count, total, buckets = histogram.read()
+            for bound, bucket in buckets.items():
+                lines.append(
+                    f'{prefix}_node_seconds_bucket{{{node_label},le="{bound}"}} {bucket}'
+                )
+            lines.append(f"{prefix}_node_seconds_sum{{{node_label}}} {total}")
+            lines.append(f"{prefix}_node_seconds_count{{{node_label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _read(histogram: Histogram) -> Dict[str, Any]:
+    """Return the count, sum and cumulative buckets of a histogram snapshot"""
+    count, total, buckets = histogram.read()
+    return {"count": count, "sum": total, "buckets": buckets}
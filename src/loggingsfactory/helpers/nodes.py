@@ -0,0 +1,126 @@
+"""Latency tracking and selection of the Elasticsearch nodes"""
+import math
+import threading
+from time import monotonic, perf_counter
+from typing import Any, List, Optional
+
+from elasticsearch import AIOHttpConnection, Urllib3HttpConnection
+from elasticsearch.connection_pool import ConnectionSelector
+
+from ..helpers.metrics import LoggerMetrics
+
+# weight of the latest request latency in the moving average
+EWMA_WEIGHT: float = 0.3
+# seconds after which the latency of an idle node decayed by 1/e,
+# so slow nodes are tried again once they had time to recover
+EWMA_DECAY: float = 10
+
+
+class NodeStats:
+    """
+    Exponentially weighted moving average of the request latency,
+    and number of outstanding requests of a node.
+    """
+
+    __slots__ = ("node", "instrumentation", "lock", "ewma", "outstanding", "updated")
+
+    def __init__(self, node: str, instrumentation: Optional[LoggerMetrics] = None):
+        """
+        Initialize stats
+
+        - node: str = url of the node.
+        - instrumentation: LoggerMetrics = records the request latency per node.
+        """
+        self.node: str = node
+        self.instrumentation: Optional[LoggerMetrics] = instrumentation
+        self.lock: threading.Lock = threading.Lock()
+        self.ewma: float = 0
+        self.outstanding: int = 0
+        self.updated: float = monotonic()
+
+    def start(self) -> float:
+        """Count an outstanding request, return its start time"""
+        with self.lock:
+            self.outstanding += 1
+        return perf_counter()
+
+    def finish(self, started: float) -> None:
+        """Update the moving average with the latency of a finished request"""
+        latency: float = perf_counter() - started
+        with self.lock:
+            self.outstanding -= 1
+            self.ewma = (
+                latency
+                if self.ewma == 0
+                else EWMA_WEIGHT * latency + (1 - EWMA_WEIGHT) * self.ewma
+            )
+            self.updated = monotonic()
+        if self.instrumentation is not None:
+            self.instrumentation.record_node(self.node, latency)
+
+    def latency(self, now: float) -> float:
+        """Return the moving average, decayed by the time since the last request"""
+        return self.ewma * math.exp((self.updated - now) / EWMA_DECAY)
+
+
+class TrackedConnection(Urllib3HttpConnection):
+    """Urllib3HttpConnection recording the latency and outstanding requests of its node"""
+
+    def __init__(
+        self, *args: Any, instrumentation: Optional[LoggerMetrics] = None, **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats: NodeStats = NodeStats(self.host, instrumentation)
+
+    def perform_request(self, *args: Any, **kwargs: Any) -> Any:
+        started: float = self.stats.start()
+        try:
+            return super().perform_request(*args, **kwargs)
+        finally:
+            self.stats.finish(started)
+
+
+class AsyncTrackedConnection(AIOHttpConnection):
+    """AIOHttpConnection recording the latency and outstanding requests of its node"""
+
+    def __init__(
+        self, *args: Any, instrumentation: Optional[LoggerMetrics] = None, **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats: NodeStats = NodeStats(self.host, instrumentation)
+
+    async def perform_request(self, *args: Any, **kwargs: Any) -> Any:
+        started: float = self.stats.start()
+        try:
+            return await super().perform_request(*args, **kwargs)
+        finally:
+            self.stats.finish(started)
+
+
+class LatencySelector(ConnectionSelector):
+    """
+    Select the node with the lowest latency moving average, weighted by its outstanding requests.
+    Nodes without requests yet are selected first.
+    """
+
+    def select(self, connections: List[Any]) -> Any:
+        now: float = monotonic()
+        return min(
+            connections,
+            key=lambda connection: connection.stats.latency(now)
+            * (connection.stats.outstanding + 1),
+        )
+
+
+class LeastOutstandingSelector(ConnectionSelector):
+    """Select the node with the fewest outstanding requests, then with the lowest latency"""
+
+    def select(self, connections: List[Any]) -> Any:
+        now: float = monotonic()
+        return min(
+            connections,
+            key=lambda connection: (
+                connection.stats.outstanding,
+                connection.stats.latency(now),
+            ),
+        )
@@ -0,0 +1,40 @@
+"""Log record passed from the log functions to the filters and the formatter"""
+
+
+class LogRecord:
+    """
+    Log record created once per logged record, once it passed the minimum log level.
+    The deduplicator filters it and the formatter serializes it, it is not modified after creation.
+
+    - levelno: int = number of the log level, e.g. 20 for INFO.
+    - level: str = name of the log level, e.g. INFO.
+    - message: str = log data, dict log data is serialized as json.
+    - timestamp: str = iso formatted date the record was logged at.
+    - functionname: str = name of the function calling the log function, or the custom function name.
+    - context: str = json members of the fields bound to the context the record was logged in.
+    """
+
+    __slots__ = ("levelno", "level", "message", "timestamp", "functionname", "context")
+
+    def __init__(
+        self,
+        levelno: int,
+        level: str,
+        message: str,
+        timestamp: str,
+        functionname: str,
+        context: str,
+    ) -> None:
+        """Initialize record"""
+        self.levelno: int = levelno
+        self.level: str = level
+        self.message: str = message
+        self.timestamp: str = timestamp
+        self.functionname: str = functionname
+        self.context: str = context
+
+    def __repr__(self) -> str:
+        return (
+            f"LogRecord({self.level}, {self.functionname}, {self.timestamp}, "
+            f"{self.message!r})"
+        )
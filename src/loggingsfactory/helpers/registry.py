@@ -0,0 +1,41 @@
+"""Loggers reused by identical configurations until they are closed"""
+import threading
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class Registry:
+    """
+    Loggers keyed by their normalized configuration.
+
+    The loggers are held until they are closed, so that a logger created within a function,
+    e.g. a request handler, is reused by the next call instead of creating new clients and sinks.
+
+    - self.loggers: Dict[Hashable, Any] = the loggers in use keyed by their configuration.
+    """
+
+    def __init__(self) -> None:
+        """Initialize registry"""
+        self.loggers: Dict[Hashable, Any] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the logger of a configuration if it is not closed, else None"""
+        with self.lock:
+            item: Optional[Any] = self.loggers.get(key)
+        return None if item is None or item.closed else item
+
+    def discard(self, item: Any) -> None:
+        """Forget a closed logger"""
+        with self.lock:
+            for key in [key for key, value in self.loggers.items() if value is item]:
+                del self.loggers[key]
+
+    def clear(self) -> List[Any]:
+        """Forget every logger, return the loggers that were in use"""
+        with self.lock:
+            loggers: List[Any] = list(self.loggers.values())
+            self.loggers.clear()
+        return loggers
+
+
+registry: Registry = Registry()
@@ -0,0 +1,135 @@
+"""Ring buffer on a shared memory segment carrying serialized records between processes"""
+import mmap
+import struct
+from typing import Any, Callable, Optional
+
+from ..constants.config import BasicConfig
+
+# the head and tail positions are kept on separate cache lines
+HEAD: int = 0
+TAIL: int = 8
+HEADER_SIZE: int = 128
+LENGTH: struct.Struct = struct.Struct("<I")
+WRAP: int = 0xFFFFFFFF
+
+
+class RingBuffer:
+    """
+    Single producer, single consumer ring buffer of length prefixed records on a shared memory segment.
+
+    The producer only writes the head position and the consumer only writes the tail position,
+    both positions are published after the record bytes were written or read, so no lock is
+    shared between the processes. Threads producing in the same process must hold a lock of their own.
+    Multiple producer processes use one ring each, drained by the same consumer.
+
+    Records never wrap around the end of the segment, the consumer reads them
+    as memoryviews of the segment without copying them.
+
+    - name: str = name of the shared memory segment to attach to, a new segment is created if None.
+    - size: int = number of bytes of the records region of a new segment.
+    """
+
+    def __init__(
+        self, name: Optional[str] = None, size: int = BasicConfig.RING_SIZE.value
+    ) -> None:
+        """Create or attach to the shared memory segment"""
+        # Python 3.8+ only, imported here so the package imports on older versions
+        # pylint: disable=import-outside-toplevel
+        from multiprocessing import resource_tracker, shared_memory
+
+        if name is None:
+            self.shm: Any = shared_memory.SharedMemory(
+                create=True, size=HEADER_SIZE + size
+            )
+        else:
+            self.shm = shared_memory.SharedMemory(name)
+            # the segment is owned, and unlinked at exit, by the process which created it
+            resource_tracker.unregister(
+                self.shm._name, "shared_memory"  # pylint: disable=protected-access
+            )
+        self.name: str = self.shm.name
+        # the mmap is written directly, slice assignments of mmaps are faster than of memoryviews
+        self.segment: mmap.mmap = self.shm._mmap  # pylint: disable=protected-access
+        self.positions: memoryview = self.shm.buf[:HEADER_SIZE].cast("Q")
+        self.data: memoryview = self.shm.buf[HEADER_SIZE:]
+        self.capacity: int = len(self.data)
+        self.head: int = self.positions[HEAD]
+        self.tail: int = self.positions[TAIL]
+
+    def put(self, *chunks: bytes) -> bool:
+        """
+        Write the chunks as one record, return False if the ring has not enough free space.
+        Must only be called by the producer.
+        """
+        size: int = LENGTH.size
+        for chunk in chunks:
+            size += len(chunk)
+        head: int = self.head
+        offset: int = head % self.capacity
+        skip: int = self.capacity - offset if self.capacity - offset < size else 0
+        if skip + size > self.capacity - head + self.positions[TAIL]:
+            return False
+
+        if skip:
+            if skip >= LENGTH.size:
+                LENGTH.pack_into(self.segment, HEADER_SIZE + offset, WRAP)
+            head += skip
+            offset = 0
+        position: int = HEADER_SIZE + offset
+        LENGTH.pack_into(self.segment, position, size - LENGTH.size)
+        position += LENGTH.size
+        for chunk in chunks:
+            end: int = position + len(chunk)
+            self.segment[position:end] = chunk
+            position = end
+
+        self.head = head + size
+        self.positions[HEAD] = self.head
+        return True
+
+    def drain(self, handler: Callable[[memoryview], None]) -> int:
+        """
+        Call the handler with each written record, return the number of records read.
+        Must only be called by the consumer.
+
+        The memoryview is only valid during the handler call,
+        the space of the record is reused by the producer afterwards.
+        """
+        head: int = self.positions[HEAD]
+        tail: int = self.tail
+        count: int = 0
+        try:
+            while tail < head:
+                offset: int = tail % self.capacity
+                if self.capacity - offset < LENGTH.size:
+                    tail += self.capacity - offset
+                    continue
+                length: int = LENGTH.unpack_from(self.data, offset)[0]
+                if length == WRAP:
+                    tail += self.capacity - offset
+                    continue
+
+                start: int = offset + LENGTH.size
+                with self.data[start : start + length] as record:
+                    tail += LENGTH.size + length
+                    count += 1
+                    handler(record)
+        finally:
+            self.tail = tail
+            self.positions[TAIL] = tail
+        return count
+
+    def used(self) -> int:
+        """Return the number of bytes written and not read yet"""
+        return self.positions[HEAD] - self.positions[TAIL]
+
+    def close(self) -> None:
+        """Close the shared memory segment of this process"""
+        if self.shm.buf is not None:
+            self.positions.release()
+            self.data.release()
+            self.shm.close()
+
+    def unlink(self) -> None:
+        """Remove the shared memory segment, only called by the producer"""
+        self.shm.unlink()
@@ -0,0 +1,222 @@
+"""Tail-based sampling: hold the low level records of a scope until an error is logged in it"""
+import asyncio
+from collections import deque
+from contextvars import ContextVar, Token
+import inspect
+import threading
+from typing import Any, Awaitable, Deque, Dict, List, Optional, Tuple
+
+from ..constants.config import BasicConfig, LogLevelNumbers
+
+# records below this level are held, records of this level are shipped as usual
+HELD_BELOW: int = LogLevelNumbers.WARNING.value
+# records of this level or above ship the records held by the scope
+TRIGGER_LEVEL: int = LogLevelNumbers.ERROR.value
+
+
+class SamplingBudget:
+    """Maximum number of records held by all the sampling scopes of the process"""
+
+    def __init__(self, size: int) -> None:
+        """
+        Initialize budget
+
+        - self.size: int = maximum number of held records, may be changed at any time.
+        - self.held: int = number of records currently held.
+        """
+        self.size: int = size
+        self.held: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Reserve a record, return False if the budget is exhausted"""
+        with self.lock:
+            if self.held >= self.size:
+                return False
+            self.held += 1
+            return True
+
+    def release(self, count: int = 1) -> None:
+        """Return records to the budget"""
+        with self.lock:
+            self.held -= count
+
+
+sampling_budget: SamplingBudget = SamplingBudget(BasicConfig.SAMPLING_TOTAL_SIZE.value)
+
+
+class SamplingScope:
+    """
+    Tail-based sampling scope, e.g. of a request, bound to the current context
+    within a with or async with block.
+
+    DEBUG and INFO records logged in the scope are held in a bounded buffer per logger,
+    and only shipped if an ERROR, EXCEPTION or CRITICAL record is logged in the scope,
+    right before that record. Once the scope is triggered, its records are shipped as usual.
+    The held records are dropped when the scope exits without an error.
+
+    The scope holds at most 'size' records, the oldest records of the logger are dropped first,
+    and every scope of the process holds at most 'sampling_budget.size' records,
+    further records are dropped until held records are shipped or dropped.
+    Dropped records are counted by the 'sampled' metric of their logger.
+
+    - self.held: Dict[Any, Deque[Tuple[str, str]]] = held (level, document) of each logger.
+    - self.released: Dict[Any, List[Tuple[str, str]]] = (level, document) to ship with the next
+                                                         deduplication summaries of each logger.
+    - self.triggered: bool = True once an error was logged in the scope.
+    """
+
+    def __init__(self, size: int = BasicConfig.SAMPLING_SCOPE_SIZE.value) -> None:
+        """Initialize scope holding at most 'size' records"""
+        self.size: int = size
+        self.held: Dict[Any, Deque[Tuple[str, str]]] = {}
+        self.released: Dict[Any, List[Tuple[str, str]]] = {}
+        self.count: int = 0
+        self.triggered: bool = False
+        self.lock: threading.Lock = threading.Lock()
+        self.token: Optional[Token] = None
+
+    def hold(
+        self, logger: Any, levelno: int, level: str, document: str
+    ) -> Optional[str]:
+        """
+        Return the document to ship it as usual, or None if the scope holds it,
+        or released it with the records held before it.
+        """
+        with self.lock:
+            if levelno >= TRIGGER_LEVEL:
+                self.triggered = True
+            if self.triggered:
+                held: Optional[Deque[Tuple[str, str]]] = self.held.pop(logger, None)
+                if not held:
+                    return document
+                self._release(len(held))
+                self.released.setdefault(logger, []).extend([*held, (level, document)])
+                return None
+            if levelno >= HELD_BELOW:
+                return document
+
+            records: Deque[Tuple[str, str]] = self.held.setdefault(logger, deque())
+            if self.count >= self.size:
+                if not records:
+                    _count_sampled(logger)
+                    return None
+                records.popleft()
+                self._release(1)
+                _count_sampled(logger)
+            if not sampling_budget.acquire():
+                _count_sampled(logger)
+                return None
+            records.append((level, document))
+            self.count += 1
+            return None
+
+    def release(self, logger: Any) -> List[Tuple[str, str]]:
+        """Return and forget the (level, document) released for the logger"""
+        with self.lock:
+            return self.released.pop(logger, [])
+
+    def _release(self, count: int) -> None:
+        """Forget held records, the lock must be held"""
+        self.count -= count
+        sampling_budget.release(count)
+
+    def close(self) -> List[Tuple[Any, Awaitable[None]]]:
+        """
+        Ship the records released or held by a triggered scope, or drop the held records.
+        Return the async loggers and their pending shipments.
+        """
+        with self.lock:
+            held: Dict[Any, Deque[Tuple[str, str]]] = self.held
+            released: Dict[Any, List[Tuple[str, str]]] = self.released
+            self.held, self.released = {}, {}
+            self._release(self.count)
+
+        pending: List[Tuple[Any, Awaitable[None]]] = []
+        for logger, records in held.items():
+            if not self.triggered:
+                _count_sampled(logger, len(records))
+                continue
+            released.setdefault(logger, []).extend(records)
+        for logger, records in released.items():
+            for level, document in records:
+                # pylint: disable=protected-access
+                shipped: Any = logger._ship(level, document)
+                if inspect.isawaitable(shipped):
+                    pending.append((logger, shipped))
+        return pending
+
+    def __enter__(self) -> "SamplingScope":
+        """Bind the scope to the current context"""
+        self.token = sampling_scope.set(self)
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        """
+        Unbind the scope. The async shipments are scheduled on the running event loop,
+        or outside of an event loop, shipped on the event loop of the latest log call of their logger,
+        like AsyncElk.close. Raise RuntimeError if that loop was closed, the records are dropped.
+        """
+        sampling_scope.reset(self.token)
+        dropped: int = 0
+        for logger, shipment in self.close():
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                asyncio.ensure_future(shipment)
+                continue
+
+            loop: Optional[asyncio.AbstractEventLoop] = getattr(logger, "loop", None)
+            if loop is None or loop.is_closed():
+                shipment.close()  # type: ignore[attr-defined]
+                _count_sampled(logger)
+                dropped += 1
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(shipment, loop).result()  # type: ignore[arg-type]
+            else:
+                loop.run_until_complete(shipment)
+        if dropped:
+            raise RuntimeError(
+                f"Dropped {dropped} sampled records without an event loop to ship them, "
+                + "please use 'async with' for the scopes of an AsyncElk logger."
+            )
+
+    async def __aenter__(self) -> "SamplingScope":
+        """Bind the scope to the current context"""
+        return self.__enter__()
+
+    async def __aexit__(self, *_: Any) -> None:
+        """Unbind the scope and wait for the async shipments"""
+        sampling_scope.reset(self.token)
+        for _, shipment in self.close():
+            await shipment
+
+
+sampling_scope: "ContextVar[Optional[SamplingScope]]" = ContextVar(
+    "loggingsfactory_sampling", default=None
+)
+
+
+def hold_record(logger: Any, levelno: int, level: str, document: str) -> Optional[str]:
+    """Return the document, or None if the sampling scope of the current context holds it"""
+    scope: Optional[SamplingScope] = sampling_scope.get()
+    if scope is None:
+        return document
+    return scope.hold(logger, levelno, level, document)
+
+
+def release_records(logger: Any) -> List[Tuple[str, str]]:
+    """Return the (level, document) released for the logger by the current sampling scope"""
+    scope: Optional[SamplingScope] = sampling_scope.get()
+    if scope is None or not scope.released:
+        return []
+    return scope.release(logger)
+
+
+def _count_sampled(logger: Any, count: int = 1) -> None:
+    """Count records dropped by tail sampling if the logger records metrics"""
+    instrumentation: Any = getattr(logger, "instrumentation", None)
+    if instrumentation is not None:
+        instrumentation.increment("sampled", count)
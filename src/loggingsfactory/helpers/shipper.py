@@ -0,0 +1,479 @@
+"""Ship formatted log documents in batches from a background thread"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import queue
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+import weakref
+from loguru import logger
+
+from ..constants.config import LOG_LEVEL_NUMBERS, BasicConfig, LogLevelNumbers
+from ..helpers.backpressure import AdaptiveBatch
+from ..helpers.metrics import LoggerMetrics
+
+# documents below this level are dropped first when the bulk lane is under pressure
+SHED_BELOW: int = LogLevelNumbers.WARNING.value
+# minimum number of seconds between the hand offs of the thread buffers by the background thread
+DRAIN_INTERVAL: float = 0.001
+# status of the requests rejected by Elasticsearch under pressure
+REJECTED_STATUS: int = 429
+
+Batch = List[Tuple[str, str]]
+
+
+class BulkShipper:
+    """
+    Queue formatted documents and send them in batches from a background thread.
+
+    A batch is sent once it holds 'batchsize' documents, or 'flushinterval' seconds
+    after its first document was queued. Documents are dropped when the queue is full.
+
+    With a 'chunksize' above 1, each logging thread appends its documents to a buffer of its own,
+    without taking a lock, and hands them off to the queue in chunks, taking the queue lock
+    once per chunk. The background thread hands off the partial chunks of every thread
+    each 'flushinterval' seconds, so a document waits at most twice 'flushinterval' for its batch.
+
+    'send' returns the documents of the batch that may be retried, e.g. the items of a bulk request
+    rejected with 429, and only these documents are sent again, up to BULK_RETRIES times with
+    an exponential backoff. A batch whose request was rejected with 429 is retried as a whole,
+    a batch whose request raised another exception is dropped.
+
+    With an AdaptiveBatch controller, the batch size follows the controller, and up to
+    its concurrency batches are sent at the same time by a pool of threads.
+
+    The thread is restarted in forked processes, documents queued before the fork are only
+    shipped by the parent process.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Batch], Optional[Batch]],
+        batchsize: int,
+        flushinterval: float,
+        queuesize: int,
+        instrumentation: Optional[LoggerMetrics] = None,
+        controller: Optional[AdaptiveBatch] = None,
+        chunksize: int = 1,
+    ) -> None:
+        """
+        Initialize shipper and start its thread
+
+        - send: Callable = sends a batch of (level, document), e.g. with a bulk request,
+                           and returns the (level, document) that failed and may be retried.
+        - batchsize: int = maximum number of documents per batch.
+        - flushinterval: float = maximum number of seconds a document waits for its batch to fill up.
+        - queuesize: int = maximum number of documents waiting to be sent.
+        - instrumentation: LoggerMetrics = records the enqueue time, queue depth, retries, drops
+                                           and requests in flight.
+        - controller: AdaptiveBatch = adapts the batch size and the number of requests in flight
+                                      to the latency and rejections of the requests.
+        - chunksize: int = number of documents buffered by each thread before handing them off
+                           to the queue, default is 1, i.e. documents are queued one by one.
+        """
+        self.send: Callable[[Batch], Optional[Batch]] = send
+        self.batchsize: int = batchsize
+        self.flushinterval: float = flushinterval
+        self.queuesize: int = queuesize
+        self.instrumentation: Optional[LoggerMetrics] = instrumentation
+        self.controller: Optional[AdaptiveBatch] = controller
+        self.chunksize: int = chunksize
+        self._start()
+
+    def _start(self) -> None:
+        """Create the queue and buffers, and start the thread of the current process"""
+        self.pid: int = os.getpid()
+        self.queue: "queue.Queue[Optional[Batch]]" = queue.Queue()
+        self.lock: threading.Condition = threading.Condition()
+        self.queued: int = 0
+        self.pending: int = 0
+        self.local: threading.local = threading.local()
+        self.buffers: List[Tuple[weakref.ref, Deque[Tuple[str, str]]]] = []
+        self.inflight: int = 0
+        self.slots: threading.Condition = threading.Condition()
+        self.executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(
+                self.controller.maxconcurrency,
+                thread_name_prefix="loggingsfactory-shipper",
+            )
+            if self.controller is not None
+            else None
+        )
+        self.thread: threading.Thread = threading.Thread(
+            target=self._run, name="loggingsfactory-shipper", daemon=True
+        )
+        self.thread.start()
+
+    def put(self, level: str, document: str) -> bool:
+        """Queue a document, return False if it was dropped because the queue is full"""
+        if self.pid != os.getpid():
+            self._start()
+
+        started: float = time.perf_counter()
+        if self.chunksize <= 1:
+            queued: bool = self._handoff([(level, document)])
+        else:
+            buffer: Optional[Deque[Tuple[str, str]]] = getattr(
+                self.local, "buffer", None
+            )
+            if buffer is None:
+                buffer = self._register()
+            queued = self.queued + len(buffer) < self.queuesize
+            if not queued:
+                self._count_drops(1)
+            else:
+                buffer.append((level, document))
+                if len(buffer) >= self.chunksize:
+                    self._handoff(_take(buffer))
+        if queued and self.instrumentation is not None:
+            self.instrumentation.record_enqueue(started, self.queued)
+        return queued
+
+    def _register(self) -> Deque[Tuple[str, str]]:
+        """Create the buffer of the current thread"""
+        buffer: Deque[Tuple[str, str]] = deque()
+        self.local.buffer = buffer
+        with self.lock:
+            self.buffers.append((weakref.ref(threading.current_thread()), buffer))
+        return buffer
+
+    def _handoff(self, chunk: Batch) -> bool:
+        """Queue a chunk of documents, return False if documents were dropped because the queue is full"""
+        if not chunk:
+            return True
+        with self.lock:
+            admitted: int = min(len(chunk), self.queuesize - self.queued)
+            if admitted > 0:
+                self.queued += admitted
+                self.pending += admitted
+        if admitted < len(chunk):
+            self._count_drops(len(chunk) - max(admitted, 0))
+        if admitted <= 0:
+            return False
+        self.queue.put(chunk[:admitted])
+        return admitted == len(chunk)
+
+    def _drain(self) -> bool:
+        """Hand off the buffered documents of every thread, return True if any were queued"""
+        with self.lock:
+            self.buffers = [
+                (thread, buffer)
+                for thread, buffer in self.buffers
+                if buffer or _is_alive(thread)
+            ]
+            buffers: List[Deque[Tuple[str, str]]] = [
+                buffer for _, buffer in self.buffers if buffer
+            ]
+        drained: bool = False
+        for buffer in buffers:
+            chunk: Batch = _take(buffer)
+            if chunk:
+                self._handoff(chunk)
+                drained = True
+        return drained
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued document was sent, return False on timeout"""
+        if self.pid != os.getpid() or not self.thread.is_alive():
+            return self.pending == 0
+
+        self._drain()
+        deadline: Optional[float] = (
+            None if timeout is None else time.monotonic() + timeout
+        )
+        with self.lock:
+            while self.pending:
+                remaining: Optional[float] = (
+                    None if deadline is None else deadline - time.monotonic()
+                )
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.lock.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Send the queued documents and stop the thread, return False on timeout"""
+        if self.pid != os.getpid() or not self.thread.is_alive():
+            return self.pending == 0
+
+        self._drain()
+        self.queue.put(None)
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    def unsent(self) -> int:
+        """Return the number of queued or buffered documents that were not sent yet"""
+        if self.pid != os.getpid():
+            return 0
+        with self.lock:
+            return self.pending + sum(len(buffer) for _, buffer in self.buffers)
+
+    def _run(self) -> None:
+        """Collect batches from the queue and send them until closed"""
+        batch: Batch = []
+        deadline: float = 0
+        closed: bool = False
+        while True:
+            batchsize: int = (
+                self.batchsize if self.controller is None else self.controller.size
+            )
+            if batch and (len(batch) >= batchsize or closed):
+                self._dispatch(batch[:batchsize])
+                batch = batch[batchsize:]
+                deadline = time.monotonic() + self.flushinterval
+                continue
+            if closed:
+                self._close()
+                return
+
+            timeout: Optional[float] = (
+                deadline - time.monotonic()
+                if batch
+                else max(self.flushinterval, DRAIN_INTERVAL)
+                if self.chunksize > 1
+                else None
+            )
+            try:
+                chunk: Optional[Batch] = (
+                    self.queue.get_nowait()
+                    if timeout is not None and timeout <= 0
+                    else self.queue.get(timeout=timeout)
+                )
+            except queue.Empty:
+                if self.chunksize > 1 and self._drain():
+                    continue
+                if batch:
+                    self._dispatch(batch[:batchsize])
+                    batch = batch[batchsize:]
+                    deadline = time.monotonic() + self.flushinterval
+                continue
+
+            if chunk is None:
+                closed = True
+                continue
+            with self.lock:
+                self.queued -= len(chunk)
+            if not batch:
+                deadline = time.monotonic() + self.flushinterval
+            batch.extend(chunk)
+
+    def _dispatch(self, batch: Batch) -> None:
+        """
+        Send a batch from the thread, or from the pool of threads.
+        The pool no longer accepts batches once the interpreter is shutting down,
+        before the exit hooks close the shipper, so the thread sends them itself.
+        """
+        if self.executor is None:
+            self._send(batch)
+            self._sent(len(batch))
+            return
+
+        self._acquire()
+        try:
+            self.executor.submit(self._send_concurrently, batch)
+        except RuntimeError:
+            self._send_concurrently(batch)
+
+    def _acquire(self) -> None:
+        """Wait until the controller allows one more request in flight"""
+        with self.slots:
+            while self.inflight >= self.controller.concurrency:
+                self.slots.wait()
+            self.inflight += 1
+            if self.instrumentation is not None:
+                self.instrumentation.set("in_flight", self.inflight)
+
+    def _send_concurrently(self, batch: Batch) -> None:
+        """Send a batch from the pool of threads and release its request slot"""
+        try:
+            self._send(batch)
+        finally:
+            with self.slots:
+                self.inflight -= 1
+                if self.instrumentation is not None:
+                    self.instrumentation.set("in_flight", self.inflight)
+                self.slots.notify_all()
+            self._sent(len(batch))
+
+    def _sent(self, documents: int) -> None:
+        """Mark the documents of a batch as sent"""
+        with self.lock:
+            self.pending -= documents
+            if not self.pending:
+                self.lock.notify_all()
+        if self.instrumentation is not None:
+            self.instrumentation.set("queue_depth", self.queued)
+
+    def _close(self) -> None:
+        """Wait for the requests in flight, so that closing the thread also waits for them"""
+        with self.slots:
+            while self.inflight:
+                self.slots.wait()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def _send(self, batch: Batch) -> None:
+        """
+        Send a batch and retry its failed documents,
+        the documents are dropped if sending raised an exception or they failed too often.
+        """
+        for attempt in range(BasicConfig.BULK_RETRIES.value + 1):
+            if attempt:
+                if self.instrumentation is not None:
+                    self.instrumentation.increment("retries", len(batch))
+                time.sleep(
+                    BasicConfig.RETRY_BACKOFF_MS.value * 2 ** (attempt - 1) / 1000
+                )
+
+            started: float = time.perf_counter()
+            try:
+                result: Optional[Batch] = self.send(batch)
+                failed: Batch = result if isinstance(result, list) else []
+            except Exception as e:  # pylint: disable=broad-except
+                if getattr(e, "status_code", None) != REJECTED_STATUS:
+                    self._record(started, True)
+                    self._drop(batch, f"sending failed: {e}")
+                    return
+                failed = batch
+            self._record(started, bool(failed))
+            if not failed:
+                return
+            batch = failed
+        self._drop(batch, "Elasticsearch kept rejecting them")
+
+    def _record(self, started: float, rejected: bool) -> None:
+        """Adapt the controller to the latency and rejection of a request"""
+        if self.controller is not None:
+            self.controller.record(time.perf_counter() - started, rejected)
+
+    def _drop(self, batch: Batch, reason: str) -> None:
+        """Drop the documents of a batch"""
+        logger.warning(f"Dropped {len(batch)} log documents, {reason}")
+        self._count_drops(len(batch))
+
+    def _count_drops(self, documents: int) -> None:
+        """Count dropped documents if the shipper records metrics"""
+        if self.instrumentation is not None:
+            self.instrumentation.increment("drops", documents)
+
+
+def _is_alive(thread: weakref.ref) -> bool:
+    """Return True if the referenced thread is alive"""
+    alive: Optional[threading.Thread] = thread()
+    return alive is not None and alive.is_alive()
+
+
+def _take(buffer: Deque[Tuple[str, str]]) -> Batch:
+    """Remove and return the documents of a thread buffer, without taking a lock"""
+    chunk: Batch = []
+    try:
+        while True:
+            chunk.append(buffer.popleft())
+    except IndexError:
+        return chunk
+
+
+class PriorityShipper:
+    """
+    Ship formatted documents with a lane per priority, each lane is a BulkShipper.
+
+    Documents of the urgent level or above go to the urgent lane, which sends them as soon as
+    they are queued, with the documents queued meanwhile, in batches of at most 'urgentbatchsize'.
+    Other documents go to the bulk lane, buffered per thread in chunks of 'chunksize',
+    and batched by 'flushinterval' and an AdaptiveBatch
+    controller, growing the batches up to 'batchsize' and the requests in flight up to 'maxinflight'
+    while the requests are faster than 'targetlatency', and shrinking them on rejections.
+    Once the bulk lane is filled up to 'shedpercent' of its queue, DEBUG and INFO documents
+    are dropped, so that WARNING documents are only dropped once its queue is full.
+
+    Lanes are independent, an urgent document may be sent before older bulk documents.
+
+    - self.lanes: Dict[str, BulkShipper] = the urgent and bulk lanes, keyed by urgent and bulk.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Batch], Optional[Batch]],
+        batchsize: int,
+        flushinterval: float,
+        queuesize: int,
+        instrumentation: Optional[LoggerMetrics] = None,
+        urgentlevel: int = LogLevelNumbers.ERROR.value,
+        urgentbatchsize: int = BasicConfig.URGENT_BATCH_SIZE.value,
+        shedpercent: int = BasicConfig.SHED_PERCENT.value,
+        maxinflight: int = BasicConfig.MAX_IN_FLIGHT.value,
+        targetlatency: float = BasicConfig.TARGET_LATENCY.value,
+        chunksize: int = BasicConfig.CHUNK_SIZE.value,
+    ) -> None:
+        """
+        Initialize shipper and start the thread of each lane
+
+        - send, batchsize, flushinterval, queuesize, instrumentation: refer to BulkShipper.
+        - urgentlevel: int = documents of this level number or above are sent by the urgent lane.
+        - urgentbatchsize: int = maximum number of documents per batch of the urgent lane.
+        - shedpercent: int = percentage of the bulk lane queue above which DEBUG and INFO documents are dropped.
+        - maxinflight: int = maximum number of requests in flight of the bulk lane.
+        - targetlatency: float = number of seconds above which a request of the bulk lane is considered slow.
+        - chunksize: int = number of documents buffered by each thread before handing them off to the bulk lane.
+        """
+        self.urgentlevel: int = urgentlevel
+        self.shedsize: int = queuesize * shedpercent // 100
+        self.instrumentation: Optional[LoggerMetrics] = instrumentation
+        self.urgent: BulkShipper = BulkShipper(
+            send, urgentbatchsize, 0, queuesize, instrumentation
+        )
+        self.bulk: BulkShipper = BulkShipper(
+            send,
+            batchsize,
+            flushinterval,
+            queuesize,
+            instrumentation,
+            AdaptiveBatch(batchsize, maxinflight, targetlatency, instrumentation),
+            chunksize,
+        )
+        self.lanes: Dict[str, BulkShipper] = {"urgent": self.urgent, "bulk": self.bulk}
+
+    def put(self, level: str, document: str) -> bool:
+        """Queue a document in the lane of its level, return False if it was dropped"""
+        levelno: int = LOG_LEVEL_NUMBERS[level]
+        if levelno >= self.urgentlevel:
+            return self.urgent.put(level, document)
+        if levelno < SHED_BELOW and self.bulk.queued >= self.shedsize:
+            if self.instrumentation is not None:
+                self.instrumentation.increment("drops")
+            return False
+        return self.bulk.put(level, document)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every lane sent its queued documents, return False on timeout"""
+        deadline: Optional[float] = (
+            None if timeout is None else time.monotonic() + timeout
+        )
+        # a lane timing out means the deadline passed, the other lanes are not waited for
+        return all(
+            lane.flush(
+                None if deadline is None else max(deadline - time.monotonic(), 0)
+            )
+            for lane in self.lanes.values()
+        )
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Send the queued documents and stop the thread of every lane, return False on timeout"""
+        deadline: Optional[float] = (
+            None if timeout is None else time.monotonic() + timeout
+        )
+        # every lane is closed, even once a lane timed out
+        closed: bool = True
+        for lane in self.lanes.values():
+            closed = (
+                lane.close(
+                    None if deadline is None else max(deadline - time.monotonic(), 0)
+                )
+                and closed
+            )
+        return closed
+
+    def unsent(self) -> int:
+        """Return the number of documents of every lane that were not sent yet"""
+        return sum(lane.unsent() for lane in self.lanes.values())
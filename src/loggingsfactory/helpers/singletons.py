@@ -12,9 +12,9 @@ class LogCounter:
         """
         self.counter: int = 0
 
-    def increment(self) -> None:
+    def increment(self, count: int = 1) -> None:
         """Increment counter"""
-        self.counter += 1
+        self.counter += count
 
 
 logcounter = LogCounter()
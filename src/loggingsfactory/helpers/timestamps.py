@@ -0,0 +1,66 @@
+"""Generate the timestamps of the log records"""
+import time
+from typing import Callable, Tuple
+
+
+class HybridClock:
+    """
+    Wall clock anchored once, then advanced with the monotonic clock.
+
+    Timestamps never go backwards when the system clock is adjusted,
+    which keeps the ordering of records stable in tests and long running processes.
+    """
+
+    def __init__(
+        self,
+        wall: Callable[[], float] = time.time,
+        monotonic: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize clock
+
+        - self.monotonic: Callable[[], float] = monotonic clock used to advance the time.
+        - self.offset: float = difference between the wall clock and monotonic clock when anchored.
+        """
+        self.monotonic: Callable[[], float] = monotonic
+        self.offset: float = wall() - monotonic()
+
+    def __call__(self) -> float:
+        """Return the current time in seconds since the epoch"""
+        return self.offset + self.monotonic()
+
+
+class TimestampProvider:
+    """
+    UTC ISO 8601 timestamps with an explicit offset, e.g. 2020-01-01T00:00:00.000000+00:00
+
+    The 'YYYY-MM-DDTHH:MM:SS' prefix is formatted once per second and cached,
+    only the sub-second part is formatted per call.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        """
+        Initialize provider
+
+        - self.clock: Callable[[], float] = returns the current time in seconds since the epoch,
+                                            can be swapped for a HybridClock or a fake clock in tests.
+        - self.cache: Tuple[int, str] = second and formatted prefix, replaced as a whole to be thread safe.
+        """
+        self.clock: Callable[[], float] = clock
+        self.cache: Tuple[int, str] = (-1, "")
+
+    def now(self) -> str:
+        """Return the current timestamp"""
+        return self.format(self.clock())
+
+    def format(self, seconds: float) -> str:
+        """Return the timestamp of a time in seconds since the epoch"""
+        second, microsecond = divmod(round(seconds * 1000000), 1000000)
+        cached_second, prefix = self.cache
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self.cache = (second, prefix)
+        return f"{prefix}.{microsecond:06d}+00:00"
+
+
+timestamps = TimestampProvider()
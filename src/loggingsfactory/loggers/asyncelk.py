@@ -1,14 +1,29 @@
 """AsyncElasticsearch library wrapper"""
-from datetime import datetime
-from typing import Any, Dict, Optional, Union
+import asyncio
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from loguru import logger
 
 from ..helpers.decorators import connect_async_elk
-from ..constants.config import BasicConfig
+from ..constants.config import BasicConfig, StringConfig
+from ..helpers.dedup import summary_flusher
 from ..helpers.formats import (
+    LogData,
     check_log_level,
+    format_bulk_body,
+    format_coalesced_log_data,
     format_elk_query_payload,
+    format_index_template,
     format_log_data,
+    format_log_many,
+    get_bulk_failures,
+    report_bulk_failures,
 )
+from ..helpers.indices import installed_templates
+from ..helpers.lifecycle import lifecycle, report_unsent
+from ..helpers.registry import registry
+from ..helpers.timestamps import timestamps
 from ..loggers.interface import LoggerInterface
 
 
@@ -27,6 +42,7 @@ class AsyncElk(LoggerInterface):
     def __init__(self, **kwargs) -> None:
         """Initialize LoggerInterface, self variables and AsyncElasticsearch library."""
         super().__init__(**kwargs)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
 
     def log(self, *args, **kwargs):
         """Not used"""
@@ -35,26 +51,156 @@ class AsyncElk(LoggerInterface):
     async def async_log(
         self,
         level: str,
-        logdata: Union[str, Dict[str, Any]],
+        logdata: LogData,
         custom_func_name: Optional[str] = "",
         use_custom_logdata: Optional[bool] = False,
         date: Optional[str] = None,
         _reduce_stack_level: Optional[int] = 0,
+        logargs: Optional[Sequence[Any]] = None,
     ) -> None:
         """Override inherited method from LoggerInterface"""
         check_log_level(level)
+        self.loop = asyncio.get_running_loop()
 
-        await self.es.index(
-            index=self.index,
-            document=format_log_data(
-                self,
-                level.upper(),
-                logdata,
-                custom_func_name,
-                use_custom_logdata,
-                date,
-                _reduce_stack_level,
-            ),
+        started: float = perf_counter()
+        document: Optional[str] = format_log_data(
+            self,
+            level.upper(),
+            logdata,
+            custom_func_name,
+            use_custom_logdata,
+            date,
+            _reduce_stack_level,
+            logargs=logargs,
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        if document is not None:
+            await self._ship(level.upper(), document)
+        for summary_level, summary in format_coalesced_log_data(self):
+            await self._ship(summary_level, summary)
+
+    async def _ship(self, level: str, document: str) -> None:
+        """Send a document to the collector, or index it"""
+        if self.transport is not None:
+            self.transport.send(level, document)
+        else:
+            await self._index(document)
+
+    def _ship_summaries(self) -> None:
+        """
+        Ship the summaries of the closed deduplication windows on the event loop of the latest log call,
+        called by the summary flusher thread. Failures are reported with a warning.
+        """
+        loop: Optional[asyncio.AbstractEventLoop] = getattr(self, "loop", None)
+        if loop is None or loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(
+            self._ship_summaries_async(), loop
+        ).add_done_callback(_report_summaries_failure)
+
+    async def _ship_summaries_async(self) -> None:
+        """Ship the summaries of the closed deduplication windows"""
+        for level, summary in format_coalesced_log_data(self):
+            await self._ship(level, summary)
+
+    async def _index(self, document: str) -> None:
+        """Index a single document and record the request metrics"""
+        body: Union[str, bytes] = document
+        headers: Optional[Dict[str, str]] = None
+        if self.compressor is not None:
+            body, headers = self.compressor.compress(document)
+        if self.instrumentation is None:
+            await self.es.index(
+                index=self.router.resolve(),
+                document=body,
+                headers=headers,
+                op_type=self.optype,
+            )
+            return
+
+        started: float = perf_counter()
+        try:
+            await self.es.index(
+                index=self.router.resolve(),
+                document=body,
+                headers=headers,
+                op_type=self.optype,
+            )
+        except Exception:
+            self.instrumentation.increment("failures")
+            raise
+        self.instrumentation.record_ship(started, 1, len(body))
+
+    def log_many(self, *args, **kwargs) -> None:
+        """Not used"""
+        raise NotImplementedError("Please use 'async_log_many' method instead.")
+
+    async def async_log_many(
+        self,
+        records: Iterable[Sequence[Any]],
+        _reduce_stack_level: Optional[int] = 0,
+    ) -> None:
+        """Override inherited method from LoggerInterface"""
+        self.loop = asyncio.get_running_loop()
+        started: float = perf_counter()
+        documents: List[Tuple[str, str]] = format_log_many(
+            self, records, _reduce_stack_level
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        if self.transport is not None:
+            for document_level, document in documents:
+                self.transport.send(document_level, document)
+        elif documents:
+            await self._bulk(documents)
+
+    async def _bulk(self, documents: List[Tuple[str, str]]) -> None:
+        """
+        Index the documents with a single bulk request and record the request metrics.
+        The documents that failed are reported and counted as failures.
+        """
+        body: Union[str, bytes] = format_bulk_body(
+            self.router.resolve(), documents, self.optype
+        )
+        headers: Optional[Dict[str, str]] = None
+        if self.compressor is not None:
+            # compress in the default executor to keep the event loop responsive
+            body, headers = await asyncio.get_running_loop().run_in_executor(
+                None, self.compressor.compress, body
+            )
+        retried: List[Tuple[str, str]]
+        rejected: List[Tuple[str, str]]
+        if self.instrumentation is None:
+            retried, rejected = get_bulk_failures(
+                await self._send_bulk(body, headers), documents
+            )
+            report_bulk_failures(self, retried + rejected)
+            return
+
+        started: float = perf_counter()
+        try:
+            response: Any = await self._send_bulk(body, headers)
+        except Exception:
+            self.instrumentation.increment("failures")
+            raise
+        retried, rejected = get_bulk_failures(response, documents)
+        self.instrumentation.record_ship(
+            started, len(documents) - len(retried) - len(rejected), len(body)
+        )
+        report_bulk_failures(self, retried + rejected)
+
+    async def _send_bulk(
+        self, body: Union[str, bytes], headers: Optional[Dict[str, str]]
+    ) -> Any:
+        """
+        Send a bulk request body, compressed bodies are sent with the transport
+        since the bulk method appends a newline to bytes bodies
+        """
+        if headers is None:
+            return await self.es.bulk(body=body)
+        return await self.es.transport.perform_request(
+            "POST", "/_bulk", headers=headers, body=body
         )
 
     def query(self, *args, **kwargs) -> Any:
@@ -66,13 +212,148 @@ class AsyncElk(LoggerInterface):
         custompayload: Optional[Dict[str, Any]] = None,
         size: int = BasicConfig.DEFAULT_SIZE.value,
         cache: bool = True,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
     ) -> None:
         """Override inherited method from LoggerInterface"""
         return await self.es.search(
-            index=self.index,
+            index=self.router.indices(start, end),
             size=size,
             body=format_elk_query_payload(
-                self.appname, datetime.now().isoformat(), custompayload
+                self.appname,
+                end or timestamps.now(),
+                custompayload,
+                start,
+                (str(self.host), self.router.template_name) in installed_templates,
             ),
             request_cache=cache,
+            ignore_unavailable=self.router.dated,
+        )
+
+    def ensure_index_template(self, *args, **kwargs) -> None:
+        """Not used"""
+        raise NotImplementedError(
+            "Please use 'async_ensure_index_template' method instead."
+        )
+
+    async def async_ensure_index_template(
+        self,
+        shards: int = BasicConfig.TEMPLATE_SHARDS.value,
+        replicas: int = BasicConfig.TEMPLATE_REPLICAS.value,
+        refreshinterval: str = StringConfig.REFRESH_INTERVAL.value,
+    ) -> bool:
+        """Override inherited method from LoggerInterface"""
+        key: Tuple[str, str] = (str(self.host), self.router.template_name)
+        if key in installed_templates:
+            return False
+
+        installed_templates.add(key)
+        try:
+            await self.es.indices.put_index_template(
+                name=self.router.template_name,
+                body=format_index_template(
+                    self.router.pattern, shards, replicas, refreshinterval
+                ),
+            )
+        except Exception:
+            installed_templates.discard(key)
+            raise
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> int:
+        """
+        Close the logger from outside of an event loop, e.g. when the process exits. Refer to aclose.
+
+        The logger is closed on the event loop of its latest log call, which is run until
+        the logger is closed if it is not running, or which is running in another thread.
+        If the loop was closed, the AsyncElasticsearch client is closed on a short-lived event loop
+        and the deduplication summaries are left unsent, unless the logger sends them to the collector.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("Please use 'aclose' method within the event loop.")
+
+        loop: Optional[asyncio.AbstractEventLoop] = self.loop
+        if loop is None or loop.is_closed():
+            return self._close_detached()
+        if not loop.is_running():
+            return loop.run_until_complete(self.aclose(timeout))
+        future: "Future[int]" = asyncio.run_coroutine_threadsafe(
+            self.aclose(timeout), loop
+        )
+        try:
+            # the summaries are shipped within the timeout, then the aiohttp sessions are closed
+            return future.result(
+                (self.shutdowntimeout if timeout is None else timeout)
+                + BasicConfig.SESSION_CLOSE_TIMEOUT.value
+            )
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning("AsyncElk logger failed to close within its event loop")
+            return 0
+
+    def _close_detached(self) -> int:
+        """Close the logger without an event loop, refer to close"""
+        if self.closed:
+            return 0
+        self.closed = True
+        lifecycle.unregister(self)
+        summary_flusher.unregister(self)
+        registry.discard(self)
+
+        summaries: List[Tuple[str, str]] = format_coalesced_log_data(self, True)
+        unsent: int = len(summaries)
+        if self.transport is not None:
+            for level, summary in summaries:
+                self.transport.send(level, summary)
+            unsent = self.transport.close()
+        # the loop of the latest log call is gone, the client is closed on a short-lived loop
+        loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.es.close())
+        finally:
+            loop.close()
+        return report_unsent(self, unsent)
+
+    async def aclose(self, timeout: Optional[float] = None) -> int:
+        """
+        Ship the pending deduplication summaries and close the AsyncElasticsearch client
+        and its aiohttp session. Return the number of summaries left unsent,
+        which are also reported with a warning. Refer to LoggerInterface.close.
+
+        - timeout: float = maximum number of seconds to wait for the summaries,
+                           default is the shutdowntimeout of the logger.
+        """
+        if self.closed:
+            return 0
+        self.closed = True
+        lifecycle.unregister(self)
+        summary_flusher.unregister(self)
+        registry.discard(self)
+
+        deadline: float = perf_counter() + (
+            self.shutdowntimeout if timeout is None else timeout
+        )
+        unsent: int = 0
+        for level, summary in format_coalesced_log_data(self, True):
+            try:
+                await asyncio.wait_for(
+                    self._ship(level, summary), max(deadline - perf_counter(), 0)
+                )
+            except Exception:  # pylint: disable=broad-except
+                unsent += 1
+        if self.transport is not None:
+            unsent += self.transport.close()
+        await self.es.close()
+        return report_unsent(self, unsent)
+
+
+def _report_summaries_failure(future: "Future[None]") -> None:
+    """Warn about the deduplication summaries that failed to ship"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(
+            f"AsyncElk logger failed to ship the deduplication summaries: {future.exception()!r}"
         )
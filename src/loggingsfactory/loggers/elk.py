@@ -1,14 +1,25 @@
 """Elasticsearch library wrapper"""
-from datetime import datetime
-from typing import Any, Dict, Optional, Union
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-from ..constants.config import BasicConfig
+from ..constants.config import BasicConfig, StringConfig
+from ..constants.keys import LoggerKeys
 from ..helpers.decorators import connect_elk
 from ..helpers.formats import (
+    LogData,
     check_log_level,
+    format_bulk_body,
+    format_coalesced_log_data,
     format_elk_query_payload,
+    get_bulk_failures,
+    report_bulk_failures,
+    format_index_template,
     format_log_data,
+    format_log_many,
 )
+from ..helpers.shipper import PriorityShipper
+from ..helpers.indices import installed_templates
+from ..helpers.timestamps import timestamps
 from ..loggers.interface import LoggerInterface
 
 
@@ -21,6 +32,10 @@ class Elk(LoggerInterface):
     This only support synchronous methods.
 
     sql_query: method = this is inherited from LoggerInterface.
+
+    - self.shipper: PriorityShipper = queues the documents and sends them with bulk requests
+                                      from background threads, only used if buffered is set to True.
+                                      Documents of the urgent level are sent as soon as they are queued.
     """
 
     @connect_elk
@@ -28,51 +43,222 @@ class Elk(LoggerInterface):
         """Initialize LoggerInterface, self variables and Elasticsearch library."""
         super().__init__(**kwargs)
 
+        self.shipper: Optional[PriorityShipper] = (
+            PriorityShipper(
+                self._bulk,
+                kwargs.get(LoggerKeys.BATCH_SIZE.value) or BasicConfig.BATCH_SIZE.value,
+                kwargs.get(LoggerKeys.FLUSH_INTERVAL.value)
+                or BasicConfig.FLUSH_INTERVAL.value,
+                self.queuesize,
+                self.instrumentation,
+                self.urgentlevel,
+                maxinflight=kwargs.get(LoggerKeys.MAX_IN_FLIGHT.value)
+                or BasicConfig.MAX_IN_FLIGHT.value,
+                targetlatency=kwargs.get(LoggerKeys.TARGET_LATENCY.value)
+                or BasicConfig.TARGET_LATENCY.value,
+            )
+            if kwargs.get(LoggerKeys.BUFFERED.value)
+            and not self.debug
+            and self.transport is None
+            else None
+        )
+
     def log(
         self,
         level: str,
-        logdata: Union[str, Dict[str, Any]],
+        logdata: LogData,
         custom_func_name: Optional[str] = "",
         use_custom_logdata: Optional[bool] = False,
         date: Optional[str] = None,
         _reduce_stack_level: Optional[int] = 0,
+        logargs: Optional[Sequence[Any]] = None,
     ):
         """Override inherited method from LoggerInterface"""
         check_log_level(level)
 
-        self.es.index(
-            index=self.index,
-            document=format_log_data(
-                self,
-                level.upper(),
-                logdata,
-                custom_func_name,
-                use_custom_logdata,
-                date,
-                _reduce_stack_level,
-            ),
+        started: float = perf_counter()
+        document: Optional[str] = format_log_data(
+            self,
+            level.upper(),
+            logdata,
+            custom_func_name,
+            use_custom_logdata,
+            date,
+            _reduce_stack_level,
+            logargs=logargs,
         )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        if document is not None:
+            self._ship(level.upper(), document)
+        for summary_level, summary in format_coalesced_log_data(self):
+            self._ship(summary_level, summary)
+
+    def _ship(self, level: str, document: str) -> None:
+        """Send a document to the collector, the shipper, or index it"""
+        if self.transport is not None:
+            self.transport.send(level, document)
+        elif self.shipper is not None:
+            self.shipper.put(level, document)
+        else:
+            self._index(document)
+
+    def _index(self, document: str) -> None:
+        """Index a single document and record the request metrics"""
+        body: Union[str, bytes] = document
+        headers: Optional[Dict[str, str]] = None
+        if self.compressor is not None:
+            body, headers = self.compressor.compress(document)
+        if self.instrumentation is None:
+            self.es.index(
+                index=self.router.resolve(),
+                document=body,
+                headers=headers,
+                op_type=self.optype,
+            )
+            return
+
+        started: float = perf_counter()
+        try:
+            self.es.index(
+                index=self.router.resolve(),
+                document=body,
+                headers=headers,
+                op_type=self.optype,
+            )
+        except Exception:
+            self.instrumentation.increment("failures")
+            raise
+        self.instrumentation.record_ship(started, 1, len(body))
 
     async def async_log(self, *args, **kwargs) -> None:
         """Not used"""
         raise NotImplementedError("Please use 'log' method instead.")
 
+    def log_many(
+        self,
+        records: Iterable[Sequence[Any]],
+        _reduce_stack_level: Optional[int] = 0,
+    ) -> None:
+        """Override inherited method from LoggerInterface"""
+        started: float = perf_counter()
+        documents: List[Tuple[str, str]] = format_log_many(
+            self, records, _reduce_stack_level
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        if self.transport is not None or self.shipper is not None:
+            for document_level, document in documents:
+                self._ship(document_level, document)
+        elif documents:
+            report_bulk_failures(self, self._bulk(documents))
+
+    def _bulk(self, documents: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Index the documents with a single bulk request and record the request metrics.
+        Return the documents that failed and may be retried,
+        the documents that failed for another reason are reported and counted as failures.
+        """
+        body: Union[str, bytes] = format_bulk_body(
+            self.router.resolve(), documents, self.optype
+        )
+        headers: Optional[Dict[str, str]] = None
+        if self.compressor is not None:
+            body, headers = self.compressor.compress(body)
+        retried: List[Tuple[str, str]]
+        rejected: List[Tuple[str, str]]
+        if self.instrumentation is None:
+            retried, rejected = get_bulk_failures(
+                self._send_bulk(body, headers), documents
+            )
+            report_bulk_failures(self, rejected)
+            return retried
+
+        started: float = perf_counter()
+        try:
+            response: Any = self._send_bulk(body, headers)
+        except Exception:
+            self.instrumentation.increment("failures")
+            raise
+        retried, rejected = get_bulk_failures(response, documents)
+        self.instrumentation.record_ship(
+            started, len(documents) - len(retried) - len(rejected), len(body)
+        )
+        report_bulk_failures(self, rejected)
+        return retried
+
+    def _send_bulk(
+        self, body: Union[str, bytes], headers: Optional[Dict[str, str]]
+    ) -> Any:
+        """
+        Send a bulk request body, compressed bodies are sent with the transport
+        since the bulk method appends a newline to bytes bodies
+        """
+        if headers is None:
+            return self.es.bulk(body=body)
+        return self.es.transport.perform_request(
+            "POST", "/_bulk", headers=headers, body=body
+        )
+
+    async def async_log_many(self, *args, **kwargs) -> None:
+        """Not used"""
+        raise NotImplementedError("Please use 'log_many' method instead.")
+
     def query(
         self,
         custompayload: Optional[Dict[str, Any]] = None,
         size: int = BasicConfig.DEFAULT_SIZE.value,
         cache: bool = True,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
     ) -> Any:
         """Override inherited method from LoggerInterface"""
         return self.es.search(
-            index=self.index,
+            index=self.router.indices(start, end),
             size=size,
             body=format_elk_query_payload(
-                self.appname, datetime.now().isoformat(), custompayload
+                self.appname,
+                end or timestamps.now(),
+                custompayload,
+                start,
+                (str(self.host), self.router.template_name) in installed_templates,
             ),
             request_cache=cache,
+            ignore_unavailable=self.router.dated,
         )
 
     async def async_query(self, *args, **kwargs) -> None:
         """Not used"""
         raise NotImplementedError("Please use 'query' method instead.")
+
+    def ensure_index_template(
+        self,
+        shards: int = BasicConfig.TEMPLATE_SHARDS.value,
+        replicas: int = BasicConfig.TEMPLATE_REPLICAS.value,
+        refreshinterval: str = StringConfig.REFRESH_INTERVAL.value,
+    ) -> bool:
+        """Override inherited method from LoggerInterface"""
+        key: Tuple[str, str] = (str(self.host), self.router.template_name)
+        if key in installed_templates:
+            return False
+
+        installed_templates.add(key)
+        try:
+            self.es.indices.put_index_template(
+                name=self.router.template_name,
+                body=format_index_template(
+                    self.router.pattern, shards, replicas, refreshinterval
+                ),
+            )
+        except Exception:
+            installed_templates.discard(key)
+            raise
+        return True
+
+    async def async_ensure_index_template(self, *args, **kwargs) -> None:
+        """Not used"""
+        raise NotImplementedError("Please use 'ensure_index_template' method instead.")
+
+    def _close_clients(self) -> None:
+        """Close the Elasticsearch client"""
+        self.es.close()
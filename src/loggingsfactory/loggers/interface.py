@@ -1,14 +1,43 @@
 """Logging interface to enforce all logger wrappers to follow the same format"""
-from typing import Any, Dict, Optional, Union
+import asyncio
+from contextvars import Token
+import time
+from typing import Any, ContextManager, Dict, Iterable, List, Optional, Sequence, Union
 import abc
 import pandas as pd
 from pandas.core.api import DataFrame
 from es.elastic.api import connect
 from es.baseapi import BaseConnection
 
-from ..constants.config import BasicConfig, BoolConfig, StringConfig
+from ..constants.config import (
+    LOG_LEVEL_NUMBERS,
+    LogLevels,
+    BasicConfig,
+    BoolConfig,
+    StringConfig,
+    Transports,
+)
 from ..constants.keys import LoggerKeys
-from ..helpers.formats import format_elk_url
+from ..helpers.collector import (
+    CollectorClient,
+    CollectorSupervisor,
+    SharedMemoryClient,
+    start_collector,
+)
+from ..helpers.compression import Compressor
+from ..helpers.context import bind_context, contextualize, reset_context
+from ..helpers.dedup import LogDeduplicator, summary_flusher
+from ..helpers.formats import (
+    LogData,
+    check_log_level,
+    format_coalesced_log_data,
+    format_elk_url,
+)
+from ..helpers.indices import IndexRouter
+from ..helpers.lifecycle import lifecycle, report_unsent
+from ..helpers.metrics import LoggerMetrics
+from ..helpers.registry import registry
+from ..helpers.sampling import SamplingScope
 
 
 class LoggerInterface(abc.ABC):
@@ -24,17 +53,78 @@ class LoggerInterface(abc.ABC):
         - useasync: bool = set to False by default.
                            If set to True, will use the AsyncElk logger.
                            However, debug must be False to use this.
+                           With debug set to True, the Loguru logger writes the records
+                           of async_log and async_log_many from a background thread.
 
     Elasticsearch and AsyncElasticsearch required keys:
         - host: str = hostname of the ELK server
                       supports https://elasticsearch.com:9201, https://elasticsearch.com, elasticsearch.com
+                      a list or a comma separated string of hostnames balances the requests across the nodes
         - index: str = index name of the ELK server
+                       may be a template with {appname} and {date:<strftime format>} fields,
+                       e.g. logs-{appname}-{date:%Y.%m.%d} writes to one index per UTC day
         - username: str = username of the ELK server
         - pw: str = pw of the ELK server
         - port: int = port of the ELK server, default is 9201
 
     Optional keys:
         - version: str = log version, default is 1.0
+        - dedupwindow: float = collapse identical (level, functional_name, log) records
+                               logged within this number of seconds of the first record into one document
+                               with count, first_seen and last_seen, shipped once the window closes
+                               by a background thread. Disabled by default.
+        - dedupsize: int = maximum number of distinct records tracked for deduplication,
+                           default is 1024.
+        - minlevel: str = records below this log level are dropped before being evaluated
+                          or formatted, default is DEBUG.
+        - metrics: bool = set to True to record latency histograms and throughput metrics,
+                          available with the metrics and prometheus_metrics methods.
+        - buffered: bool = Elasticsearch only, set to True to queue the documents
+                           and send them with bulk requests from a background thread.
+        - batchsize: int = maximum number of documents per bulk request, default is 500.
+                           Buffered bulk requests shrink when Elasticsearch rejects them or is slow,
+                           and grow back up to batchsize, only the rejected items are retried.
+        - maxinflight: int = maximum number of buffered bulk requests in flight, default is 4.
+        - targetlatency: float = number of seconds above which a bulk request is considered slow, default is 1.
+        - flushinterval: float = maximum number of seconds a document is queued for, default is 1.
+                                 Documents are buffered by their thread and handed off to the queue
+                                 in chunks, or after flushinterval, so they may wait twice as long.
+        - queuesize: int = maximum number of queued documents, default is 10000.
+                           DEBUG and INFO documents are dropped once the queue is 80% full.
+        - urgentlevel: str = buffered Elasticsearch documents of this log level or above bypass the batching,
+                             and are sent as soon as they are queued by a lane of their own, default is ERROR.
+        - multiprocess: bool = set to True to send the formatted records to a single collector process,
+                               which owns the log file sink or the Elasticsearch bulk shipper.
+                               The collector is started by the first logger, and restarted if it exits.
+        - collector: str = Unix socket address of the collector, default is logs/collector.sock.
+        - transport: str = socket or sharedmemory, default is socket.
+                           With sharedmemory, each worker process writes its records to a shared memory
+                           ring buffer read by the collector, instead of sending them over the socket.
+        - ringsize: int = number of bytes of the ring buffer of each worker process, default is 4 MiB.
+        - compression: str = Elasticsearch only, gzip or zstd, compress the request bodies
+                             of at least 1 KiB. zstd requires the zstandard package.
+        - compressionlevel: int = compression level, default is 6 for gzip and 3 for zstd.
+        - maxsize: int = Elasticsearch only, maximum number of connections kept alive
+                         per node, size it to the number of logging threads, default is 25.
+        - timeout: float = timeout of each request in seconds, default is 30.
+        - keepalive: bool = set to False to close the connection after each request, default is True.
+        - sniff: bool = discover the cluster nodes on start and when a connection fails.
+        - sniffinterval: float = number of seconds between the cluster node discoveries if sniff is set.
+        - selector: str = strategy selecting the node of each request, default is roundrobin.
+                          roundrobin, random, latency: lowest latency moving average
+                          weighted by the outstanding requests, leastoutstanding: fewest outstanding requests.
+        - deadtimeout: float = number of seconds a failed node is quarantined for,
+                               doubled on each consecutive failure, default is 60.
+        - datastream: bool = set to True if the index is a data stream, documents are created
+                             with the create operation which data streams require.
+        - tee: bool = set to True to log to the Loguru log file and Elasticsearch at the same time,
+                      requires debug to be False. Records are formatted once and queued for each backend,
+                      Elasticsearch documents are sent with bulk requests.
+        - samplingsize: int = maximum number of records held by each tail sampling scope, default is 1000.
+                              Refer to the tail_sampling method.
+        - shutdowntimeout: float = maximum number of seconds to send the queued records when the logger
+                                   is closed, or when the process exits or receives SIGTERM, default is 5.
+                                   Refer to the close method.
     """
 
     def __init__(self, **kwargs) -> None:
@@ -50,24 +140,101 @@ class LoggerInterface(abc.ABC):
         self.version: str = (
             kwargs.get(LoggerKeys.VERSION.value) or StringConfig.VERSION.value
         )
+        self.deduplicator: Optional[LogDeduplicator] = (
+            LogDeduplicator(
+                kwargs[LoggerKeys.DEDUP_WINDOW.value],
+                kwargs.get(LoggerKeys.DEDUP_SIZE.value) or BasicConfig.DEDUP_SIZE.value,
+            )
+            if kwargs.get(LoggerKeys.DEDUP_WINDOW.value)
+            else None
+        )
+        minlevel: str = kwargs.get(LoggerKeys.MIN_LEVEL.value) or LogLevels.DEBUG.value
+        check_log_level(minlevel)
+        self.minlevel: int = LOG_LEVEL_NUMBERS[minlevel.upper()]
+        urgentlevel: str = (
+            kwargs.get(LoggerKeys.URGENT_LEVEL.value) or LogLevels.ERROR.value
+        )
+        check_log_level(urgentlevel)
+        self.urgentlevel: int = LOG_LEVEL_NUMBERS[urgentlevel.upper()]
+        self.instrumentation: Optional[LoggerMetrics] = (
+            LoggerMetrics(type(self).__name__)
+            if kwargs.get(LoggerKeys.METRICS.value)
+            else None
+        )
+        self.queuesize: int = (
+            kwargs.get(LoggerKeys.QUEUE_SIZE.value) or BasicConfig.QUEUE_SIZE.value
+        )
+        self.samplingsize: int = (
+            kwargs.get(LoggerKeys.SAMPLING_SIZE.value)
+            or BasicConfig.SAMPLING_SCOPE_SIZE.value
+        )
+        self.shutdowntimeout: float = (
+            kwargs.get(LoggerKeys.SHUTDOWN_TIMEOUT.value)
+            or BasicConfig.SHUTDOWN_TIMEOUT.value
+        )
+        self.closed: bool = False
+
+        # multiprocess keys
+        self.transport: Optional[CollectorClient] = None
+        self.supervisor: Optional[CollectorSupervisor] = None
+        if kwargs.get(LoggerKeys.MULTIPROCESS.value):
+            address: str = (
+                kwargs.get(LoggerKeys.COLLECTOR.value)
+                or StringConfig.COLLECTOR_ADDRESS.value
+            )
+            process: Any = start_collector(address, kwargs)
+            if process is not None:
+                self.supervisor = CollectorSupervisor(address, kwargs, process)
+            self.transport = (
+                SharedMemoryClient(
+                    address,
+                    kwargs.get(LoggerKeys.RING_SIZE.value)
+                    or BasicConfig.RING_SIZE.value,
+                    self.instrumentation,
+                    kwargs,
+                )
+                if kwargs.get(LoggerKeys.TRANSPORT.value)
+                == Transports.SHARED_MEMORY.value
+                else CollectorClient(
+                    address, self.queuesize, self.instrumentation, kwargs
+                )
+            )
 
         # elasticsearch keys
         self.config: Dict[str, Any] = kwargs
+        self.compressor: Optional[Compressor] = (
+            Compressor(
+                kwargs[LoggerKeys.COMPRESSION.value],
+                kwargs.get(LoggerKeys.COMPRESSION_LEVEL.value),
+                instrumentation=self.instrumentation,
+            )
+            if kwargs.get(LoggerKeys.COMPRESSION.value)
+            else None
+        )
         if not self.debug:
-            self.host: str = kwargs[LoggerKeys.HOST.value]
+            self.host: Union[str, List[str]] = kwargs[LoggerKeys.HOST.value]
             self.index: str = kwargs[LoggerKeys.INDEX.value]
+            self.router: IndexRouter = IndexRouter(self.index, self.appname)
+            self.optype: str = (
+                "create" if kwargs.get(LoggerKeys.DATA_STREAM.value) else "index"
+            )
             self.username: str = kwargs[LoggerKeys.USERNAME.value]
             self.pw: Any = kwargs[LoggerKeys.PW.value]
 
+        lifecycle.register(self)
+        if self.deduplicator is not None:
+            summary_flusher.register(self)
+
     @abc.abstractmethod
     def log(
         self,
         level: str,
-        logdata: Union[str, Dict[str, Any]],
+        logdata: LogData,
         custom_func_name: Optional[str] = None,
         use_custom_logdata: Optional[bool] = None,
         date: Optional[str] = None,
         _reduce_stack_level: Optional[int] = 0,
+        logargs: Optional[Sequence[Any]] = None,
     ) -> None:
         """
         Log data to the appropriate loggers.
@@ -75,10 +242,11 @@ class LoggerInterface(abc.ABC):
         - level: str = accept log level that are declared in the LogLevels class
                      DEBUG, INFO, WARNING, ERROR, CRITICAL, EXCEPTION
 
-        - logdata: Union[str, Dict[str, Any]] = data to be logged
-                                                Dictionary formats will be auto converted into a string
-                                                This will use the default logging format by default.
-                                                Set use_custom_logdata to True to use custom logging format.
+        - logdata: Union[str, Dict[str, Any], Callable] = data to be logged
+                                                          Dictionary formats will be auto converted into a string
+                                                          This will use the default logging format by default.
+                                                          Set use_custom_logdata to True to use custom logging format.
+                                                          A zero-arg callable is only called if the record is logged.
 
         - custom_func_name: Optional[str] = By default, the name of the function that is calling the log function will be used.
                                             If you want to use a custom name, set this to the custom name.
@@ -90,16 +258,20 @@ class LoggerInterface(abc.ABC):
 
         - _reduce_stack_level: int = do not touch this.
                                      Required for auto detecting name of the function that is calling the log function.
+
+        - logargs: Optional[Sequence[Any]] = arguments used to format the logdata template with str.format.
+                                             Callable arguments are only called if the record is logged.
         """
 
     @abc.abstractmethod
     async def async_log(
         self,
         level: str,
-        logdata: Union[str, Dict[str, Any]],
+        logdata: LogData,
         custom_func_name: Optional[str] = None,
         use_custom_logdata: Optional[bool] = None,
         date: Optional[str] = None,
+        logargs: Optional[Sequence[Any]] = None,
     ) -> None:
         """
         Async log data to the appropriate loggers.
@@ -107,10 +279,11 @@ class LoggerInterface(abc.ABC):
         - level: str = accept log level that are declared in the LogLevels class
                      DEBUG, INFO, WARNING, ERROR, CRITICAL, EXCEPTION
 
-        - logdata: Union[str, Dict[str, Any]] = data to be logged
-                                                Dictionary formats will be auto converted into a string
-                                                This will use the default logging format by default.
-                                                Set use_custom_logdata to True to use custom logging format.
+        - logdata: Union[str, Dict[str, Any], Callable] = data to be logged
+                                                          Dictionary formats will be auto converted into a string
+                                                          This will use the default logging format by default.
+                                                          Set use_custom_logdata to True to use custom logging format.
+                                                          A zero-arg callable is only called if the record is logged.
 
         - custom_func_name: Optional[str] = By default, the name of the function that is calling the log function will be used.
                                             If you want to use a custom name, set this to the custom name.
@@ -120,11 +293,70 @@ class LoggerInterface(abc.ABC):
                                                All data will be auto converted into a string data format.
 
         - date: str = date is auto set. Use this to override the auto date and time format.
+
+        - logargs: Optional[Sequence[Any]] = arguments used to format the logdata template with str.format.
+                                             Callable arguments are only called if the record is logged.
+        """
+
+    @abc.abstractmethod
+    def log_many(
+        self,
+        records: Iterable[Sequence[Any]],
+        _reduce_stack_level: Optional[int] = 0,
+    ) -> None:
+        """
+        Log a batch of records to the appropriate loggers.
+        Elasticsearch sends the whole batch with a single bulk request.
+
+        - records: Iterable[Sequence[Any]] = each record holds the log arguments
+                                             (level, logdata, custom_func_name, use_custom_logdata, date, logargs).
+                                             Only level and logdata are required, refer to the log method.
+                                             Log levels are validated, and the date and the name of the function
+                                             calling the log function are resolved once per batch.
+
+        - _reduce_stack_level: int = do not touch this.
+                                     Required for auto detecting name of the function that is calling the log function.
+        """
+
+    @abc.abstractmethod
+    async def async_log_many(
+        self,
+        records: Iterable[Sequence[Any]],
+        _reduce_stack_level: Optional[int] = 0,
+    ) -> None:
+        """
+        Async log a batch of records to the appropriate loggers.
+        AsyncElasticsearch sends the whole batch with a single bulk request.
+
+        - records: Iterable[Sequence[Any]] = each record holds the log arguments
+                                             (level, logdata, custom_func_name, use_custom_logdata, date, logargs).
+                                             Only level and logdata are required, refer to the async_log method.
+
+        - _reduce_stack_level: int = do not touch this.
+                                     Required for auto detecting name of the function that is calling the log function.
+        """
+
+    @abc.abstractmethod
+    def _ship(self, level: str, document: str) -> Any:
+        """
+        Ship a formatted document, e.g. write it to loguru, queue it or send it to Elasticsearch,
+        or send it to the collector. Called for the records, the deduplication summaries
+        and the records released by tail sampling.
+        The AsyncElk logger returns a coroutine to await.
+
+        - level: str = upper case log level of the document.
+
+        - document: str = formatted log document.
         """
 
     @abc.abstractmethod
     def query(
-        self, custompayload: Optional[Dict[str, Any]], size: int, cache: bool
+        self,
+        custompayload: Optional[Dict[str, Any]],
+        size: int,
+        cache: bool,
+        start: Optional[str],
+        end: Optional[str],
     ) -> Any:
         """
         Make query to Elasticsearch.
@@ -137,11 +369,22 @@ class LoggerInterface(abc.ABC):
 
         - cache: bool = set to True to cache the query.
                         If not set, will use the default True value.
+
+        - start: str = iso formatted start of the time range of the default payload.
+                       Only the indices overlapping the time range are searched
+                       if the index is a template with a date field.
+
+        - end: str = iso formatted end of the time range, default is now.
         """
 
     @abc.abstractmethod
     async def async_query(
-        self, custompayload: Optional[Dict[str, Any]], size: int, cache: bool
+        self,
+        custompayload: Optional[Dict[str, Any]],
+        size: int,
+        cache: bool,
+        start: Optional[str],
+        end: Optional[str],
     ) -> Any:
         """
         Make query to AsyncElasticsearch.
@@ -155,7 +398,163 @@ class LoggerInterface(abc.ABC):
 
         - cache: bool = set to True to cache the query.
                         If not set, will use the default True value.
+
+        - start: str = iso formatted start of the time range of the default payload.
+                       Only the indices overlapping the time range are searched
+                       if the index is a template with a date field.
+
+        - end: str = iso formatted end of the time range, default is now.
+        """
+
+    @abc.abstractmethod
+    def ensure_index_template(
+        self, shards: int, replicas: int, refreshinterval: str
+    ) -> bool:
+        """
+        Install the index template mapping the log documents fields of the index,
+        once per process. Return True if the template was installed by this call.
+        The query methods filter on the app_name keyword field once the template is installed.
+        The template only applies to the indices created after it was installed.
+
+        - shards: int = number of primary shards of each index, default is 1.
+
+        - replicas: int = number of replicas of each primary shard, default is 1.
+
+        - refreshinterval: str = how often new documents become searchable, default is 5s.
+        """
+
+    @abc.abstractmethod
+    async def async_ensure_index_template(
+        self, shards: int, replicas: int, refreshinterval: str
+    ) -> bool:
+        """
+        Async install the index template mapping the log documents fields of the index,
+        once per process. Return True if the template was installed by this call.
+        The query methods filter on the app_name keyword field once the template is installed.
+        The template only applies to the indices created after it was installed.
+
+        - shards: int = number of primary shards of each index, default is 1.
+
+        - replicas: int = number of replicas of each primary shard, default is 1.
+
+        - refreshinterval: str = how often new documents become searchable, default is 5s.
+        """
+
+    def bind(self, **fields: Any) -> Token:
+        """
+        Bind fields, e.g. request_id, user_id or trace_id, to the current context,
+        the current asyncio task or thread, and merge them into every log record
+        of every logger in that context, except the records with a custom logdata format.
+        Return a token to restore the previously bound fields with 'unbind'.
+
+        The fields are serialized once when bound.
+        """
+        return bind_context(**fields)
+
+    def unbind(self, token: Token) -> None:
+        """Restore the fields bound before 'bind' returned the token"""
+        reset_context(token)
+
+    def contextualize(self, **fields: Any) -> ContextManager[None]:
+        """Bind fields to the current context within a with block"""
+        return contextualize(**fields)
+
+    def tail_sampling(self, size: Optional[int] = None) -> SamplingScope:
+        """
+        Return a tail sampling scope, e.g. of a request, used with a with or async with block.
+        DEBUG and INFO records of every logger are held in the scope, and only shipped
+        if an ERROR, EXCEPTION or CRITICAL record is logged in the scope, they are dropped otherwise.
+        Use async with if the scope logs with an AsyncElk logger, a with block ships its records
+        on the event loop of its latest log call, or raises RuntimeError once that loop was closed.
+
+        - size: int = maximum number of records held by the scope, the oldest records are dropped first.
+                      Default is the samplingsize of the logger.
+        """
+        return SamplingScope(size or self.samplingsize)
+
+    def close(self, timeout: Optional[float] = None) -> int:
+        """
+        Ship the pending deduplication summaries, send the queued records and close the clients.
+        Return the number of records left unsent, which are also reported with a warning.
+        The logger must not be used once closed, closing it again returns 0.
+        Loggers that are not closed are closed when the process exits or receives SIGTERM.
+
+        - timeout: float = maximum number of seconds to wait for the queued records,
+                           default is the shutdowntimeout of the logger.
+        """
+        if self.closed:
+            return 0
+        self.closed = True
+        lifecycle.unregister(self)
+        summary_flusher.unregister(self)
+        registry.discard(self)
+
+        deadline: float = time.monotonic() + (
+            self.shutdowntimeout if timeout is None else timeout
+        )
+        for level, summary in format_coalesced_log_data(self, True):
+            self._ship(level, summary)
+        unsent: int = 0
+        for queue in (
+            getattr(self, "shipper", None),
+            getattr(self, "writer", None),
+            *getattr(self, "shippers", {}).values(),
+        ):
+            if queue is not None:
+                queue.close(max(deadline - time.monotonic(), 0))
+                unsent += queue.unsent()
+        if self.transport is not None:
+            unsent += self.transport.close()
+        self._close_clients()
+        return report_unsent(self, unsent)
+
+    def _ship_summaries(self) -> None:
+        """Ship the summaries of the closed deduplication windows, called by the summary flusher thread"""
+        for level, summary in format_coalesced_log_data(self):
+            self._ship(level, summary)
+
+    async def aclose(self, timeout: Optional[float] = None) -> int:
+        """Close the logger in the default executor without blocking the event loop, refer to close"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.close, timeout
+        )
+
+    def _close_clients(self) -> None:
+        """Close the clients of the logger once its queued records were sent"""
+
+    def __enter__(self) -> "LoggerInterface":
+        """Use the logger within a with block, it is closed when the block exits"""
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        """Close the logger"""
+        self.close()
+
+    async def __aenter__(self) -> "LoggerInterface":
+        """Use the logger within an async with block, it is closed when the block exits"""
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        """Close the logger without blocking the event loop"""
+        await self.aclose()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the logger metrics.
+        Empty if the logger was not initialized with metrics set to True.
+        """
+        if self.instrumentation is None:
+            return {}
+        return self.instrumentation.snapshot()
+
+    def prometheus_metrics(self) -> str:
+        """
+        Return the logger metrics in the Prometheus text exposition format.
+        Empty if the logger was not initialized with metrics set to True.
         """
+        if self.instrumentation is None:
+            return ""
+        return self.instrumentation.to_prometheus()
 
     def sql_query(self, query: str, **kwargs) -> DataFrame:
         """
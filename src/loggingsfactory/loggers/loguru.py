@@ -1,17 +1,73 @@
 """Loguru library wrapper"""
-from typing import Any, Dict, Optional, Union
+import asyncio
+import os
+import threading
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 import loguru
 
+from ..helpers.callsites import get_callsite
+from ..helpers.shipper import BulkShipper
 from ..helpers.singletons import logcounter
-from ..constants.config import LogLevels
+from ..constants.config import BasicConfig, LogLevels
+from ..constants.keys import LoggerKeys
 from ..helpers.formats import (
+    LogData,
+    check_log_level,
+    format_coalesced_log_data,
     format_log_data,
-    check_log_level_type,
-    check_log_level_value,
+    format_log_many,
 )
 from ..loggers.interface import LoggerInterface
 
 
+class FileSinks:
+    """
+    Loguru file sinks shared by the loggers writing to the same file, e.g. a Loguru logger
+    and the Loguru backend of a Tee, so that each record is written once.
+    A sink is removed once every logger using it was closed.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize file sinks
+
+        - self.sinks: Dict[str, List[int]] = loguru handler id and number of loggers of each absolute file path.
+        """
+        self.sinks: Dict[str, List[int]] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def acquire(self, path: str) -> str:
+        """Add the file sink unless another logger added it, return its absolute path"""
+        path = os.path.abspath(path)
+        with self.lock:
+            sink: Optional[List[int]] = self.sinks.get(path)
+            if sink is None:
+                self.sinks[path] = [loguru.logger.add(path), 1]
+            else:
+                sink[1] += 1
+        return path
+
+    def release(self, path: str) -> None:
+        """Remove the file sink once no logger uses it"""
+        with self.lock:
+            sink: Optional[List[int]] = self.sinks.get(path)
+            if sink is None:
+                return
+            sink[1] -= 1
+            if sink[1]:
+                return
+            del self.sinks[path]
+            try:
+                loguru.logger.remove(sink[0])
+            except ValueError:
+                # already removed, e.g. with loguru.logger.remove()
+                pass
+
+
+filesinks: FileSinks = FileSinks()
+
+
 class Loguru(LoggerInterface):
     """
     Loguru library wrapper that inherits the LoggerInterface self variables and methods.
@@ -23,6 +79,12 @@ class Loguru(LoggerInterface):
     - self.logger.add("logs/logfile.log") = this auto creates the log folder and logfile.log inside it.
                                             auto creation happens when the logger is initialized,
                                             or when unit tests are run.
+                                            The loggers writing to the same file share its sink.
+
+    - self.writer: BulkShipper = writes the records of async_log and async_log_many
+                                 from a background thread, only used if useasync is set to True.
+                                 The records are formatted on the event loop,
+                                 and written in batches of the records queued meanwhile.
     """
 
     def __init__(self, **kwargs) -> None:
@@ -30,22 +92,40 @@ class Loguru(LoggerInterface):
         super().__init__(**kwargs)
 
         self.logger: loguru.Logger = loguru.logger
-        self.logger.add("logs/logfile.log")
+        # the workers of a multiprocess logger leave the log file to the collector
+        self.logfile: Optional[str] = (
+            None
+            if self.transport is not None
+            else filesinks.acquire("logs/logfile.log")
+        )
+        self.writer: Optional[BulkShipper] = (
+            BulkShipper(
+                self._write_batch,
+                BasicConfig.BATCH_SIZE.value,
+                0,
+                self.queuesize,
+                self.instrumentation,
+            )
+            if kwargs.get(LoggerKeys.ASYNC.value)
+            else None
+        )
 
     def log(
         self,
         level: str,
-        logdata: Union[str, Dict[str, Any]],
+        logdata: LogData,
         custom_func_name: Optional[str] = "",
         use_custom_logdata: Optional[bool] = False,
         date: Optional[str] = None,
         _reduce_stack_level: Optional[int] = 0,
+        logargs: Optional[Sequence[Any]] = None,
     ) -> None:
         """Override inherited method from LoggerInterface"""
-        check_log_level_type(level)
+        check_log_level(level)
 
         _level: str = level.upper()
-        data: str = format_log_data(
+        started: float = perf_counter()
+        data: Optional[str] = format_log_data(
             self,
             _level,
             logdata,
@@ -53,35 +133,174 @@ class Loguru(LoggerInterface):
             use_custom_logdata,
             date,
             _reduce_stack_level,
+            logargs=logargs,
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        if data is not None:
+            self._ship(_level, data)
+        for summary_level, summary in format_coalesced_log_data(self):
+            self._ship(summary_level, summary)
+
+        self._count()
+
+    def log_many(
+        self,
+        records: Iterable[Sequence[Any]],
+        _reduce_stack_level: Optional[int] = 0,
+    ) -> None:
+        """
+        Override inherited method from LoggerInterface
+
+        The records are formatted and their write metrics recorded per batch,
+        each record is written with its own loguru message.
+        """
+        started: float = perf_counter()
+        documents: List[Tuple[str, str]] = format_log_many(
+            self, records, _reduce_stack_level
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        self._ship_many(documents)
+        self._count(len(documents))
+
+    async def async_log_many(
+        self,
+        records: Iterable[Sequence[Any]],
+        _reduce_stack_level: Optional[int] = 0,
+    ) -> None:
+        """Override inherited method from LoggerInterface"""
+        if self.writer is None:
+            self.log_many(records, 1 + _reduce_stack_level)
+            return
+
+        functionname: str = get_callsite(1 + _reduce_stack_level).name
+        started: float = perf_counter()
+        documents: List[Tuple[str, str]] = format_log_many(
+            self, records, functionname=functionname
         )
-        if _level == LogLevels.INFO.value:
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        for level, document in documents:
+            self.writer.put(level, document)
+
+    async def complete(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the background writer wrote every queued record,
+        without blocking the event loop. Return False on timeout.
+        """
+        if self.writer is None:
+            return True
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.writer.flush, timeout
+        )
+
+    def _ship(self, level: str, data: str) -> None:
+        """Send formatted log data to the collector, or write it to loguru"""
+        if self.transport is not None:
+            self.transport.send(level, data)
+        else:
+            self._write(level, data)
+
+    def _ship_many(self, documents: List[Tuple[str, str]]) -> None:
+        """
+        Send formatted records to the collector, or write them to loguru
+        with one message per record, recording the write metrics of the batch
+        """
+        if self.transport is not None:
+            for level, document in documents:
+                self.transport.send(level, document)
+            return
+        if self.instrumentation is None:
+            for level, document in documents:
+                self._write_level(level, document)
+            return
+
+        started: float = perf_counter()
+        size: int = 0
+        for level, document in documents:
+            self._write_level(level, document)
+            size += len(document)
+        self.instrumentation.record_ship(started, len(documents), size)
+
+    def _write_batch(self, batch: List[Tuple[str, str]]) -> None:
+        """Write a batch of the background writer"""
+        self._ship_many(batch)
+        self._count(len(batch))
+
+    def _count(self, documents: int = 1) -> None:
+        """Count the logged records, and write the total unless the collector writes the log file"""
+        logcounter.increment(documents)
+        if self.transport is None:
+            self.logger.info(f"Total logs count: {logcounter.counter}")
+
+    def _write(self, level: str, data: str) -> None:
+        """Write formatted log data to loguru and record the write metrics"""
+        if self.instrumentation is None:
+            self._write_level(level, data)
+            return
+
+        started: float = perf_counter()
+        self._write_level(level, data)
+        self.instrumentation.record_ship(started, 1, len(data))
+
+    def _write_level(self, level: str, data: str) -> None:
+        """Write formatted log data to loguru with the matching log level"""
+        if level == LogLevels.INFO.value:
             self.logger.info(data)
-        elif _level == LogLevels.DEBUG.value:
+        elif level == LogLevels.DEBUG.value:
             self.logger.debug(data)
-        elif _level == LogLevels.WARNING.value:
+        elif level == LogLevels.WARNING.value:
             self.logger.warning(data)
-        elif _level == LogLevels.ERROR.value:
+        elif level == LogLevels.ERROR.value:
             self.logger.error(data)
-        elif _level == LogLevels.CRITICAL.value:
+        elif level == LogLevels.CRITICAL.value:
             self.logger.critical(data)
-        elif _level == LogLevels.EXCEPTION.value:
+        elif level == LogLevels.EXCEPTION.value:
             self.logger.exception(data)
-        else:
-            check_log_level_value(level)
-
-        logcounter.increment()
-        self.logger.info(f"Total logs count: {logcounter.counter}")
 
     async def async_log(
         self,
         level: str,
-        logdata: Union[str, Dict[str, Any]],
+        logdata: LogData,
         custom_func_name: Optional[str] = "",
         use_custom_logdata: Optional[bool] = False,
         date: Optional[str] = None,
+        logargs: Optional[Sequence[Any]] = None,
     ) -> None:
         """Override inherited method from LoggerInterface"""
-        self.log(level, logdata, custom_func_name, use_custom_logdata, date, 1)
+        if self.writer is None:
+            self.log(
+                level, logdata, custom_func_name, use_custom_logdata, date, 1, logargs
+            )
+            return
+
+        check_log_level(level)
+
+        _level: str = level.upper()
+        functionname: str = custom_func_name or get_callsite(1).name
+        started: float = perf_counter()
+        data: Optional[str] = format_log_data(
+            self,
+            _level,
+            logdata,
+            functionname,
+            use_custom_logdata,
+            date,
+            0,
+            logargs=logargs,
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        if data is not None:
+            self.writer.put(_level, data)
+        for summary_level, summary in format_coalesced_log_data(self):
+            self.writer.put(summary_level, summary)
+
+    def _close_clients(self) -> None:
+        """Remove the file sink once no other logger uses it"""
+        if self.logfile is not None:
+            filesinks.release(self.logfile)
 
     def query(self, *args, **kwargs) -> None:
         """Not used"""
@@ -89,5 +308,11 @@ class Loguru(LoggerInterface):
     async def async_query(self, *args, **kwargs) -> None:
         """Not used"""
 
+    def ensure_index_template(self, *args, **kwargs) -> None:
+        """Not used"""
+
+    async def async_ensure_index_template(self, *args, **kwargs) -> None:
+        """Not used"""
+
     def sql_query(self, *args, **kwargs) -> None:
         """Not used"""
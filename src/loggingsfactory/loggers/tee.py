@@ -0,0 +1,203 @@
+"""Composite logger shipping every record to the Loguru and Elasticsearch loggers"""
+import asyncio
+from functools import partial
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from ..constants.config import BasicConfig
+from ..constants.keys import LoggerKeys
+from ..helpers.formats import (
+    LogData,
+    check_log_level,
+    format_coalesced_log_data,
+    format_log_data,
+    format_log_many,
+)
+from ..helpers.lifecycle import lifecycle
+from ..helpers.shipper import BulkShipper, PriorityShipper
+from ..loggers.elk import Elk
+from ..loggers.interface import LoggerInterface
+from ..loggers.loguru import Loguru
+
+
+class Tee(LoggerInterface):
+    """
+    Composite logger that inherits the LoggerInterface self variables and methods.
+
+    Records are filtered and formatted once, and the formatted documents are queued
+    for each backend: the Loguru log file, and the Elasticsearch index with bulk requests.
+    Each backend has its own queue and background thread, fed by per-thread buffers
+    handed off in chunks, or within 'flushinterval' seconds. A slow or failing backend
+    drops its own documents once its queue is full, without slowing the other backend.
+
+    The log methods only queue the documents, so the async log methods never block the event loop.
+
+    - self.backends: Dict[str, LoggerInterface] = the Loguru and Elk loggers, keyed by loguru and elk.
+                                                  Their filters are disabled, records are filtered by the tee.
+    - self.shippers: Dict[str, Union[BulkShipper, PriorityShipper]] = queue and thread of each backend,
+                                                                     keyed like the backends. Elasticsearch documents
+                                                                     of the urgent level are sent as soon as they are queued.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """Initialize LoggerInterface, self variables and the backends."""
+        super().__init__(**kwargs)
+
+        config: Dict[str, Any] = {
+            **kwargs,
+            LoggerKeys.ASYNC.value: False,
+            LoggerKeys.BUFFERED.value: False,
+            LoggerKeys.MULTIPROCESS.value: False,
+            LoggerKeys.DEDUP_WINDOW.value: None,
+            LoggerKeys.MIN_LEVEL.value: None,
+        }
+        loguru: Loguru = Loguru(**{**config, LoggerKeys.DEBUG.value: True})
+        elk: Elk = Elk(**config)
+        self.backends: Dict[str, LoggerInterface] = {"loguru": loguru, "elk": elk}
+        # the backends are closed by the tee once their queued documents were sent
+        lifecycle.unregister(loguru)
+        lifecycle.unregister(elk)
+        flushinterval: float = (
+            kwargs.get(LoggerKeys.FLUSH_INTERVAL.value)
+            or BasicConfig.FLUSH_INTERVAL.value
+        )
+        # pylint: disable=protected-access
+        self.shippers: Dict[str, Union[BulkShipper, PriorityShipper]] = {
+            "loguru": BulkShipper(
+                loguru._write_batch,
+                BasicConfig.BATCH_SIZE.value,
+                flushinterval,
+                self.queuesize,
+                loguru.instrumentation,
+                chunksize=BasicConfig.CHUNK_SIZE.value,
+            ),
+            "elk": PriorityShipper(
+                elk._bulk,
+                kwargs.get(LoggerKeys.BATCH_SIZE.value) or BasicConfig.BATCH_SIZE.value,
+                flushinterval,
+                self.queuesize,
+                elk.instrumentation,
+                self.urgentlevel,
+                maxinflight=kwargs.get(LoggerKeys.MAX_IN_FLIGHT.value)
+                or BasicConfig.MAX_IN_FLIGHT.value,
+                targetlatency=kwargs.get(LoggerKeys.TARGET_LATENCY.value)
+                or BasicConfig.TARGET_LATENCY.value,
+            ),
+        }
+
+    def log(
+        self,
+        level: str,
+        logdata: LogData,
+        custom_func_name: Optional[str] = "",
+        use_custom_logdata: Optional[bool] = False,
+        date: Optional[str] = None,
+        _reduce_stack_level: Optional[int] = 0,
+        logargs: Optional[Sequence[Any]] = None,
+    ) -> None:
+        """Override inherited method from LoggerInterface"""
+        check_log_level(level)
+
+        started: float = perf_counter()
+        document: Optional[str] = format_log_data(
+            self,
+            level.upper(),
+            logdata,
+            custom_func_name,
+            use_custom_logdata,
+            date,
+            _reduce_stack_level,
+            logargs=logargs,
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        if document is not None:
+            self._ship(level.upper(), document)
+        for summary_level, summary in format_coalesced_log_data(self):
+            self._ship(summary_level, summary)
+
+    async def async_log(
+        self,
+        level: str,
+        logdata: LogData,
+        custom_func_name: Optional[str] = "",
+        use_custom_logdata: Optional[bool] = False,
+        date: Optional[str] = None,
+        logargs: Optional[Sequence[Any]] = None,
+    ) -> None:
+        """Override inherited method from LoggerInterface"""
+        self.log(level, logdata, custom_func_name, use_custom_logdata, date, 1, logargs)
+
+    def log_many(
+        self,
+        records: Iterable[Sequence[Any]],
+        _reduce_stack_level: Optional[int] = 0,
+    ) -> None:
+        """Override inherited method from LoggerInterface"""
+        started: float = perf_counter()
+        documents: List[Tuple[str, str]] = format_log_many(
+            self, records, _reduce_stack_level
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record_format(started)
+        for level, document in documents:
+            self._ship(level, document)
+
+    async def async_log_many(
+        self,
+        records: Iterable[Sequence[Any]],
+        _reduce_stack_level: Optional[int] = 0,
+    ) -> None:
+        """Override inherited method from LoggerInterface"""
+        self.log_many(records, 1 + _reduce_stack_level)
+
+    def _ship(self, level: str, document: str) -> None:
+        """Send a document to the collector, or queue it for every backend"""
+        if self.transport is not None:
+            self.transport.send(level, document)
+            return
+        for shipper in self.shippers.values():
+            shipper.put(level, document)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every backend shipped its queued documents, return False on timeout"""
+        return all(shipper.flush(timeout) for shipper in self.shippers.values())
+
+    def query(self, *args, **kwargs) -> Any:
+        """Make query to Elasticsearch, refer to Elk.query"""
+        return self.backends["elk"].query(*args, **kwargs)
+
+    async def async_query(self, *args, **kwargs) -> Any:
+        """Make query to Elasticsearch in the default executor, refer to Elk.query"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, partial(self.backends["elk"].query, *args, **kwargs)
+        )
+
+    def ensure_index_template(self, *args, **kwargs) -> bool:
+        """Install the index template, refer to Elk.ensure_index_template"""
+        return self.backends["elk"].ensure_index_template(*args, **kwargs)
+
+    async def async_ensure_index_template(self, *args, **kwargs) -> bool:
+        """Install the index template in the default executor, refer to Elk.ensure_index_template"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, partial(self.backends["elk"].ensure_index_template, *args, **kwargs)
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the tee metrics, with the metrics of each backend under 'backends'.
+        Empty if the logger was not initialized with metrics set to True.
+        """
+        if self.instrumentation is None:
+            return {}
+        return {
+            **self.instrumentation.snapshot(),
+            "backends": {
+                name: backend.metrics() for name, backend in self.backends.items()
+            },
+        }
+
+    def _close_clients(self) -> None:
+        """Close the backends once their queued documents were sent"""
+        for backend in self.backends.values():
+            backend.close(0)
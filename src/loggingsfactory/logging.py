@@ -1,10 +1,14 @@
 """Logging Factory class that generates Loguru, Elasticsearch, or AsyncElasticsearch class"""
-from typing import Union
+from collections.abc import Mapping
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
 
 from .constants.keys import LoggerKeys
+from .helpers.lifecycle import close_loggers
+from .helpers.registry import registry
 from .loggers.elk import Elk
 from .loggers.asyncelk import AsyncElk
 from .loggers.loguru import Loguru
+from .loggers.tee import Tee
 
 
 class Loggers(Loguru):
@@ -14,6 +18,9 @@ class Loggers(Loguru):
     Methods must follow the interface format.
     Please refer to the interface class for available methods.
 
+    Identical configurations return the same logger while it is in use,
+    so constructing the loggers in request handlers does not create new clients and sinks.
+
     Basic required keys for all logger types:
         - appname: str = name of app (e.g.: samapi, argapi, etc.)
         - debug: bool = set to True by default.
@@ -21,23 +28,129 @@ class Loggers(Loguru):
         - useasync: bool = set to False by default.
                            If set to True, will use the AsyncElk logger.
                            However, debug must be False to use this.
+                           With debug set to True, the Loguru logger writes the records
+                           of async_log and async_log_many from a background thread.
 
     Elasticsearch and AsyncElasticsearch required keys:
         - host: str = hostname of the ELK server
                       supports https://elasticsearch.com:9201, https://elasticsearch.com, elasticsearch.com
+                      a list or a comma separated string of hostnames balances the requests across the nodes
         - index: str = index name of the ELK server
+                       may be a template with {appname} and {date:<strftime format>} fields,
+                       e.g. logs-{appname}-{date:%Y.%m.%d} writes to one index per UTC day
         - username: str = username of the ELK server
         - pw: str = pw of the ELK server
         - port: int = port of the ELK server, default is 9201
 
     Optional keys:
         - version: str = log version, default is 1.0
+        - dedupwindow: float = collapse identical (level, functional_name, log) records
+                               logged within this number of seconds of the first record into one document
+                               with count, first_seen and last_seen, shipped once the window closes
+                               by a background thread. Disabled by default.
+        - dedupsize: int = maximum number of distinct records tracked for deduplication,
+                           default is 1024.
+        - minlevel: str = records below this log level are dropped before being evaluated
+                          or formatted, default is DEBUG.
+        - metrics: bool = set to True to record latency histograms and throughput metrics,
+                          available with the metrics and prometheus_metrics methods.
+        - buffered: bool = Elasticsearch only, set to True to queue the documents
+                           and send them with bulk requests from a background thread.
+        - batchsize: int = maximum number of documents per bulk request, default is 500.
+                           Buffered bulk requests shrink when Elasticsearch rejects them or is slow,
+                           and grow back up to batchsize, only the rejected items are retried.
+        - maxinflight: int = maximum number of buffered bulk requests in flight, default is 4.
+        - targetlatency: float = number of seconds above which a bulk request is considered slow, default is 1.
+        - flushinterval: float = maximum number of seconds a document is queued for, default is 1.
+                                 Documents are buffered by their thread and handed off to the queue
+                                 in chunks, or after flushinterval, so they may wait twice as long.
+        - queuesize: int = maximum number of queued documents, default is 10000.
+                           DEBUG and INFO documents are dropped once the queue is 80% full.
+        - urgentlevel: str = buffered Elasticsearch documents of this log level or above bypass the batching,
+                             and are sent as soon as they are queued by a lane of their own, default is ERROR.
+        - multiprocess: bool = set to True to send the formatted records to a single collector process,
+                               which owns the log file sink or the Elasticsearch bulk shipper.
+                               The collector is started by the first logger, and restarted if it exits.
+        - collector: str = Unix socket address of the collector, default is logs/collector.sock.
+        - transport: str = socket or sharedmemory, default is socket.
+                           With sharedmemory, each worker process writes its records to a shared memory
+                           ring buffer read by the collector, instead of sending them over the socket.
+        - ringsize: int = number of bytes of the ring buffer of each worker process, default is 4 MiB.
+        - compression: str = Elasticsearch only, gzip or zstd, compress the request bodies
+                             of at least 1 KiB. zstd requires the zstandard package.
+        - compressionlevel: int = compression level, default is 6 for gzip and 3 for zstd.
+        - maxsize: int = Elasticsearch only, maximum number of connections kept alive
+                         per node, size it to the number of logging threads, default is 25.
+        - timeout: float = timeout of each request in seconds, default is 30.
+        - keepalive: bool = set to False to close the connection after each request, default is True.
+        - sniff: bool = discover the cluster nodes on start and when a connection fails.
+        - sniffinterval: float = number of seconds between the cluster node discoveries if sniff is set.
+        - selector: str = strategy selecting the node of each request, default is roundrobin.
+                          roundrobin, random, latency: lowest latency moving average
+                          weighted by the outstanding requests, leastoutstanding: fewest outstanding requests.
+        - deadtimeout: float = number of seconds a failed node is quarantined for,
+                               doubled on each consecutive failure, default is 60.
+        - datastream: bool = set to True if the index is a data stream, documents are created
+                             with the create operation which data streams require.
+        - tee: bool = set to True to log to the Loguru log file and Elasticsearch at the same time,
+                      requires debug to be False. Records are formatted once and queued for each backend,
+                      Elasticsearch documents are sent with bulk requests.
+        - samplingsize: int = maximum number of records held by each tail sampling scope, default is 1000.
+                              Refer to the tail_sampling method.
+        - shutdowntimeout: float = maximum number of seconds to send the queued records when the logger
+                                   is closed, or when the process exits or receives SIGTERM, default is 5.
+                                   Refer to the close method.
     """
 
-    def __new__(cls, **kwargs) -> Union[Loguru, Elk, AsyncElk]:
+    def __new__(cls, **kwargs) -> Union[Loguru, Elk, AsyncElk, Tee]:
+        """
+        Return the logger of an identical configuration until it is closed,
+        or create a new logger.
+        Configurations with values that cannot be hashed always create a new logger.
+        """
+        try:
+            key: Optional[Hashable] = config_key(kwargs)
+        except TypeError:
+            return cls.create(**kwargs)
+
+        with registry.lock:
+            logger: Optional[Union[Loguru, Elk, AsyncElk, Tee]] = registry.loggers.get(
+                key
+            )
+            if logger is None or logger.closed:
+                logger = registry.loggers[key] = cls.create(**kwargs)
+        return logger
+
+    @classmethod
+    def get(cls, **kwargs) -> Optional[Union[Loguru, Elk, AsyncElk, Tee]]:
+        """Return the logger of an identical configuration until it is closed, else None"""
+        try:
+            return registry.get(config_key(kwargs))
+        except TypeError:
+            return None
+
+    @classmethod
+    def shutdown_all(cls, timeout: Optional[float] = None) -> int:
         """
-        Depending on the debug and useasync key value pairs,
-        will return a Loguru, Elk, or AsyncElk class.
+        Close every logger in use within a shared deadline, refer to the close method.
+        Return the number of records left unsent.
+        AsyncElk loggers must be closed with aclose by the event loop using them,
+        or are closed when the process exits.
+
+        - timeout: float = maximum number of seconds to wait for the queued records of every logger,
+                           default is the largest shutdowntimeout of the loggers.
+        """
+        loggers: List[Union[Loguru, Elk, AsyncElk, Tee]] = registry.clear()
+        return close_loggers(
+            [logger for logger in loggers if not isinstance(logger, AsyncElk)],
+            timeout,
+        )
+
+    @staticmethod
+    def create(**kwargs) -> Union[Loguru, Elk, AsyncElk, Tee]:
+        """
+        Depending on the debug, tee and useasync key value pairs,
+        will return a Loguru, Tee, Elk, or AsyncElk class.
 
         - debug: bool = set to True by default and will use Loguru logger.
                         If set to False, will use the ELK or AsyncElk logger.
@@ -45,6 +158,10 @@ class Loggers(Loguru):
         - useasync: bool = set to False by default and will use Elk logger.
                            If set to True, will use the AsyncElk logger.
                            Requires debug to be False.
+
+        - tee: bool = set to False by default.
+                      If set to True, will use the Tee logger, logging to both Loguru and Elk.
+                      Requires debug to be False.
         """
         debug: bool = (
             True
@@ -54,7 +171,32 @@ class Loggers(Loguru):
         if debug:
             return Loguru(**kwargs)
 
+        if kwargs.get(LoggerKeys.TEE.value):
+            return Tee(**kwargs)
+
         if kwargs.get(LoggerKeys.ASYNC.value):
             return AsyncElk(**kwargs)
 
         return Elk(**kwargs)
+
+
+def _freeze(value: Any) -> Hashable:
+    """Return a hashable copy of a configuration value, raise TypeError if it cannot be hashed"""
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    hash(value)
+    return value
+
+
+def config_key(config: Dict[str, Any]) -> Tuple[Tuple[str, Hashable], ...]:
+    """
+    Return the registry key of a logger configuration,
+    unset keys and keys set to None are equivalent, debug is set to True by default.
+    """
+    normalized: Dict[str, Any] = {
+        key: value for key, value in config.items() if value is not None
+    }
+    normalized.setdefault(LoggerKeys.DEBUG.value, True)
+    return tuple(sorted((key, _freeze(value)) for key, value in normalized.items()))
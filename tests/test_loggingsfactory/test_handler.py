@@ -0,0 +1,137 @@
+import asyncio
+import json
+import logging
+import threading
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+from src.loggingsfactory.handler import LoggersHandler
+from src.loggingsfactory.loggers.asyncelk import AsyncElk
+from src.loggingsfactory.loggers.elk import Elk
+from src.loggingsfactory.loggers.loguru import Loguru
+
+CONFIG = {
+    "appname": "abc",
+    "debug": False,
+    "host": "https://localhost.com:9201",
+    "index": "appindex",
+    "username": "user",
+    "pw": "pw",
+}
+
+
+def stdlib_logger(name, handler):
+    stdlib = logging.getLogger(name)
+    stdlib.handlers = [handler]
+    stdlib.setLevel(1)
+    stdlib.propagate = False
+    return stdlib
+
+
+def test_handler_loguru(caplog):
+    loguru = Loguru(appname="abc")
+    stdlib = stdlib_logger("test.handler.loguru", LoggersHandler(loguru))
+    stdlib.warning("test %s", 123)
+    record = caplog.records[-1]
+    document, _ = json.JSONDecoder().raw_decode(record.getMessage())
+    assert record.levelname == "WARNING"
+    assert document["log"] == "test 123"
+    assert document["functional_name"] == "test_handler_loguru"
+
+
+def test_handler_elk_record_fields(mocker):
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+    elk = Elk(**CONFIG, buffered=True, flushinterval=0.001)
+    stdlib = stdlib_logger("test.handler.elk", LoggersHandler(elk))
+    record = stdlib.makeRecord(
+        "test.handler.elk", 25, "file.py", 1, "test %s", (456,), None, func="handle"
+    )
+    record.created = 0.5
+    stdlib.handle(record)
+    stdlib.log(5, "test789")
+    assert elk.shipper.flush(5)
+    body = "".join(call.kwargs["body"] for call in bulk.call_args_list).splitlines()
+    document = json.loads(body[1])
+    assert document["functional_name"] == "handle"
+    assert document["logger_level"] == "INFO"
+    assert document["log"] == "test 456"
+    assert document["timestamp"] == "1970-01-01T00:00:00.500000+00:00"
+    assert json.loads(body[3])["logger_level"] == "DEBUG"
+
+
+def test_handler_min_level_and_exclude(mocker):
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+    elk = Elk(**CONFIG, buffered=True, flushinterval=0.001, minlevel="warning")
+    handler = LoggersHandler(elk, exclude=("test.handler.excluded",))
+    stdlib_logger("test.handler.excluded.child", handler).error("excluded")
+    stdlib = stdlib_logger("test.handler.filtered", handler)
+    stdlib.info("filtered")
+    stdlib.error("shipped")
+    assert elk.shipper.flush(5)
+    body = "".join(call.kwargs["body"] for call in bulk.call_args_list)
+    assert "shipped" in body
+    assert "filtered" not in body
+    assert "excluded" not in body
+
+
+def test_handler_ignores_own_threads(mocker):
+    ship = mocker.patch.object(Elk, "_ship")
+    handler = LoggersHandler(Elk(**CONFIG))
+    stdlib = stdlib_logger("test.handler.threads", handler)
+    thread = threading.Thread(
+        target=stdlib.error, args=("ignored",), name="loggingsfactory-shipper"
+    )
+    thread.start()
+    thread.join()
+    ship.assert_not_called()
+
+
+def test_handler_ignores_reentrant_records(mocker):
+    stdlib = None
+
+    def ship(level, document):
+        stdlib.error("reentrant")
+
+    elk = Elk(**CONFIG)
+    ship_mock = mocker.patch.object(elk, "_ship", side_effect=ship)
+    stdlib = stdlib_logger("test.handler.reentrant", LoggersHandler(elk))
+    stdlib.error("test123")
+    assert ship_mock.call_count == 1
+
+
+def test_handler_error(mocker):
+    mocker.patch.object(Elk, "_ship", side_effect=ConnectionError())
+    handle_error = mocker.patch.object(LoggersHandler, "handleError")
+    stdlib_logger("test.handler.error", LoggersHandler(Elk(**CONFIG))).error("test")
+    handle_error.assert_called_once()
+
+
+async def test_handler_asyncelk(mocker):
+    index = mocker.patch.object(
+        AsyncElasticsearch, "index", new_callable=mocker.AsyncMock
+    )
+    stdlib = stdlib_logger("test.handler.asyncelk", LoggersHandler(AsyncElk(**CONFIG)))
+    thread = threading.Thread(target=stdlib.error, args=("test123",))
+    thread.start()
+    thread.join()
+    for _ in range(10):
+        if index.called:
+            break
+        await asyncio.sleep(0.01)
+    assert "test123" in index.call_args.kwargs["document"]
+
+
+async def test_handler_asyncelk_failure(mocker, caplog):
+    mocker.patch.object(
+        AsyncElasticsearch,
+        "index",
+        new_callable=mocker.AsyncMock,
+        side_effect=ConnectionError("unreachable"),
+    )
+    stdlib = stdlib_logger(
+        "test.handler.asyncelk.failure", LoggersHandler(AsyncElk(**CONFIG))
+    )
+    stdlib.error("test123")
+    for _ in range(10):
+        if "failed to ship" in caplog.text:
+            break
+        await asyncio.sleep(0.01)
+    assert "LoggersHandler failed to ship a record: ConnectionError" in caplog.text
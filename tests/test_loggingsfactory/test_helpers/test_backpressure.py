@@ -0,0 +1,42 @@
+from src.loggingsfactory.helpers.backpressure import AdaptiveBatch
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+
+
+def test_adaptive_batch_decreases_on_rejection():
+    metrics = LoggerMetrics("Test")
+    controller = AdaptiveBatch(100, 4, 1, metrics)
+    assert (controller.size, controller.concurrency) == (100, 1)
+    assert metrics.gauges["batch_limit"] == 100
+    controller.record(0.01, True)
+    assert controller.size == 50
+    controller.record(2, False)
+    assert controller.size == 25
+    for _ in range(5):
+        controller.record(0.01, True)
+    assert controller.size == 10
+    assert controller.concurrency == 1
+    assert metrics.gauges["batch_limit"] == 10
+
+
+def test_adaptive_batch_increases_additively():
+    metrics = LoggerMetrics("Test")
+    controller = AdaptiveBatch(100, 3, 1, metrics)
+    controller.record(0.01, True)
+    controller.record(0.01, False)
+    assert controller.size == 60
+    for _ in range(4):
+        controller.record(0.01, False)
+    assert controller.size == 100
+    assert controller.concurrency == 1
+    for _ in range(5):
+        controller.record(0.01, False)
+    assert controller.concurrency == 3
+    assert metrics.gauges["in_flight_limit"] == 3
+    controller.record(0.01, True)
+    assert (controller.size, controller.concurrency) == (50, 1)
+
+
+def test_adaptive_batch_small_maxsize():
+    controller = AdaptiveBatch(4)
+    controller.record(0, True)
+    assert controller.size == 4
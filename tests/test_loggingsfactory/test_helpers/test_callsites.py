@@ -0,0 +1,56 @@
+import gc
+from src.loggingsfactory.constants.config import BasicConfig
+from src.loggingsfactory.helpers.callsites import callsites, get_callsite
+
+
+def test_get_callsite():
+    callsite = get_callsite(0)
+    assert callsite.name == "test_get_callsite"
+    assert callsite.qualname == "test_get_callsite"
+    assert callsite.module == __name__
+    assert callsite.filename == __file__
+    assert callsite.line == test_get_callsite.__code__.co_firstlineno
+    assert get_callsite(0) is callsite
+
+
+def test_get_callsite_depth():
+    class Logger:
+        def log(self):
+            return get_callsite(1)
+
+    def caller():
+        return Logger().log()
+
+    assert caller().name == "caller"
+    assert caller().qualname == "test_get_callsite_depth.<locals>.caller"
+
+
+def test_get_callsite_weak():
+    namespace = {"get_callsite": get_callsite}
+    exec(
+        compile("def dynamic():\n    return get_callsite(0)\n", "dyn", "exec"),
+        namespace,
+    )
+    code = namespace["dynamic"].__code__
+    assert namespace["dynamic"]().name == "dynamic"
+    assert code in callsites
+    size = len(callsites)
+    del namespace, code
+    gc.collect()
+    assert len(callsites) == size - 1
+
+
+def test_get_callsite_bounded():
+    codes = [
+        compile(str(i), "bounded", "eval")
+        for i in range(BasicConfig.CALLSITE_CACHE_SIZE.value)
+    ]
+    callsite = get_callsite(0)
+    for code in codes:
+        callsites[code] = callsite
+
+    def uncached():
+        return get_callsite(0)
+
+    assert uncached().name == "uncached"
+    assert len(callsites) == 1
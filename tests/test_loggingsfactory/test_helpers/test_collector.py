@@ -0,0 +1,191 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import pytest
+from src.loggingsfactory.helpers.collector import (
+    CollectorClient,
+    SharedMemoryClient,
+    WorkerCount,
+    is_collector_running,
+    start_collector,
+    stop_collector,
+)
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+from src.loggingsfactory.loggers.loguru import Loguru, filesinks
+
+
+@pytest.fixture
+def address(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # unix socket paths are limited to about 100 characters
+    directory = tempfile.mkdtemp(prefix="lf")
+    yield os.path.join(directory, "c.sock")
+
+
+def wait_for_logfile(lines):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if os.path.exists("logs/logfile.log"):
+            with open("logs/logfile.log", encoding="utf-8") as logfile:
+                content = logfile.read()
+            if all(line in content for line in lines):
+                return content
+        time.sleep(0.05)
+    raise AssertionError("records were not written by the collector")
+
+
+def test_collector_client_buffers_without_collector(address):
+    metrics = LoggerMetrics("Test")
+    client = CollectorClient(address, 2, metrics)
+    client.send("INFO", "a")
+    client.send("INFO", "b")
+    client.send("INFO", "c")
+    assert list(client.pending) == [b"INFO\nb", b"INFO\nc"]
+    assert metrics.counters["drops"] == 1
+    assert metrics.gauges["queue_depth"] == 2
+
+
+def test_collector_writes_worker_records(address):
+    test = Loguru(appname="test", multiprocess=True, collector=address)
+    assert test.supervisor is not None
+    assert is_collector_running(address)
+    # a second logger uses the running collector
+    assert (
+        Loguru(appname="test", multiprocess=True, collector=address).supervisor is None
+    )
+
+    test.log("info", "collected one")
+    test.log_many([("error", "collected many")])
+    content = wait_for_logfile(["collected one", "collected many"])
+    record = next(line for line in content.splitlines() if "collected many" in line)
+    assert json.loads(record[record.index("{") :])["logger_level"] == "ERROR"
+
+    test.supervisor.stop()
+    assert not is_collector_running(address)
+
+
+def test_collector_worker_leaves_log_file_to_collector(address):
+    test = Loguru(appname="test", multiprocess=True, collector=address)
+    assert test.logfile is None
+    assert os.path.abspath("logs/logfile.log") not in filesinks.sinks
+    test.log("info", "written by the collector")
+    wait_for_logfile(["written by the collector"])
+    test.supervisor.stop()
+    size = os.path.getsize("logs/logfile.log")
+
+    # the collector is not restarted, the records are kept by the worker
+    test.transport.config = None
+    test.log("info", "kept by the worker")
+    test.log_many([("error", "kept by the worker")])
+    assert os.path.getsize("logs/logfile.log") == size
+    assert len(test.transport.pending) == 2
+
+
+def test_collector_writes_shared_memory_records(address):
+    test = Loguru(
+        appname="test", multiprocess=True, collector=address, transport="sharedmemory"
+    )
+    assert isinstance(test.transport, SharedMemoryClient)
+    test.log("info", "shared one")
+    test.log_many([("error", "shared many")])
+    content = wait_for_logfile(["shared one", "shared many"])
+    record = next(line for line in content.splitlines() if "shared many" in line)
+    assert json.loads(record[record.index("{") :])["logger_level"] == "ERROR"
+    assert test.transport.ring.used() == 0
+    test.supervisor.stop()
+
+
+def test_shared_memory_client_without_collector(address):
+    metrics = LoggerMetrics("Test")
+    client = SharedMemoryClient(address, 64, metrics)
+    client.send("INFO", "a" * 40)
+    client.send("INFO", "b" * 40)
+    assert client.connection is None
+    assert client.ring.used() == 4 + 1 + 4 + 40
+    assert metrics.counters["drops"] == 1
+    assert metrics.enqueue_seconds.count == 1
+
+
+def test_collector_is_restarted(address):
+    test = Loguru(appname="test", multiprocess=True, collector=address)
+    test.supervisor.process.kill()
+    test.supervisor.process.wait()
+    test.transport.retry_at = 0
+    test.log("info", "sent while restarting")
+    deadline = time.monotonic() + 10
+    while not is_collector_running(address) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    test.transport.retry_at = 0
+    test.log("info", "sent after restart")
+    wait_for_logfile(["sent while restarting", "sent after restart"])
+    test.supervisor.stop()
+    stop_collector(address)
+
+
+def wait_for_collector(address, running):
+    deadline = time.monotonic() + 10
+    while is_collector_running(address) != running:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_collector_outlives_starting_worker(address):
+    script = textwrap.dedent(
+        f"""
+        from src.loggingsfactory.loggers.loguru import Loguru
+
+        test = Loguru(appname="test", multiprocess=True, collector={address!r})
+        test.log("info", "sent by the starting worker")
+        """
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, sys.path))},
+        check=True,
+        timeout=30,
+    )
+    assert is_collector_running(address)
+
+    test = Loguru(appname="test", multiprocess=True, collector=address)
+    assert test.supervisor is None
+    test.log("info", "sent by another worker")
+    wait_for_logfile(["sent by the starting worker", "sent by another worker"])
+    assert stop_collector(address)
+    wait_for_collector(address, False)
+
+
+def test_collector_is_restarted_by_any_worker(address):
+    starting = Loguru(appname="test", multiprocess=True, collector=address)
+    test = Loguru(appname="test", multiprocess=True, collector=address)
+    assert test.supervisor is None
+    starting.supervisor.stop()
+    assert not is_collector_running(address)
+    assert not stop_collector(address)
+
+    test.transport.retry_at = 0
+    test.log("info", "sent while stopped")
+    wait_for_collector(address, True)
+    test.transport.retry_at = 0
+    test.log("info", "sent after restart")
+    wait_for_logfile(["sent while stopped", "sent after restart"])
+    assert stop_collector(address)
+    wait_for_collector(address, False)
+
+
+def test_collector_exits_when_idle(mocker):
+    kill = mocker.patch("src.loggingsfactory.helpers.collector.os.kill")
+    mocker.patch("src.loggingsfactory.helpers.collector.time.sleep")
+    workers = WorkerCount()
+    workers.idle_since -= 3600
+    workers.exit_when_idle()
+    kill.assert_called_once()
+
+
+def test_start_collector_failure(address, mocker):
+    mocker.patch("sys.executable", "false")
+    with pytest.raises(RuntimeError):
+        start_collector(address, {})
@@ -0,0 +1,48 @@
+import gzip
+import pytest
+from src.loggingsfactory.helpers import compression
+from src.loggingsfactory.helpers.compression import Compressor
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+
+
+def test_compressor_gzip():
+    metrics = LoggerMetrics("Test")
+    compressor = Compressor("gzip", instrumentation=metrics)
+    body = '{"log": "test123", "app_name": "test"}\n' * 100
+    compressed, headers = compressor.compress(body)
+    assert headers == {"content-encoding": "gzip"}
+    assert gzip.decompress(compressed).decode() == body
+    ratio = metrics.histograms["compression_ratio"]
+    assert ratio.count == 1
+    assert ratio.sum == len(body) / len(compressed)
+
+
+def test_compressor_small_body():
+    metrics = LoggerMetrics("Test")
+    compressor = Compressor("gzip", 1, minsize=100, instrumentation=metrics)
+    assert compressor.compress("test123") == ("test123", None)
+    assert metrics.histograms["compression_ratio"].count == 0
+    assert compressor.level == 1
+
+
+def test_compressor_unsupported():
+    with pytest.raises(ValueError):
+        Compressor("brotli")
+
+
+def test_compressor_zstd_missing(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    with pytest.raises(ValueError):
+        Compressor("zstd")
+
+
+def test_compressor_zstd(mocker, monkeypatch):
+    zstandard = mocker.MagicMock()
+    zstandard.ZstdCompressor.return_value.compress.return_value = b"compressed"
+    monkeypatch.setattr(compression, "zstandard", zstandard)
+    compressor = Compressor("zstd", minsize=0)
+    assert compressor.compress("test123") == (
+        b"compressed",
+        {"content-encoding": "zstd"},
+    )
+    zstandard.ZstdCompressor.assert_called_with(level=3)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import pytest
+from src.loggingsfactory.helpers.context import (
+    bind_context,
+    contextualize,
+    get_context,
+    reset_context,
+    serialized_context,
+)
+
+
+def test_bind_context():
+    token = bind_context(request_id="abc")
+    try:
+        assert get_context() == {"request_id": "abc"}
+        inner = bind_context(user_id=1)
+        assert get_context() == {"request_id": "abc", "user_id": 1}
+        reset_context(inner)
+        assert get_context() == {"request_id": "abc"}
+    finally:
+        reset_context(token)
+    assert get_context() == {}
+
+
+def test_bind_context_reserved_field():
+    with pytest.raises(ValueError):
+        bind_context(app_name="abc")
+    with pytest.raises(TypeError):
+        bind_context(request=object())
+    assert get_context() == {}
+
+
+def test_contextualize():
+    with contextualize(trace_id="t1"):
+        assert get_context() == {"trace_id": "t1"}
+    assert get_context() == {}
+
+
+def test_serialized_context():
+    assert serialized_context() == ""
+    with contextualize(request_id="abc", user_id=1):
+        document = json.dumps({"log": "abc"})[:-1] + serialized_context() + "}"
+        assert json.loads(document) == {
+            "log": "abc",
+            "request_id": "abc",
+            "user_id": 1,
+        }
+
+
+async def test_context_per_task():
+    async def handle(request_id):
+        with contextualize(request_id=request_id):
+            await asyncio.sleep(0)
+            return get_context()
+
+    assert await asyncio.gather(handle("a"), handle("b")) == [
+        {"request_id": "a"},
+        {"request_id": "b"},
+    ]
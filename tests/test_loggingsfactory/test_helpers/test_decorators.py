@@ -1,6 +1,9 @@
+from elasticsearch.connection_pool import RandomSelector, RoundRobinSelector
+import pytest
 from src.loggingsfactory.helpers.decorators import (
     connect_async_elk,
     connect_elk,
+    format_elk_client_options,
     print_retry_exception_msg,
 )
 
@@ -43,6 +46,12 @@ def test_connect_elk_debug_false():
     pw = "pw"
     result = MockLogger(debug=debug, host=host, username=username, pw=pw)
     assert str(result.__dict__.get("es")) == str(Elasticsearch([host]))
+    assert "accept-encoding" not in result.es.transport.kwargs["headers"]
+
+    result = MockLogger(
+        debug=debug, host=host, username=username, pw=pw, compression="gzip"
+    )
+    assert result.es.transport.kwargs["headers"]["accept-encoding"] == "gzip,deflate"
 
 
 def test_connect_async_elk_debug_true():
@@ -71,3 +80,78 @@ def test_connect_async_elk_debug_false():
     pw = "pw"
     result = MockLogger(debug=debug, host=host, username=username, pw=pw)
     assert str(result.__dict__.get("es")) == str(AsyncElasticsearch([host]))
+
+
+def test_format_elk_client_options():
+    options = format_elk_client_options({})
+    assert options == {
+        "headers": {},
+        "timeout": 30,
+        "maxsize": 25,
+        "sniff_on_start": False,
+        "sniff_on_connection_fail": False,
+        "sniffer_timeout": None,
+        "selector_class": RoundRobinSelector,
+        "dead_timeout": 60,
+    }
+
+    options = format_elk_client_options(
+        {
+            "maxsize": 64,
+            "timeout": 5,
+            "keepalive": False,
+            "sniff": True,
+            "sniffinterval": 60,
+            "selector": "random",
+        }
+    )
+    assert options["headers"] == {"connection": "close"}
+    assert options["timeout"] == 5
+    assert options["maxsize"] == 64
+    assert options["sniff_on_start"] is True
+    assert options["sniff_on_connection_fail"] is True
+    assert options["sniffer_timeout"] == 60
+    assert options["selector_class"] is RandomSelector
+
+    with pytest.raises(ValueError):
+        format_elk_client_options({"selector": "fastest"})
+
+
+def test_connect_elk_client_options():
+    class MockLogger:
+        @connect_elk
+        def __init__(self, **kwargs):
+            self.username = kwargs.get("username")
+            self.pw = kwargs.get("pw")
+
+    result = MockLogger(
+        debug=False,
+        host="https://localhost.com:9201",
+        username="user",
+        pw="pw",
+        maxsize=64,
+        timeout=5,
+    )
+    connection = result.es.transport.get_connection()
+    assert connection.pool.pool.maxsize == 64
+    assert connection.timeout == 5
+
+
+def test_connect_async_elk_client_options():
+    class MockLogger:
+        @connect_async_elk
+        def __init__(self, **kwargs):
+            self.username = kwargs.get("username")
+            self.pw = kwargs.get("pw")
+
+    result = MockLogger(
+        debug=False,
+        host="https://localhost.com:9201",
+        username="user",
+        pw="pw",
+        maxsize=64,
+        timeout=5,
+    )
+    # the async connections are created on the first request
+    assert result.es.transport.kwargs["maxsize"] == 64
+    assert result.es.transport.kwargs["timeout"] == 5
@@ -0,0 +1,105 @@
+import time
+from src.loggingsfactory.helpers.dedup import CoalescedLog, LogDeduplicator
+from src.loggingsfactory.loggers.loguru import Loguru
+
+
+class MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_coalescedlog():
+    record = CoalescedLog("INFO", "test", "abc", "2020-01-01", 1.0)
+    assert record.count == 1
+    assert record.first_seen == record.last_seen == "2020-01-01"
+    assert record.started == 1.0
+
+
+def test_logdeduplicator_is_duplicate():
+    clock = MockClock()
+    deduplicator = LogDeduplicator(10, 10, clock)
+    assert deduplicator.is_duplicate("INFO", "test", "abc", "d1") is False
+    assert deduplicator.is_duplicate("INFO", "test", "abc", "d2") is True
+    assert deduplicator.is_duplicate("ERROR", "test", "abc", "d2") is False
+    assert deduplicator.is_duplicate("INFO", "other", "abc", "d2") is False
+    assert deduplicator.is_duplicate("INFO", "test", "abcd", "d2") is False
+    clock.now = 5
+    assert deduplicator.is_duplicate("INFO", "test", "abc", "d3") is True
+    assert deduplicator.expired() == []
+
+
+def test_logdeduplicator_window_closed():
+    clock = MockClock()
+    deduplicator = LogDeduplicator(10, 10, clock)
+    deduplicator.is_duplicate("INFO", "test", "abc", "d1")
+    deduplicator.is_duplicate("INFO", "test", "abc", "d2")
+    deduplicator.is_duplicate("INFO", "test", "abc", "d3")
+    deduplicator.is_duplicate("INFO", "single", "abc", "d3")
+    clock.now = 10
+    assert deduplicator.is_duplicate("INFO", "test", "abc", "d4") is False
+    expired = deduplicator.expired()
+    assert len(expired) == 1
+    assert expired[0].count == 3
+    assert expired[0].first_seen == "d1"
+    assert expired[0].last_seen == "d3"
+    assert len(deduplicator.records) == 1
+
+
+def test_logdeduplicator_lru_eviction():
+    deduplicator = LogDeduplicator(10, 2, MockClock())
+    deduplicator.is_duplicate("INFO", "test", "a", "d1")
+    deduplicator.is_duplicate("INFO", "test", "a", "d2")
+    deduplicator.is_duplicate("INFO", "test", "b", "d2")
+    deduplicator.is_duplicate("INFO", "test", "c", "d3")
+    assert len(deduplicator.records) == 2
+    expired = deduplicator.expired()
+    assert [record.data for record in expired] == ["a"]
+
+
+def test_logdeduplicator_flush():
+    deduplicator = LogDeduplicator(10, 10, MockClock())
+    deduplicator.is_duplicate("INFO", "test", "a", "d1")
+    deduplicator.is_duplicate("INFO", "test", "a", "d2")
+    deduplicator.is_duplicate("INFO", "test", "b", "d2")
+    flushed = deduplicator.flush()
+    assert [(record.data, record.count) for record in flushed] == [("a", 2)]
+    assert len(deduplicator.records) == 0
+    assert deduplicator.flush() == []
+
+
+class CollidingStr(str):
+    def __hash__(self):
+        return 0
+
+
+def test_logdeduplicator_hash_collision():
+    deduplicator = LogDeduplicator(10, 10, MockClock())
+    assert deduplicator.is_duplicate("INFO", "test", CollidingStr("a"), "d1") is False
+    assert deduplicator.is_duplicate("INFO", "test", CollidingStr("b"), "d1") is False
+    assert len(deduplicator.records) == 2
+
+
+def test_logdeduplicator_window_from_first_record():
+    clock = MockClock()
+    deduplicator = LogDeduplicator(10, 10, clock)
+    for now in range(0, 10, 2):
+        clock.now = now
+        deduplicator.is_duplicate("INFO", "test", "abc", f"d{now}")
+    assert deduplicator.expired() == []
+    clock.now = 10
+    expired = deduplicator.expired()
+    assert [(record.count, record.last_seen) for record in expired] == [(5, "d8")]
+
+
+def test_summary_flusher_ships_without_log_call(caplog):
+    test = Loguru(appname="test", dedupwindow=0.05)
+    test.log("info", "repeated")
+    test.log("info", "repeated")
+    deadline = time.monotonic() + 5
+    while '"count": 2' not in caplog.text and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert '"count": 2' in caplog.text
+    test.close()
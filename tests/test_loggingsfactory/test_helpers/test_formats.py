@@ -1,15 +1,27 @@
 from datetime import datetime
 import json
 import pytest
+from src.loggingsfactory.helpers.dedup import LogDeduplicator
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+from src.loggingsfactory.helpers.context import contextualize, serialized_context
 from src.loggingsfactory.helpers.formats import (
     _format_log_data,
     check_log_level,
     check_log_level_type,
     check_log_level_value,
+    evaluate_log_data,
+    format_bulk_body,
+    get_bulk_failures,
+    format_coalesced_log_data,
     format_elk_query_payload,
+    format_index_template,
+    format_record,
     format_elk_url,
+    format_elk_urls,
     format_log_data,
+    format_log_many,
 )
+from src.loggingsfactory.helpers.records import LogRecord
 
 
 def test_format_elk_url():
@@ -35,6 +47,30 @@ def test_format_elk_url():
     assert format_elk_url(config, True) == expected
 
 
+def test_format_elk_urls():
+    config = {"host": "https://node1.com, node2.com", "port": 111}
+    assert format_elk_urls(config) == [
+        "https://node1.com:111",
+        "https://node2.com:111",
+    ]
+    config = {"host": ["https://node1.com:9201", "node2.com"]}
+    assert format_elk_urls(config) == [
+        "https://node1.com:9201",
+        "https://node2.com:9201",
+    ]
+    assert format_elk_urls(config, True) == ["node1.com", "node2.com"]
+    assert format_elk_url(config) == "https://node1.com:9201"
+
+
+def test_evaluate_log_data():
+    assert evaluate_log_data("test") == "test"
+    assert evaluate_log_data({"test": "abc"}) == {"test": "abc"}
+    assert evaluate_log_data(lambda: "test") == "test"
+    assert evaluate_log_data(lambda: {"test": "abc"}) == {"test": "abc"}
+    assert evaluate_log_data("test {} {}", [1, lambda: "abc"]) == "test 1 abc"
+    assert evaluate_log_data(lambda: "test {}", [1]) == "test 1"
+
+
 def test__format_log_data():
     level = "INFO"
     logdata = "test"
@@ -131,6 +167,23 @@ def test__format_log_data_custom_logdata():
     assert _format_log_data(level, logdata, None, None, None, "", True, 1) == logdata
 
 
+def test_format_record():
+    fields = {
+        "log": 'quoted "log" é\n',
+        "version": 1.5,
+        "logger_level": "INFO",
+        "functional_name": "func",
+        "app_name": "test",
+        "timestamp": "2020-01-01T00:00:00.000Z",
+    }
+    record = LogRecord(20, "INFO", fields["log"], fields["timestamp"], "func", "")
+    assert format_record(record, "test", 1.5) == json.dumps(fields)
+
+    with contextualize(request_id="abc"):
+        record = LogRecord(20, "INFO", "log", "date", "func", serialized_context())
+    assert json.loads(format_record(record, "test", "1.0"))["request_id"] == "abc"
+
+
 def test_format_log_data():
     class Test:
         def __init__(self):
@@ -230,6 +283,200 @@ def test_format_log_data_custom_logdata():
     assert format_log_data(self, level, logdata, "", True, None, 1) == logdata
 
 
+def test_format_log_data_lazy():
+    class Test:
+        def __init__(self):
+            self.appname = "test"
+            self.version = "1.0.0"
+            self.minlevel = 30
+
+    def fail():
+        raise AssertionError("suppressed log data must not be evaluated")
+
+    self = Test()
+    date = "2020-01-01T00:00:00.000Z"
+    assert format_log_data(self, "INFO", fail, "", False, date, 0) is None
+    assert (
+        format_log_data(self, "DEBUG", "{}", "", False, date, 0, logargs=[fail]) is None
+    )
+    result = json.dumps(
+        {
+            "log": "test 1",
+            "version": self.version,
+            "logger_level": "ERROR",
+            "functional_name": "myfunction",
+            "app_name": self.appname,
+            "timestamp": date,
+        }
+    )
+    assert (
+        format_log_data(
+            self, "ERROR", lambda: "test {}", "myfunction", False, date, 0, logargs=[1]
+        )
+        == result
+    )
+
+
+def test_format_log_data_deduplicated():
+    from src.loggingsfactory.helpers.dedup import LogDeduplicator
+
+    class Test:
+        def __init__(self):
+            self.appname = "test"
+            self.version = "1.0.0"
+            self.deduplicator = LogDeduplicator(60, 10)
+
+    self = Test()
+    level = "INFO"
+    logdata = {"test": "abc"}
+    result = json.dumps(
+        {
+            "log": json.dumps(logdata),
+            "version": self.version,
+            "logger_level": level,
+            "functional_name": "test_format_log_data_deduplicated",
+            "app_name": self.appname,
+            "timestamp": "d1",
+        }
+    )
+    assert format_log_data(self, level, logdata, "", False, "d1", -1) == result
+    assert format_log_data(self, level, logdata, "", False, "d2", -1) is None
+    assert format_log_data(self, level, logdata, "", False, "d3", -1) is None
+    assert format_log_data(self, level, logdata, "", True, "d3", -1) == json.dumps(
+        logdata
+    )
+    assert format_coalesced_log_data(self) == []
+    result = json.dumps(
+        {
+            "log": json.dumps(logdata),
+            "version": self.version,
+            "logger_level": level,
+            "functional_name": "test_format_log_data_deduplicated",
+            "app_name": self.appname,
+            "timestamp": "d3",
+            "count": 3,
+            "first_seen": "d1",
+            "last_seen": "d3",
+        }
+    )
+    assert format_coalesced_log_data(self, True) == [(level, result)]
+
+
+def test_format_log_many():
+    class Test:
+        def __init__(self):
+            self.appname = "test"
+            self.version = "1.0.0"
+            self.minlevel = 20
+
+    self = Test()
+    date = "2020-01-01T00:00:00.000Z"
+    records = [
+        ("info", "test"),
+        ("debug", "suppressed"),
+        ("ERROR", "{}", "myfunction", False, date, [1]),
+        ("info", "custom", "", True),
+    ]
+    documents = format_log_many(self, iter(records), -1)
+    assert [level for level, _ in documents] == ["INFO", "ERROR", "INFO"]
+    first = json.loads(documents[0][1])
+    assert first["functional_name"] == "test_format_log_many"
+    assert first["logger_level"] == "INFO"
+    assert first["timestamp"] != date
+    assert documents[1][1] == json.dumps(
+        {
+            "log": "1",
+            "version": self.version,
+            "logger_level": "ERROR",
+            "functional_name": "myfunction",
+            "app_name": self.appname,
+            "timestamp": date,
+        }
+    )
+    assert documents[2][1] == "custom"
+
+
+def test_format_log_many_batch_context_and_filters():
+    class Test:
+        def __init__(self):
+            self.appname = "test"
+            self.version = "1.0.0"
+            self.minlevel = 20
+            self.deduplicator = LogDeduplicator(60, 10)
+            self.instrumentation = LoggerMetrics("Test")
+
+    self = Test()
+    with contextualize(request_id="abc"):
+        documents = format_log_many(
+            self, [("debug", "a"), ("info", "b"), ("info", "b"), ("info", "c")]
+        )
+    assert [json.loads(document)["log"] for _, document in documents] == ["b", "c"]
+    assert all(json.loads(document)["request_id"] == "abc" for _, document in documents)
+    assert self.instrumentation.counters["filtered"] == 2
+
+
+def test_format_log_many_wrong_level():
+    class Test:
+        def __init__(self):
+            self.appname = "test"
+            self.version = "1.0.0"
+
+    with pytest.raises(ValueError):
+        format_log_many(Test(), [("info", "test"), ("abc", "test")])
+    with pytest.raises(TypeError):
+        format_log_many(Test(), [(True, "test")])
+
+
+def test_format_log_many_wrong_record_size():
+    class Test:
+        def __init__(self):
+            self.appname = "test"
+            self.version = "1.0.0"
+
+    with pytest.raises(ValueError, match="Log record 1 has 1 values"):
+        format_log_many(Test(), [("info", "test"), ("info",)])
+    with pytest.raises(ValueError, match="Log record 0 has 7 values"):
+        format_log_many(Test(), [("info", "test", "", False, None, None, "extra")])
+
+
+def test_format_bulk_body():
+    documents = [("INFO", '{"log": "a"}'), ("ERROR", '{"log": "b"}')]
+    action = json.dumps({"index": {"_index": "appindex"}})
+    assert format_bulk_body("appindex", documents) == (
+        f'{action}\n{{"log": "a"}}\n{action}\n{{"log": "b"}}\n'
+    )
+    assert format_bulk_body("appindex", []) == ""
+    action = json.dumps({"create": {"_index": "appindex"}})
+    assert format_bulk_body("appindex", documents[:1], "create") == (
+        f'{action}\n{{"log": "a"}}\n'
+    )
+
+
+def test_get_bulk_failures():
+    documents = [("INFO", "a"), ("INFO", "b"), ("INFO", "c")]
+    response = {
+        "errors": True,
+        "items": [
+            {"index": {"status": 201}},
+            {"index": {"status": 429}},
+            {"index": {"status": 400}},
+        ],
+    }
+    assert get_bulk_failures(response, documents) == ([("INFO", "b")], [("INFO", "c")])
+    assert get_bulk_failures({"errors": False, "items": []}, documents) == ([], [])
+    assert get_bulk_failures(None, documents) == ([], [])
+
+
+def test_format_coalesced_log_data_disabled():
+    class Test:
+        def __init__(self):
+            self.appname = "test"
+            self.version = "1.0.0"
+
+    assert format_coalesced_log_data(Test()) == []
+    assert format_coalesced_log_data(Test(), True) == []
+
+
 def test_format_elk_query_payload():
     appname = "test"
     date = datetime.now().isoformat()
@@ -257,6 +504,29 @@ def test_format_elk_query_payload():
         }
     }
     assert format_elk_query_payload(appname, date) == payload
+    payload["query"]["bool"]["filter"][1]["range"]["timestamp"]["gte"] = date
+    assert format_elk_query_payload(appname, date, None, date) == payload
+
+
+def test_format_elk_query_payload_mapped():
+    payload = format_elk_query_payload("test", "", mapped=True)
+    should = payload["query"]["bool"]["filter"][0]["bool"]["should"]
+    assert should == [{"match_phrase": {"app_name": "test"}}]
+
+
+def test_format_index_template():
+    body = format_index_template("logs-test-*", 1, 0, "30s")
+    assert body["index_patterns"] == ["logs-test-*"]
+    assert body["template"]["settings"] == {
+        "number_of_shards": 1,
+        "number_of_replicas": 0,
+        "refresh_interval": "30s",
+    }
+    properties = body["template"]["mappings"]["properties"]
+    for field in ("app_name", "logger_level", "functional_name"):
+        assert properties[field]["type"] == "keyword"
+    assert properties["timestamp"]["type"] == "date"
+    assert properties["log"]["type"] == "text"
 
 
 def test_format_elk_query_payload_custom_payload():
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from src.loggingsfactory.helpers.indices import IndexRouter
+
+DAY = datetime(2021, 9, 24, 23, 59, tzinfo=timezone.utc).timestamp()
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.now
+
+
+def test_index_router_static():
+    router = IndexRouter("appindex", "abc")
+    assert not router.dated
+    assert router.resolve() == "appindex"
+    assert router.indices("2021-09-24T00:00:00Z") == "appindex"
+
+    router = IndexRouter("logs-{appname}", "abc")
+    assert router.resolve() == "logs-abc"
+    assert router.template_name == "loggingsfactory-logs-abc"
+
+
+def test_index_router_interval():
+    assert IndexRouter("logs-{date:%Y.%m.%d}", "abc").interval == 86400
+    assert IndexRouter("logs-{date:%Y.%m}", "abc").interval == 86400
+    assert IndexRouter("logs-{date:%Y.%m.%d.%H}", "abc").interval == 3600
+    assert IndexRouter("logs-{date:%Y%m%d%H%M}", "abc").interval == 60
+
+
+def test_index_router_resolve():
+    clock = Clock(DAY)
+    router = IndexRouter("logs-{appname}-{date:%Y.%m.%d}", "abc", clock)
+    assert router.dated
+    assert router.pattern == "logs-abc-*"
+    assert router.template_name == "loggingsfactory-logs-abc"
+    assert router.resolve() == "logs-abc-2021.09.24"
+    assert router.resolve() is router.resolve()
+
+    clock.now += 60
+    assert router.resolve() == "logs-abc-2021.09.25"
+    assert clock.calls == 4
+
+
+def test_index_router_indices():
+    router = IndexRouter("logs-{date:%Y.%m.%d}", "abc", Clock(DAY))
+    assert router.indices() == "logs-*"
+    assert router.indices("2021-09-23T12:00:00Z") == "logs-2021.09.23,logs-2021.09.24"
+    assert (
+        router.indices("2021-09-01T00:00:00", "2021-09-02T00:00:00+00:00")
+        == "logs-2021.09.01,logs-2021.09.02"
+    )
+    assert router.indices("2021-01-01T00:00:00Z") == "logs-*"
+
+
+def test_index_router_indices_deduplicated():
+    router = IndexRouter("logs-{date:%Y.%m}", "abc", Clock(DAY))
+    assert router.indices("2021-08-01T00:00:00Z") == "logs-2021.08,logs-2021.09"
+    assert router.indices("2000-01-01T00:00:00Z") == "logs-*"
@@ -0,0 +1,102 @@
+import signal
+import subprocess
+import sys
+import textwrap
+import pytest
+from src.loggingsfactory.helpers.lifecycle import (
+    Lifecycle,
+    close_loggers,
+    report_unsent,
+)
+
+
+class MockLogger:
+    def __init__(self, unsent=0, error=None):
+        self.shutdowntimeout = 1
+        self.unsent = unsent
+        self.error = error
+        self.timeouts = []
+
+    def close(self, timeout=None):
+        self.timeouts.append(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.unsent
+
+
+def test_lifecycle_close_all():
+    lifecycle = Lifecycle()
+    lifecycle.installed = True
+    closed, forgotten = MockLogger(2), MockLogger()
+    lifecycle.register(closed)
+    lifecycle.register(forgotten)
+    lifecycle.unregister(forgotten)
+    assert lifecycle.close_all(5) == 2
+    assert 0 < closed.timeouts[0] <= 5
+    assert not forgotten.timeouts
+
+
+def test_close_loggers_failure(caplog):
+    failing, other = MockLogger(error=RuntimeError("closed loop")), MockLogger(1)
+    assert close_loggers([failing, other]) == 1
+    assert other.timeouts[0] <= 1
+    assert "MockLogger logger failed to close" in caplog.text
+
+
+def test_report_unsent(caplog):
+    assert report_unsent(MockLogger(), 0) == 0
+    assert "unsent" not in caplog.text
+    assert report_unsent(MockLogger(), 3) == 3
+    assert "MockLogger logger closed with 3 records left unsent" in caplog.text
+
+
+def test_lifecycle_terminate():
+    lifecycle = Lifecycle()
+    lifecycle.previous = signal.SIG_DFL
+    with pytest.raises(SystemExit) as error:
+        lifecycle.terminate(signal.SIGTERM, None)
+    assert error.value.code == 143
+
+    calls = []
+    lifecycle.previous = lambda signum, frame: calls.append(signum)
+    lifecycle.terminate(signal.SIGTERM, None)
+    assert calls == [signal.SIGTERM]
+
+
+def test_lifecycle_sigterm_sends_queued_records(tmp_path):
+    sent = tmp_path / "sent.txt"
+    script = textwrap.dedent(
+        f"""
+        import sys, time
+        from elasticsearch import Elasticsearch
+        from src.loggingsfactory.logging import Loggers
+
+        def bulk(self, body, **kwargs):
+            with open({str(sent)!r}, "a") as file:
+                file.write(body)
+            return {{"errors": False, "items": []}}
+
+        Elasticsearch.bulk = bulk
+        loggers = Loggers(
+            appname="lifecycle",
+            debug=False,
+            host="https://localhost.com:9201",
+            index="appindex",
+            username="user",
+            pw="pw",
+            buffered=True,
+            flushinterval=60,
+        )
+        loggers.log("info", "queued before sigterm")
+        print("ready", flush=True)
+        time.sleep(60)
+        """
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", script], stdout=subprocess.PIPE, text=True
+    )
+    assert process.stdout.readline() == "ready\n"
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(30) == 143
+    process.stdout.close()
+    assert "queued before sigterm" in sent.read_text()
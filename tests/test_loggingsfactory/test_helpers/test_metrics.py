@@ -0,0 +1,98 @@
+import threading
+from time import perf_counter
+from src.loggingsfactory.helpers.metrics import Histogram, LoggerMetrics
+
+
+def test_histogram():
+    histogram = Histogram((1, 10))
+    histogram.observe(0.5)
+    histogram.observe(1)
+    histogram.observe(5)
+    histogram.observe(50)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == 56.5
+    assert histogram.cumulative() == {"1": 2, "10": 3, "+Inf": 4}
+
+
+def test_loggermetrics():
+    metrics = LoggerMetrics("Elk")
+    metrics.record_format(perf_counter())
+    metrics.record_ship(perf_counter(), 10, 2048)
+    metrics.record_enqueue(perf_counter(), 5)
+    metrics.increment("filtered")
+    metrics.increment("drops", 3)
+    metrics.observe("batch_size", 100)
+    metrics.record_compression(1000, 100)
+    snapshot = metrics.snapshot()
+    assert snapshot["backend"] == "Elk"
+    assert snapshot["histograms"]["format_seconds"]["count"] == 1
+    assert snapshot["histograms"]["enqueue_seconds"]["count"] == 1
+    assert snapshot["histograms"]["ship_seconds"]["count"] == 1
+    assert snapshot["histograms"]["batch_size"]["count"] == 2
+    assert snapshot["histograms"]["batch_size"]["sum"] == 110
+    assert snapshot["histograms"]["shipped_bytes"]["buckets"]["4096"] == 1
+    assert snapshot["histograms"]["compression_ratio"]["buckets"]["16"] == 1
+    assert snapshot["counters"]["records"] == 10
+    assert snapshot["counters"]["filtered"] == 1
+    assert snapshot["counters"]["drops"] == 3
+    assert snapshot["gauges"]["queue_depth"] == 5
+    metrics.set("queue_depth", 0)
+    assert snapshot["gauges"]["queue_depth"] == 5
+    assert metrics.snapshot()["gauges"]["queue_depth"] == 0
+
+
+def test_loggermetrics_to_prometheus():
+    metrics = LoggerMetrics("Loguru")
+    metrics.observe("batch_size", 5)
+    metrics.increment("records", 5)
+    text = metrics.to_prometheus()
+    assert text.endswith("\n")
+    assert "# TYPE loggingsfactory_batch_size histogram" in text
+    assert 'loggingsfactory_batch_size_bucket{backend="Loguru",le="1"} 0' in text
+    assert 'loggingsfactory_batch_size_bucket{backend="Loguru",le="10"} 1' in text
+    assert 'loggingsfactory_batch_size_bucket{backend="Loguru",le="+Inf"} 1' in text
+    assert 'loggingsfactory_batch_size_sum{backend="Loguru"} 5' in text
+    assert 'loggingsfactory_batch_size_count{backend="Loguru"} 1' in text
+    assert "# TYPE loggingsfactory_records_total counter" in text
+    assert 'loggingsfactory_records_total{backend="Loguru"} 5' in text
+    assert 'loggingsfactory_queue_depth{backend="Loguru"} 0' in text
+    assert 'app_batch_size_count{backend="Loguru"} 1' in metrics.to_prometheus("app")
+
+
+def test_loggermetrics_record_node():
+    metrics = LoggerMetrics("Elk")
+    assert "node_seconds" not in metrics.to_prometheus()
+    metrics.record_node("https://node1.com:9201", 0.002)
+    metrics.record_node("https://node1.com:9201", 0.02)
+    metrics.record_node("https://node2.com:9201", 0.2)
+    nodes = metrics.snapshot()["nodes"]
+    assert nodes["https://node1.com:9201"]["count"] == 2
+    assert nodes["https://node1.com:9201"]["buckets"]["0.005"] == 1
+    assert nodes["https://node2.com:9201"]["sum"] == 0.2
+    text = metrics.to_prometheus()
+    assert text.count("# TYPE loggingsfactory_node_seconds histogram") == 1
+    assert (
+        'loggingsfactory_node_seconds_count{backend="Elk",node="https://node1.com:9201"} 2'
+        in text
+    )
+
+
+def test_loggermetrics_concurrent_updates():
+    metrics = LoggerMetrics("test")
+
+    def record():
+        for _ in range(10000):
+            metrics.increment("drops")
+            metrics.record_ship(perf_counter(), 1, 10)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["drops"] == 80000
+    assert snapshot["counters"]["records"] == 80000
+    assert snapshot["histograms"]["batch_size"]["count"] == 80000
+    assert snapshot["histograms"]["batch_size"]["buckets"]["+Inf"] == 80000
@@ -0,0 +1,81 @@
+from elasticsearch import AIOHttpConnection, Urllib3HttpConnection
+import pytest
+from src.loggingsfactory.helpers import nodes
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+from src.loggingsfactory.helpers.nodes import (
+    AsyncTrackedConnection,
+    LatencySelector,
+    LeastOutstandingSelector,
+    NodeStats,
+    TrackedConnection,
+)
+
+
+def test_node_stats(monkeypatch):
+    metrics = LoggerMetrics("Elk")
+    stats = NodeStats("https://node1.com:9201", metrics)
+    started = stats.start()
+    assert stats.outstanding == 1
+    stats.finish(started - 1)
+    assert stats.outstanding == 0
+    assert stats.ewma == pytest.approx(1, abs=0.01)
+    stats.finish(stats.start() - 2)
+    assert stats.ewma == pytest.approx(1.3, abs=0.01)
+    assert stats.latency(stats.updated) == stats.ewma
+    assert stats.latency(stats.updated + nodes.EWMA_DECAY) == pytest.approx(
+        stats.ewma / 2.718, rel=0.01
+    )
+    assert metrics.snapshot()["nodes"]["https://node1.com:9201"]["count"] == 2
+
+
+class MockConnection:
+    def __init__(self, node, ewma=0, outstanding=0):
+        self.stats = NodeStats(node)
+        self.stats.ewma = ewma
+        self.stats.outstanding = outstanding
+
+
+def test_latency_selector():
+    fast = MockConnection("fast", 0.01)
+    slow = MockConnection("slow", 0.1)
+    busy = MockConnection("busy", 0.01, 20)
+    selector = LatencySelector({})
+    assert selector.select([slow, fast, busy]) is fast
+    assert selector.select([slow, busy]) is slow
+    assert selector.select([slow, MockConnection("new")]).stats.node == "new"
+
+
+def test_least_outstanding_selector():
+    fast = MockConnection("fast", 0.01, 2)
+    slow = MockConnection("slow", 0.1, 1)
+    idle = MockConnection("idle", 0.2, 1)
+    selector = LeastOutstandingSelector({})
+    assert selector.select([fast, idle, slow]) is slow
+    assert selector.select([fast]) is fast
+
+
+def test_tracked_connection(mocker):
+    perform_request = mocker.patch.object(
+        Urllib3HttpConnection, "perform_request", return_value=(200, {}, "{}")
+    )
+    metrics = LoggerMetrics("Elk")
+    connection = TrackedConnection(host="node1.com", instrumentation=metrics)
+    assert connection.perform_request("GET", "/") == (200, {}, "{}")
+    perform_request.side_effect = ConnectionError()
+    with pytest.raises(ConnectionError):
+        connection.perform_request("GET", "/")
+    assert connection.stats.outstanding == 0
+    assert metrics.snapshot()["nodes"]["http://node1.com:9200"]["count"] == 2
+
+
+async def test_async_tracked_connection(mocker):
+    mocker.patch.object(
+        AIOHttpConnection,
+        "perform_request",
+        new_callable=mocker.AsyncMock,
+        return_value=(200, {}, "{}"),
+    )
+    connection = AsyncTrackedConnection(host="node1.com")
+    assert await connection.perform_request("GET", "/") == (200, {}, "{}")
+    assert connection.stats.outstanding == 0
+    assert connection.stats.ewma > 0
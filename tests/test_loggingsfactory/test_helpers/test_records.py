@@ -0,0 +1,13 @@
+import pytest
+from src.loggingsfactory.helpers.records import LogRecord
+
+
+def test_log_record():
+    record = LogRecord(20, "INFO", "abc", "2020-01-01T00:00:00.000Z", "func", "")
+    assert record.levelno == 20
+    assert record.level == "INFO"
+    assert record.message == "abc"
+    assert record.functionname == "func"
+    assert "func" in repr(record)
+    with pytest.raises(AttributeError):
+        record.extra = True
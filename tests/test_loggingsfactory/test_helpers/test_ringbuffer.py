@@ -0,0 +1,69 @@
+import pytest
+from src.loggingsfactory.helpers.ringbuffer import HEADER_SIZE, RingBuffer
+
+
+@pytest.fixture
+def ring():
+    ring = RingBuffer(size=64)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def test_ringbuffer_put_drain(ring):
+    assert ring.put(b"abc", b"def")
+    assert ring.put(b"ghi")
+    records = []
+    assert ring.drain(lambda record: records.append(bytes(record))) == 2
+    assert records == [b"abcdef", b"ghi"]
+    assert ring.used() == 0
+    assert ring.drain(records.append) == 0
+
+
+def test_ringbuffer_full(ring):
+    assert ring.put(b"x" * 28)
+    assert ring.put(b"x" * 28)
+    assert not ring.put(b"x")
+    assert not ring.put(b"x" * 61)
+    ring.drain(lambda record: None)
+    assert ring.put(b"x")
+
+
+def test_ringbuffer_records_do_not_wrap(ring):
+    records = []
+    for i in range(20):
+        assert ring.put(bytes([i]) * (5 + i % 7))
+        ring.drain(lambda record: records.append(bytes(record)))
+    assert records == [bytes([i]) * (5 + i % 7) for i in range(20)]
+    assert ring.head == ring.tail > ring.capacity
+
+
+def test_ringbuffer_attach(ring):
+    ring.put(b"abc")
+    consumer = RingBuffer(ring.name)
+    assert consumer.capacity == ring.capacity == len(ring.shm.buf) - HEADER_SIZE
+    records = []
+    consumer.drain(lambda record: records.append(bytes(record)))
+    assert records == [b"abc"]
+    assert ring.put(b"x" * 50)
+    consumer.close()
+
+    # a new consumer resumes from the tail position of the previous consumer
+    consumer = RingBuffer(ring.name)
+    consumer.drain(lambda record: records.append(len(record)))
+    assert records == [b"abc", 50]
+    consumer.close()
+
+
+def test_ringbuffer_drain_handler_exception(ring):
+    ring.put(b"a")
+    ring.put(b"b")
+
+    def handler(record):
+        raise ValueError(bytes(record))
+
+    with pytest.raises(ValueError):
+        ring.drain(handler)
+    records = []
+    ring.drain(lambda record: records.append(bytes(record)))
+    assert records == [b"b"]
@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+from src.loggingsfactory.helpers.sampling import (
+    SamplingScope,
+    hold_record,
+    release_records,
+    sampling_budget,
+    sampling_scope,
+)
+
+
+class MockLogger:
+    def __init__(self):
+        self.instrumentation = LoggerMetrics("MockLogger")
+        self.shipped = []
+
+    def _ship(self, level, document):
+        self.shipped.append((level, document))
+
+
+class MockAsyncLogger(MockLogger):
+    async def _ship(self, level, document):
+        self.shipped.append((level, document))
+
+
+def test_hold_record_without_scope():
+    logger = MockLogger()
+    assert hold_record(logger, 10, "DEBUG", "doc") == "doc"
+    assert release_records(logger) == []
+
+
+def test_sampling_scope_drops_without_error():
+    logger = MockLogger()
+    with SamplingScope() as scope:
+        assert sampling_scope.get() is scope
+        assert hold_record(logger, 10, "DEBUG", "debug") is None
+        assert hold_record(logger, 20, "INFO", "info") is None
+        assert hold_record(logger, 30, "WARNING", "warning") == "warning"
+        assert sampling_budget.held == 2
+    assert sampling_scope.get() is None
+    assert sampling_budget.held == 0
+    assert logger.shipped == []
+    assert logger.instrumentation.counters["sampled"] == 2
+
+
+def test_sampling_scope_releases_on_error():
+    logger = MockLogger()
+    with SamplingScope():
+        hold_record(logger, 10, "DEBUG", "debug")
+        hold_record(logger, 20, "INFO", "info")
+        assert hold_record(logger, 40, "ERROR", "error") is None
+        assert release_records(logger) == [
+            ("DEBUG", "debug"),
+            ("INFO", "info"),
+            ("ERROR", "error"),
+        ]
+        assert hold_record(logger, 10, "DEBUG", "after") == "after"
+    assert sampling_budget.held == 0
+    assert logger.instrumentation.counters["sampled"] == 0
+
+
+def test_sampling_scope_ships_other_loggers_on_exit():
+    logger, other = MockLogger(), MockLogger()
+    with SamplingScope():
+        hold_record(other, 20, "INFO", "other")
+        hold_record(logger, 50, "CRITICAL", "critical")
+    assert other.shipped == [("INFO", "other")]
+
+
+def test_sampling_scope_size():
+    logger = MockLogger()
+    with SamplingScope(size=2):
+        for i in range(4):
+            hold_record(logger, 10, "DEBUG", f"debug{i}")
+        assert sampling_budget.held == 2
+        hold_record(logger, 40, "ERROR", "error")
+        assert [document for _, document in release_records(logger)] == [
+            "debug2",
+            "debug3",
+            "error",
+        ]
+    assert logger.instrumentation.counters["sampled"] == 2
+
+
+def test_sampling_budget(monkeypatch):
+    monkeypatch.setattr(sampling_budget, "size", 3)
+    logger = MockLogger()
+    with SamplingScope():
+        for i in range(2):
+            hold_record(logger, 10, "DEBUG", f"first{i}")
+        with SamplingScope():
+            for i in range(2):
+                hold_record(logger, 10, "DEBUG", f"second{i}")
+            hold_record(logger, 40, "ERROR", "error")
+            assert [document for _, document in release_records(logger)] == [
+                "second0",
+                "error",
+            ]
+    assert logger.instrumentation.counters["sampled"] == 3
+    assert sampling_budget.held == 0
+
+
+async def test_sampling_scope_isolated_tasks():
+    logger = MockLogger()
+
+    async def request(failed):
+        async with SamplingScope():
+            hold_record(logger, 20, "INFO", f"info{failed}")
+            await asyncio.sleep(0)
+            if failed:
+                hold_record(logger, 40, "ERROR", "error")
+                return release_records(logger)
+            return []
+
+    released = await asyncio.gather(request(False), request(True))
+    assert released == [[], [("INFO", "infoTrue"), ("ERROR", "error")]]
+
+
+async def test_sampling_scope_async_loggers():
+    logger, other = MockAsyncLogger(), MockAsyncLogger()
+    async with SamplingScope():
+        hold_record(other, 20, "INFO", "other")
+        hold_record(logger, 40, "ERROR", "error")
+    assert other.shipped == [("INFO", "other")]
+
+
+def test_sampling_scope_async_loggers_outside_loop():
+    other = MockAsyncLogger()
+    other.loop = asyncio.new_event_loop()
+    logger = MockLogger()
+    with SamplingScope():
+        hold_record(other, 20, "INFO", "other")
+        hold_record(logger, 40, "ERROR", "error")
+    other.loop.close()
+    assert other.shipped == [("INFO", "other")]
+
+
+def test_sampling_scope_async_loggers_closed_loop():
+    other = MockAsyncLogger()
+    other.loop = None
+    logger = MockLogger()
+    with pytest.raises(RuntimeError, match="async with"):
+        with SamplingScope():
+            hold_record(other, 20, "INFO", "other")
+            hold_record(logger, 40, "ERROR", "error")
+    assert other.shipped == []
+    assert other.instrumentation.counters["sampled"] == 1
+    assert sampling_budget.held == 0
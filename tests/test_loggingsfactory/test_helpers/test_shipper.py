@@ -0,0 +1,252 @@
+import threading
+import time
+from src.loggingsfactory.helpers.backpressure import AdaptiveBatch
+from src.loggingsfactory.helpers.metrics import LoggerMetrics
+from src.loggingsfactory.helpers.shipper import BulkShipper, PriorityShipper
+
+
+def test_bulk_shipper_batches_by_size():
+    batches = []
+    shipper = BulkShipper(batches.append, 2, 10, 100)
+    for i in range(4):
+        assert shipper.put("INFO", str(i))
+    assert shipper.flush(5)
+    assert [len(batch) for batch in batches] == [2, 2]
+    assert batches[0] == [("INFO", "0"), ("INFO", "1")]
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_batches_by_interval():
+    batches = []
+    shipper = BulkShipper(batches.append, 100, 0.01, 100)
+    shipper.put("INFO", "a")
+    assert shipper.flush(5)
+    assert batches == [[("INFO", "a")]]
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_close_sends_queued_documents():
+    batches = []
+    shipper = BulkShipper(batches.append, 100, 10, 100)
+    shipper.put("INFO", "a")
+    shipper.put("ERROR", "b")
+    assert shipper.close(5)
+    assert batches == [[("INFO", "a"), ("ERROR", "b")]]
+    assert not shipper.thread.is_alive()
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_drops_when_queue_is_full():
+    release = threading.Event()
+    metrics = LoggerMetrics("Test")
+    shipper = BulkShipper(lambda batch: release.wait(5), 1, 10, 1, metrics)
+    shipper.put("INFO", "a")
+    while shipper.queue.qsize():
+        time.sleep(0.001)
+    assert shipper.put("INFO", "b")
+    assert not shipper.put("INFO", "c")
+    assert metrics.counters["drops"] == 1
+    release.set()
+    assert shipper.close(5)
+    assert metrics.enqueue_seconds.count == 2
+
+
+def test_bulk_shipper_drops_failed_batch():
+    metrics = LoggerMetrics("Test")
+
+    def send(batch):
+        raise ConnectionError("down")
+
+    shipper = BulkShipper(send, 2, 10, 100, metrics)
+    shipper.put("INFO", "a")
+    shipper.put("INFO", "b")
+    assert shipper.flush(5)
+    assert metrics.counters["drops"] == 2
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_restarts_in_forked_process(mocker):
+    batches = []
+    shipper = BulkShipper(batches.append, 1, 10, 100)
+    thread = shipper.thread
+    mocker.patch("os.getpid", return_value=shipper.pid + 1)
+    shipper.put("INFO", "a")
+    assert shipper.thread is not thread
+    assert shipper.flush(5)
+    assert batches == [[("INFO", "a")]]
+    assert shipper.close(5)
+    mocker.stopall()
+    assert thread.is_alive()
+
+
+def test_priority_shipper_urgent_lane_bypasses_batching():
+    batches = []
+    shipper = PriorityShipper(batches.append, 100, 10, 100)
+    shipper.put("INFO", "a")
+    shipper.put("ERROR", "b")
+    shipper.put("CRITICAL", "c")
+    assert shipper.urgent.flush(5)
+    assert [document for batch in batches for _, document in batch] == ["b", "c"]
+    assert not shipper.bulk.flush(0)
+    assert shipper.close(5)
+    assert batches[-1] == [("INFO", "a")]
+
+
+def test_priority_shipper_urgentlevel():
+    batches = []
+    shipper = PriorityShipper(batches.append, 100, 10, 100, urgentlevel=30)
+    shipper.put("WARNING", "a")
+    assert shipper.urgent.flush(5)
+    assert batches == [[("WARNING", "a")]]
+    assert shipper.close(5)
+
+
+def test_priority_shipper_sheds_low_levels_first():
+    release = threading.Event()
+    metrics = LoggerMetrics("Test")
+    shipper = PriorityShipper(
+        lambda batch: release.wait(5), 1, 10, 5, metrics, chunksize=1
+    )
+    shipper.put("INFO", "a")
+    while shipper.bulk.queue.qsize():
+        time.sleep(0.001)
+    for i in range(4):
+        assert shipper.put("DEBUG", str(i))
+    assert not shipper.put("INFO", "dropped")
+    assert shipper.put("WARNING", "kept")
+    assert not shipper.put("WARNING", "full")
+    assert shipper.put("ERROR", "urgent")
+    assert metrics.counters["drops"] == 2
+    release.set()
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_retries_failed_documents():
+    metrics = LoggerMetrics("Test")
+    batches = []
+
+    def send(batch):
+        batches.append(batch)
+        return batch[1:] if len(batches) == 1 else []
+
+    shipper = BulkShipper(send, 3, 10, 100, metrics)
+    for i in range(3):
+        shipper.put("INFO", str(i))
+    assert shipper.flush(5)
+    assert batches[1] == [("INFO", "1"), ("INFO", "2")]
+    assert metrics.counters["retries"] == 2
+    assert metrics.counters["drops"] == 0
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_retries_rejected_request(mocker):
+    mocker.patch("time.sleep")
+    metrics = LoggerMetrics("Test")
+    rejected = ConnectionError("too many requests")
+    rejected.status_code = 429
+
+    def send(batch):
+        raise rejected
+
+    shipper = BulkShipper(send, 2, 10, 100, metrics)
+    shipper.put("INFO", "a")
+    shipper.put("INFO", "b")
+    assert shipper.flush(5)
+    assert metrics.counters["retries"] == 6
+    assert metrics.counters["drops"] == 2
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_adaptive_batches():
+    metrics = LoggerMetrics("Test")
+    batches = []
+    controller = AdaptiveBatch(20, 2, 1, metrics)
+
+    def send(batch):
+        batches.append(batch)
+        return batch if len(batches) == 1 else []
+
+    shipper = BulkShipper(send, 20, 10, 100, metrics, controller)
+    for i in range(20):
+        shipper.put("INFO", str(i))
+    assert shipper.flush(5)
+    assert controller.size == 12
+    for i in range(12):
+        shipper.put("INFO", str(i))
+    assert shipper.flush(5)
+    assert [len(batch) for batch in batches] == [20, 20, 12]
+    assert metrics.gauges["batch_limit"] == 14
+    assert metrics.gauges["in_flight"] == 0
+    assert shipper.close(5)
+    assert shipper.executor._shutdown
+
+
+def test_bulk_shipper_concurrent_requests():
+    release = threading.Event()
+    metrics = LoggerMetrics("Test")
+    controller = AdaptiveBatch(1, 2, 10, metrics)
+    controller.concurrency = 2
+
+    shipper = BulkShipper(
+        lambda batch: release.wait(5), 1, 10, 100, metrics, controller
+    )
+    for i in range(3):
+        shipper.put("INFO", str(i))
+    deadline = time.monotonic() + 5
+    while metrics.gauges["in_flight"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert shipper.inflight == 2
+    assert shipper.pending == 3
+    release.set()
+    assert shipper.close(5)
+    assert shipper.pending == 0
+
+
+def test_bulk_shipper_thread_buffers():
+    batches = []
+    shipper = BulkShipper(batches.append, 3, 10, 100, chunksize=2)
+    for i in range(3):
+        assert shipper.put("INFO", str(i))
+    assert shipper.queued == 2
+    assert list(shipper.local.buffer) == [("INFO", "2")]
+    assert shipper.flush(5)
+    assert batches == [[("INFO", "0"), ("INFO", "1"), ("INFO", "2")]]
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_thread_buffers_of_exited_threads():
+    batches = []
+    shipper = BulkShipper(batches.append, 100, 0.001, 100, chunksize=100)
+    threads = [
+        threading.Thread(target=shipper.put, args=("INFO", str(i))) for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    deadline = time.monotonic() + 5
+    while shipper.pending + shipper.queued == 0 and not batches:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    assert shipper.flush(5)
+    assert sorted(document for batch in batches for _, document in batch) == [
+        "0",
+        "1",
+        "2",
+        "3",
+    ]
+    assert len(shipper.buffers) == 0
+    assert shipper.close(5)
+
+
+def test_bulk_shipper_thread_buffers_queue_is_full():
+    release = threading.Event()
+    metrics = LoggerMetrics("Test")
+    shipper = BulkShipper(
+        lambda batch: release.wait(5), 100, 10, 3, metrics, chunksize=2
+    )
+    for i in range(3):
+        assert shipper.put("INFO", str(i))
+    assert not shipper.put("INFO", "3")
+    assert metrics.counters["drops"] == 1
+    release.set()
+    assert shipper.close(5)
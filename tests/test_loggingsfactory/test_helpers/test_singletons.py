@@ -7,3 +7,5 @@ def test_logcounter():
     assert logcounter.counter == 0
     logcounter.increment()
     assert logcounter.counter == 1
+    logcounter.increment(3)
+    assert logcounter.counter == 4
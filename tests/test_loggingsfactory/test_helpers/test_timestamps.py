@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+from src.loggingsfactory.helpers.timestamps import (
+    HybridClock,
+    TimestampProvider,
+    timestamps,
+)
+
+
+def test_hybridclock():
+    monotonic = [100.0]
+    clock = HybridClock(lambda: 1000.0, lambda: monotonic[0])
+    assert clock() == 1000.0
+    monotonic[0] = 101.5
+    assert clock() == 1001.5
+
+
+def test_timestampprovider():
+    now = [1577836800.25]
+    provider = TimestampProvider(lambda: now[0])
+    assert provider.now() == "2020-01-01T00:00:00.250000+00:00"
+    assert provider.cache == (1577836800, "2020-01-01T00:00:00")
+    now[0] = 1577836800.5
+    assert provider.now() == "2020-01-01T00:00:00.500000+00:00"
+    now[0] = 1577836861.000001
+    assert provider.now() == "2020-01-01T00:01:01.000001+00:00"
+    assert provider.cache == (1577836861, "2020-01-01T00:01:01")
+
+
+def test_timestampprovider_matches_datetime():
+    now = 1650000000.123456
+    provider = TimestampProvider(lambda: now)
+    expected = datetime.fromtimestamp(now, timezone.utc)
+    assert abs(datetime.fromisoformat(provider.now()) - expected) <= timedelta(
+        microseconds=1
+    )
+
+
+def test_timestamps():
+    assert isinstance(timestamps, TimestampProvider)
+    assert timestamps.now().endswith("+00:00")
+
+
+def test_timestampprovider_format():
+    provider = TimestampProvider(lambda: 0)
+    assert provider.format(1577836861.25) == "2020-01-01T00:01:01.250000+00:00"
+    assert provider.cache == (1577836861, "2020-01-01T00:01:01")
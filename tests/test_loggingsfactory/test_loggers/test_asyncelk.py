@@ -1,4 +1,9 @@
-from elasticsearch import AsyncElasticsearch
+import asyncio
+import gzip
+import threading
+import aiohttp
+from elasticsearch import AIOHttpConnection, AsyncElasticsearch
+from elasticsearch._async.client.indices import IndicesClient
 from loguru import logger
 import pytest
 from src.loggingsfactory.loggers.asyncelk import AsyncElk
@@ -140,6 +145,122 @@ async def test_async_elk_async_log(mocker, caplog):
     assert logdata in caplog.text
 
 
+async def test_async_elk_async_log_many(mocker):
+    bulk = mocker.patch.object(
+        AsyncElasticsearch, "bulk", new_callable=mocker.AsyncMock
+    )
+
+    appname = "abc"
+    host = "https://localhost.com:9201"
+    debug = False
+    index = "appindex"
+    username = "user"
+    pw = "pw"
+
+    es = AsyncElk(
+        debug=debug, appname=appname, host=host, index=index, username=username, pw=pw
+    )
+    await es.async_log_many([("info", "test123"), ("error", "test456")])
+    assert bulk.await_count == 1
+    body = bulk.call_args.kwargs["body"].splitlines()
+    assert len(body) == 4
+    assert "test_async_elk_async_log_many" in body[3]
+
+
+async def test_async_elk_async_log_compressed(mocker):
+    request = mocker.patch.object(
+        AIOHttpConnection,
+        "perform_request",
+        new_callable=mocker.AsyncMock,
+        return_value=(200, {}, '{"errors": false, "items": []}'),
+    )
+
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        compression="gzip",
+    )
+    es.es.transport._verified_elasticsearch = True
+    await es.async_log("info", "test123")
+    assert "content-encoding" not in request.call_args.kwargs["headers"]
+    await es.async_log_many([("info", "test123")] * 20)
+    method, url, _, body = request.call_args.args
+    assert (method, url) == ("POST", "/_bulk")
+    assert request.call_args.kwargs["headers"]["content-encoding"] == "gzip"
+    assert len(gzip.decompress(body).decode().splitlines()) == 40
+
+
+async def test_async_elk_async_log_many_counts_failed_items(mocker, caplog):
+    mocker.patch.object(
+        AsyncElasticsearch,
+        "bulk",
+        new_callable=mocker.AsyncMock,
+        return_value={
+            "errors": True,
+            "items": [{"index": {"status": 201}}, {"index": {"status": 400}}],
+        },
+    )
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        metrics=True,
+    )
+    await es.async_log_many([("info", "test123"), ("error", "test456")])
+    counters = es.metrics()["counters"]
+    assert counters["records"] == 1
+    assert counters["failures"] == 1
+    assert "Dropped 1 log documents, Elasticsearch rejected them" in caplog.text
+
+
+async def test_async_elk_async_log_index_template(mocker):
+    index = mocker.patch.object(
+        AsyncElasticsearch, "index", new_callable=mocker.AsyncMock
+    )
+    search = mocker.patch.object(
+        AsyncElasticsearch, "search", new_callable=mocker.AsyncMock
+    )
+
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="logs-{appname}-{date:%Y.%m.%d}",
+        username="user",
+        pw="pw",
+    )
+    es.router.clock = lambda: 1632441600
+    await es.async_log("info", "test123")
+    assert index.call_args.kwargs["index"] == "logs-abc-2021.09.24"
+    assert index.call_args.kwargs["op_type"] == "index"
+    await es.async_query(start="2021-09-23T00:00:00Z")
+    assert search.call_args.kwargs["index"] == (
+        "logs-abc-2021.09.23,logs-abc-2021.09.24"
+    )
+
+
+def test_async_elk_log_many():
+    appname = "abc"
+    host = "https://localhost.com:9201"
+    debug = False
+    index = "appindex"
+    username = "user"
+    pw = "pw"
+
+    es = AsyncElk(
+        debug=debug, appname=appname, host=host, index=index, username=username, pw=pw
+    )
+    with pytest.raises(NotImplementedError):
+        es.log_many([("info", "test123")])
+
+
 def test_async_elk_log():
     logdata = "test123"
     level = "info"
@@ -194,3 +315,180 @@ def test_async_elk_query():
     )
     with pytest.raises(NotImplementedError):
         es.query()
+
+
+async def test_async_elk_async_ensure_index_template(mocker):
+    put = mocker.patch.object(
+        IndicesClient, "put_index_template", new_callable=mocker.AsyncMock
+    )
+
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="asynctemplated",
+        username="user",
+        pw="pw",
+    )
+    assert await es.async_ensure_index_template()
+    assert not await es.async_ensure_index_template()
+    assert put.await_count == 1
+    assert put.call_args.kwargs["body"]["index_patterns"] == ["asynctemplated"]
+
+
+def test_async_elk_ensure_index_template():
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+    )
+    with pytest.raises(NotImplementedError):
+        es.ensure_index_template()
+
+
+async def test_async_elk_async_log_tail_sampling(mocker):
+    index = mocker.patch.object(
+        AsyncElasticsearch, "index", new_callable=mocker.AsyncMock
+    )
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+    )
+    async with es.tail_sampling():
+        await es.async_log("info", "dropped")
+    async with es.tail_sampling():
+        await es.async_log("debug", "held")
+        await es.async_log("exception", "failed")
+    documents = [call.kwargs["document"] for call in index.call_args_list]
+    assert len(documents) == 2
+    assert "held" in documents[0]
+    assert "failed" in documents[1]
+
+
+async def test_async_elk_aclose(mocker):
+    index = mocker.patch.object(
+        AsyncElasticsearch, "index", new_callable=mocker.AsyncMock
+    )
+    close = mocker.patch.object(
+        AsyncElasticsearch, "close", new_callable=mocker.AsyncMock
+    )
+    async with AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        dedupwindow=60,
+    ) as es:
+        await es.async_log("info", "repeated")
+        await es.async_log("info", "repeated")
+        with pytest.raises(RuntimeError):
+            es.close()
+    assert es.closed
+    assert close.await_count == 1
+    assert '"count": 2' in index.call_args.kwargs["document"]
+    assert await es.aclose() == 0
+
+
+def test_async_elk_close(mocker):
+    close = mocker.patch.object(
+        AsyncElasticsearch, "close", new_callable=mocker.AsyncMock
+    )
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+    )
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(asyncio.sleep(0))
+    es.loop = loop
+    assert es.close() == 0
+    assert close.await_count == 1
+    assert es.closed
+    loop.close()
+
+
+def test_async_elk_close_loop_in_thread(mocker):
+    close = mocker.patch.object(
+        AsyncElasticsearch, "close", new_callable=mocker.AsyncMock
+    )
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+    )
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    es.loop = loop
+    assert es.close() == 0
+    assert close.await_count == 1
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_async_elk_close_closed_loop(mocker, caplog):
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        dedupwindow=60,
+    )
+
+    async def use():
+        await es.async_log("info", "repeated")
+        await es.async_log("info", "repeated")
+        connection = AIOHttpConnection()
+        connection.session = aiohttp.ClientSession()
+        es.es.transport.connection_pool.connections = [connection]
+
+    mocker.patch.object(AsyncElasticsearch, "index", new_callable=mocker.AsyncMock)
+    asyncio.run(use())
+    session = es.es.transport.connection_pool.connections[0].session
+    close = mocker.spy(AsyncElasticsearch, "close")
+    assert es.close() == 1
+    assert close.call_count == 1
+    assert session.closed
+    assert "AsyncElk logger closed with 1 records left unsent" in caplog.text
+
+
+async def test_async_elk_ships_summaries_without_log_call(mocker):
+    index = mocker.patch.object(
+        AsyncElasticsearch, "index", new_callable=mocker.AsyncMock
+    )
+    mocker.patch.object(AsyncElasticsearch, "close", new_callable=mocker.AsyncMock)
+    es = AsyncElk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        dedupwindow=0.05,
+    )
+    await es.async_log("info", "repeated")
+    await es.async_log("info", "repeated")
+    for _ in range(500):
+        if index.await_count == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert '"count": 2' in index.call_args.kwargs["document"]
+    await es.aclose()
@@ -1,4 +1,8 @@
-from elasticsearch import Elasticsearch
+import gzip
+import json
+import threading
+from elasticsearch import Elasticsearch, Urllib3HttpConnection
+from elasticsearch.client import IndicesClient
 from loguru import logger
 import pytest
 from src.loggingsfactory.loggers.elk import Elk
@@ -138,6 +142,161 @@ def test_elk_log(mocker, caplog):
     assert logdata in caplog.text
 
 
+def test_elk_log_many(mocker):
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+
+    appname = "abc"
+    host = "https://localhost.com:9201"
+    debug = False
+    index = "appindex"
+    username = "user"
+    pw = "pw"
+
+    es = Elk(
+        debug=debug, appname=appname, host=host, index=index, username=username, pw=pw
+    )
+    es.log_many([("info", "test123"), ("error", "test456")])
+    assert bulk.call_count == 1
+    body = bulk.call_args.kwargs["body"].splitlines()
+    assert len(body) == 4
+    assert "test123" in body[1]
+    assert "test456" in body[3]
+    assert "test_elk_log_many" in body[3]
+
+    es.log_many([])
+    assert bulk.call_count == 1
+
+
+def test_elk_log_metrics(mocker):
+    index = mocker.patch.object(Elasticsearch, "index")
+    mocker.patch.object(Elasticsearch, "bulk")
+
+    appname = "abc"
+    host = "https://localhost.com:9201"
+    debug = False
+    username = "user"
+    pw = "pw"
+
+    es = Elk(
+        debug=debug,
+        appname=appname,
+        host=host,
+        index="appindex",
+        username=username,
+        pw=pw,
+        metrics=True,
+    )
+    es.log("info", "test123")
+    es.log_many([("info", "test123"), ("error", "test456")])
+    index.side_effect = ConnectionError()
+    with pytest.raises(ConnectionError):
+        es.log("info", "test123")
+    metrics = es.metrics()
+    assert metrics["histograms"]["format_seconds"]["count"] == 3
+    assert metrics["histograms"]["ship_seconds"]["count"] == 2
+    assert metrics["histograms"]["batch_size"]["sum"] == 3
+    assert metrics["counters"]["records"] == 3
+    assert metrics["counters"]["failures"] == 1
+
+
+def test_elk_log_buffered(mocker):
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+    index = mocker.patch.object(Elasticsearch, "index")
+
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        buffered=True,
+        batchsize=3,
+        flushinterval=10,
+    )
+    es.log("info", "test123")
+    es.log_many([("info", "test456"), ("warning", "test789")])
+    assert es.shipper.flush(5)
+    assert index.call_count == 0
+    assert bulk.call_count == 1
+    body = bulk.call_args.kwargs["body"].splitlines()
+    assert len(body) == 6
+    assert "test123" in body[1]
+    assert "test789" in body[5]
+    assert es.shipper.close(5)
+
+
+def test_elk_log_compressed(mocker):
+    request = mocker.patch.object(
+        Urllib3HttpConnection,
+        "perform_request",
+        return_value=(200, {}, '{"errors": false, "items": []}'),
+    )
+
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        compression="gzip",
+        metrics=True,
+    )
+    es.es.transport._verified_elasticsearch = True
+    es.log("info", "test123")
+    assert "content-encoding" not in request.call_args.kwargs["headers"]
+    document = request.call_args.args[3]
+    es.log_many([("info", "test123")] * 20)
+    method, url, _, body = request.call_args.args
+    assert (method, url) == ("POST", "/_bulk")
+    assert request.call_args.kwargs["headers"]["content-encoding"] == "gzip"
+    # the body is the gzip stream unchanged, e.g. without a trailing newline
+    lines = gzip.decompress(body).decode().splitlines()
+    assert len(lines) == 40
+    metrics = es.metrics()
+    assert metrics["histograms"]["compression_ratio"]["count"] == 1
+    assert metrics["histograms"]["shipped_bytes"]["sum"] == len(document) + len(body)
+
+
+def test_elk_log_index_template(mocker):
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+    index = mocker.patch.object(Elasticsearch, "index")
+
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="logs-{appname}-{date:%Y.%m.%d}",
+        username="user",
+        pw="pw",
+        datastream=True,
+    )
+    es.router.clock = lambda: 1632441600
+    es.log("info", "test123")
+    assert index.call_args.kwargs["index"] == "logs-abc-2021.09.24"
+    assert index.call_args.kwargs["op_type"] == "create"
+    es.log_many([("info", "test123")])
+    assert json.loads(bulk.call_args.kwargs["body"].splitlines()[0]) == {
+        "create": {"_index": "logs-abc-2021.09.24"}
+    }
+
+
+async def test_elk_async_log_many():
+    appname = "abc"
+    host = "https://localhost.com:9201"
+    debug = False
+    index = "appindex"
+    username = "user"
+    pw = "pw"
+
+    es = Elk(
+        debug=debug, appname=appname, host=host, index=index, username=username, pw=pw
+    )
+    with pytest.raises(NotImplementedError):
+        await es.async_log_many([("info", "test123")])
+
+
 async def test_elk_async_log():
     logdata = "test123"
     level = "info"
@@ -177,6 +336,24 @@ def test_elk_query(mocker):
     assert es.query() == expected
 
 
+def test_elk_query_index_template(mocker):
+    search = mocker.patch.object(Elasticsearch, "search")
+
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="logs-{date:%Y.%m.%d}",
+        username="user",
+        pw="pw",
+    )
+    es.query(start="2021-09-23T12:00:00Z", end="2021-09-24T12:00:00Z")
+    assert search.call_args.kwargs["index"] == "logs-2021.09.23,logs-2021.09.24"
+    assert search.call_args.kwargs["ignore_unavailable"]
+    es.query()
+    assert search.call_args.kwargs["index"] == "logs-*"
+
+
 async def test_elk_async_query():
     appname = "abc"
     host = "https://localhost.com:9201"
@@ -190,3 +367,216 @@ async def test_elk_async_query():
     )
     with pytest.raises(NotImplementedError):
         await es.async_query()
+
+
+def test_elk_ensure_index_template(mocker):
+    put = mocker.patch.object(IndicesClient, "put_index_template")
+    search = mocker.patch.object(Elasticsearch, "search")
+
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="templated-{appname}-{date:%Y.%m.%d}",
+        username="user",
+        pw="pw",
+    )
+    es.query()
+    assert "app_name.keyword" in json.dumps(search.call_args.kwargs["body"])
+
+    put.side_effect = ConnectionError()
+    with pytest.raises(ConnectionError):
+        es.ensure_index_template()
+    put.side_effect = None
+    assert es.ensure_index_template(shards=2)
+    assert not es.ensure_index_template()
+    assert put.call_count == 2
+    assert put.call_args.kwargs["name"] == "loggingsfactory-templated-abc"
+    body = put.call_args.kwargs["body"]
+    assert body["index_patterns"] == ["templated-abc-*"]
+    assert body["template"]["settings"]["number_of_shards"] == 2
+
+    es.query()
+    assert "app_name.keyword" not in json.dumps(search.call_args.kwargs["body"])
+
+
+async def test_elk_async_ensure_index_template():
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+    )
+    with pytest.raises(NotImplementedError):
+        await es.async_ensure_index_template()
+
+
+def test_elk_log_tail_sampling(mocker):
+    index = mocker.patch.object(Elasticsearch, "index")
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        metrics=True,
+    )
+    with es.tail_sampling():
+        es.log("info", "dropped")
+    assert not index.called
+    assert es.metrics()["counters"]["sampled"] == 1
+
+    with es.tail_sampling():
+        es.log("debug", "held")
+        es.log("info", "held")
+        es.log("warning", "shipped")
+        assert index.call_count == 1
+        es.log("error", "failed")
+    documents = [json.loads(call.kwargs["document"]) for call in index.call_args_list]
+    assert [document["logger_level"] for document in documents] == [
+        "WARNING",
+        "DEBUG",
+        "INFO",
+        "ERROR",
+    ]
+
+
+def test_elk_log_buffered_urgent(mocker):
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        buffered=True,
+        flushinterval=10,
+    )
+    es.log("info", "test123")
+    es.log("error", "test456")
+    assert es.shipper.urgent.flush(5)
+    assert bulk.call_count == 1
+    assert "test456" in bulk.call_args.kwargs["body"]
+    assert es.shipper.close(5)
+    assert "test123" in bulk.call_args.kwargs["body"]
+
+
+def test_elk_log_buffered_retries_rejected_items(mocker):
+    rejected = {
+        "index": {"status": 429, "error": {"type": "es_rejected_execution_exception"}}
+    }
+    bulk = mocker.patch.object(
+        Elasticsearch,
+        "bulk",
+        side_effect=[
+            {"errors": True, "items": [{"index": {"status": 201}}, rejected]},
+            {"errors": False, "items": [{"index": {"status": 201}}]},
+        ],
+    )
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        buffered=True,
+        batchsize=2,
+        flushinterval=10,
+        metrics=True,
+    )
+    es.log("info", "test123")
+    es.log("info", "test456")
+    assert es.shipper.flush(5)
+    assert bulk.call_count == 2
+    body = bulk.call_args.kwargs["body"].splitlines()
+    assert len(body) == 2
+    assert "test456" in body[1]
+    metrics = es.metrics()
+    assert metrics["counters"]["retries"] == 1
+    assert metrics["counters"]["records"] == 2
+    assert metrics["gauges"]["batch_limit"] == 2
+    assert es.shipper.close(5)
+
+
+def test_elk_log_many_counts_failed_items(mocker, caplog):
+    mocker.patch.object(
+        Elasticsearch,
+        "bulk",
+        return_value={
+            "errors": True,
+            "items": [
+                {"index": {"status": 201}},
+                {
+                    "index": {
+                        "status": 400,
+                        "error": {"type": "mapper_parsing_exception"},
+                    }
+                },
+                {"index": {"status": 429}},
+            ],
+        },
+    )
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        metrics=True,
+    )
+    es.log_many([("info", "test123")] * 3)
+    counters = es.metrics()["counters"]
+    assert counters["records"] == 1
+    assert counters["failures"] == 2
+    # the rejected item and the item which is not retried without a shipper
+    assert (
+        caplog.text.count("Dropped 1 log documents, Elasticsearch rejected them") == 2
+    )
+
+
+def test_elk_close(mocker):
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+    close = mocker.patch.object(Elasticsearch, "close")
+    with Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        buffered=True,
+        flushinterval=10,
+    ) as es:
+        es.log("info", "test123")
+    assert es.closed
+    assert "test123" in bulk.call_args.kwargs["body"]
+    assert close.call_count == 1
+    assert es.close() == 0
+    assert close.call_count == 1
+
+
+def test_elk_close_reports_unsent(mocker, caplog):
+    released = threading.Event()
+    mocker.patch.object(Elasticsearch, "bulk", side_effect=lambda **_: released.wait(5))
+    mocker.patch.object(Elasticsearch, "close")
+    es = Elk(
+        debug=False,
+        appname="abc",
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        buffered=True,
+        flushinterval=10,
+        shutdowntimeout=0.05,
+    )
+    es.log("info", "test123")
+    assert es.close() == 1
+    assert "Elk logger closed with 1 records left unsent" in caplog.text
+    released.set()
@@ -17,12 +17,27 @@ class MockLogger(LoggerInterface):
     async def async_log(self):
         pass
 
+    def log_many(self):
+        pass
+
+    async def async_log_many(self):
+        pass
+
+    def _ship(self):
+        pass
+
     def query(self):
         pass
 
     async def async_query(self):
         pass
 
+    def ensure_index_template(self):
+        pass
+
+    async def async_ensure_index_template(self):
+        pass
+
 
 def test_loggerinterface_init_missing_appname_key():
     with pytest.raises(KeyError):
@@ -136,3 +151,22 @@ def test_loggerinterface_sql_query(monkeypatch):
     )
 
     assert test.sql_query(query) == "mock pandas"
+
+
+def test_loggerinterface_init_minlevel():
+    appname = "test"
+    assert MockLogger(appname=appname).minlevel == 10
+    assert MockLogger(appname=appname, minlevel="error").minlevel == 40
+    with pytest.raises(ValueError):
+        MockLogger(appname=appname, minlevel="abc")
+
+
+def test_loggerinterface_metrics():
+    appname = "test"
+    test = MockLogger(appname=appname)
+    assert test.instrumentation is None
+    assert test.metrics() == {}
+    assert test.prometheus_metrics() == ""
+    test = MockLogger(appname=appname, metrics=True)
+    assert test.metrics()["backend"] == "MockLogger"
+    assert 'backend="MockLogger"' in test.prometheus_metrics()
@@ -94,6 +94,82 @@ def test_loguru_log_custom_logdata(caplog):
     assert level in caplog.text
 
 
+def test_loguru_log_minlevel(caplog):
+    appname = "test"
+    test = Loguru(appname=appname, minlevel="warning")
+    assert test.minlevel == 30
+    test.log("INFO", "abc123")
+    assert "abc123" not in caplog.text
+    test.log("WARNING", lambda: "def456")
+    assert "def456" in caplog.text
+    test.log("ERROR", "{} {}", logargs=["ghi", lambda: 789])
+    assert "ghi 789" in caplog.text
+
+
+def test_loguru_log_dedupwindow(caplog):
+    appname = "test"
+    logdata = "abc123"
+    test = Loguru(appname=appname, dedupwindow=60)
+    level = "ERROR"
+    for _ in range(5):
+        test.log(level, logdata)
+    assert caplog.text.count(logdata) == 1
+    test.deduplicator.window = 0
+    test.log(level, logdata)
+    assert caplog.text.count(logdata) == 3
+    assert '"count": 5' in caplog.text
+
+
+def test_loguru_log_dedupwindow_list_logdata(caplog):
+    test = Loguru(appname="test", dedupwindow=60)
+    for _ in range(3):
+        test.log("info", ["a", "b"])
+    test.log_many([("info", ["a", "b"]), ("info", ["a", "c"])])
+    assert caplog.text.count('["a", "b"]') == 1
+    assert caplog.text.count('["a", "c"]') == 1
+    test.deduplicator.window = 0
+    test.log("info", ["a", "b"])
+    summary = json.loads(caplog.records[-2].getMessage().split(" {")[0])
+    assert summary["log"] == ["a", "b"]
+    assert summary["count"] == 4
+
+
+def test_loguru_log_many(caplog):
+    appname = "test"
+    test = Loguru(appname=appname)
+    test.log_many([("info", "abc"), ("info", "def"), ("error", "ghi")])
+    # one message per record, followed by the total logs count
+    assert len(caplog.records) == 4
+    assert "abc" in caplog.records[0].getMessage()
+    assert "def" in caplog.records[1].getMessage()
+    assert "ghi" in caplog.records[2].getMessage()
+    assert caplog.records[2].levelname == "ERROR"
+    assert "test_loguru_log_many" in caplog.text
+
+
+async def test_loguru_async_log_many(caplog):
+    appname = "test"
+    test = Loguru(appname=appname)
+    await test.async_log_many([("info", "abc"), ("warning", "def")])
+    assert "abc" in caplog.text
+    assert "def" in caplog.text
+    assert "test_loguru_async_log_many" in caplog.text
+
+
+def test_loguru_log_metrics():
+    appname = "test"
+    test = Loguru(appname=appname, metrics=True, minlevel="info")
+    test.log("info", "abc123")
+    test.log("debug", "abc123")
+    test.log_many([("info", "abc"), ("info", "def"), ("error", "ghi")])
+    metrics = test.metrics()
+    assert metrics["histograms"]["format_seconds"]["count"] == 3
+    assert metrics["histograms"]["ship_seconds"]["count"] == 2
+    assert metrics["histograms"]["batch_size"]["sum"] == 4
+    assert metrics["counters"]["records"] == 4
+    assert metrics["counters"]["filtered"] == 1
+
+
 async def test_loguru_async_log(caplog):
     appname = "test"
     logdata = "abc123"
@@ -121,3 +197,61 @@ def test_loguru_sql_query():
     appname = "test"
     test = Loguru(appname=appname)
     assert test.sql_query() is None
+
+
+async def test_loguru_async_log_background(caplog):
+    test = Loguru(appname="test", useasync=True, metrics=True)
+    await test.async_log("info", "abc123")
+    await test.async_log_many([("info", "abc"), ("warning", "def")])
+    assert await test.complete(5)
+    assert "abc123" in caplog.text
+    assert "def" in caplog.text
+    assert "test_loguru_async_log_background" in caplog.text
+    metrics = test.metrics()
+    assert metrics["histograms"]["enqueue_seconds"]["count"] == 3
+    assert metrics["counters"]["records"] == 3
+    assert test.writer.close(5)
+
+
+async def test_loguru_complete_without_writer():
+    test = Loguru(appname="test")
+    assert test.writer is None
+    assert await test.complete()
+
+
+def test_loguru_log_bound_context(caplog):
+    test = Loguru(appname="test")
+    token = test.bind(request_id="abc123")
+    with test.contextualize(user_id=7):
+        test.log("info", "def")
+    test.unbind(token)
+    test.log("info", "ghi")
+    records = [
+        json.JSONDecoder().raw_decode(r.message)[0]
+        for r in caplog.records
+        if r.message[0] == "{"
+    ]
+    assert records[0]["request_id"] == "abc123"
+    assert records[0]["user_id"] == 7
+    assert "request_id" not in records[1]
+
+
+def test_loguru_log_tail_sampling(caplog):
+    test = Loguru(appname="test", samplingsize=2)
+    with test.tail_sampling() as scope:
+        assert scope.size == 2
+        test.log("debug", "dropped")
+    assert "dropped" not in caplog.text
+    with test.tail_sampling():
+        test.log("info", "held")
+        assert "held" not in caplog.text
+        test.log("error", "failed")
+    assert caplog.text.index("held") < caplog.text.index("failed")
+
+
+async def test_loguru_aclose(caplog):
+    async with Loguru(appname="test", useasync=True) as test:
+        await test.async_log("info", "abc123")
+    assert test.closed
+    assert not test.writer.thread.is_alive()
+    assert "abc123" in caplog.text
@@ -0,0 +1,92 @@
+import threading
+from elasticsearch import Elasticsearch
+import pytest
+from src.loggingsfactory.loggers.loguru import Loguru
+from src.loggingsfactory.loggers.tee import Tee
+from src.loggingsfactory.logging import Loggers
+
+CONFIG = {
+    "appname": "abc",
+    "debug": False,
+    "host": "https://localhost.com:9201",
+    "index": "appindex",
+    "username": "user",
+    "pw": "pw",
+}
+
+
+def test_tee_init_missing_host_key():
+    with pytest.raises(KeyError):
+        Tee(appname="abc", debug=False)
+
+
+def test_loggers_tee():
+    tee = Loggers(**CONFIG, tee=True)
+    assert isinstance(tee, Tee)
+    assert isinstance(tee.backends["loguru"], Loguru)
+    assert tee.backends["elk"].shipper is None
+
+
+def test_tee_log(mocker, caplog):
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+    tee = Tee(**CONFIG, flushinterval=0.001, metrics=True)
+    tee.log("info", "test123")
+    tee.log_many([("info", "test456"), ("debug", "test789")])
+    assert tee.flush(5)
+    assert "test123" in caplog.text
+    assert "test789" in caplog.text
+    body = "".join(call.kwargs["body"] for call in bulk.call_args_list).splitlines()
+    assert len(body) == 6
+    assert body[1] in caplog.text
+    metrics = tee.metrics()
+    assert metrics["histograms"]["format_seconds"]["count"] == 2
+    assert metrics["backends"]["loguru"]["counters"]["records"] == 3
+    assert metrics["backends"]["elk"]["counters"]["records"] == 3
+
+
+def test_tee_log_elk_isolated(mocker, caplog):
+    released = threading.Event()
+
+    def slow_bulk(*args, **kwargs):
+        released.wait(5)
+        raise ConnectionError()
+
+    mocker.patch.object(Elasticsearch, "bulk", side_effect=slow_bulk)
+    tee = Tee(**CONFIG, flushinterval=0.001, metrics=True)
+    for i in range(5):
+        tee.log("info", f"isolated{i}")
+    assert tee.shippers["loguru"].flush(5)
+    assert "isolated4" in caplog.text
+    assert not tee.shippers["elk"].flush(0.01)
+    released.set()
+    assert tee.shippers["elk"].flush(5)
+    assert tee.backends["elk"].metrics()["counters"]["drops"] == 5
+
+
+async def test_tee_async_log(mocker, caplog):
+    mocker.patch.object(Elasticsearch, "bulk")
+    search = mocker.patch.object(Elasticsearch, "search", return_value="query")
+    tee = Tee(**CONFIG, flushinterval=0.001)
+    await tee.async_log("info", "test123")
+    await tee.async_log_many([("info", "test456")])
+    assert tee.flush(5)
+    assert "test_tee_async_log" in caplog.text
+    assert await tee.async_query() == "query"
+    assert tee.query(size=1) == "query"
+    assert search.call_args.kwargs["size"] == 1
+
+
+def test_tee_shares_the_loguru_file_sink(mocker, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mocker.patch.object(Elasticsearch, "bulk")
+    loguru = Loguru(appname="abc")
+    tee = Tee(**CONFIG)
+    loguru.log("info", "written once")
+    assert tee.close(5) == 0
+    loguru.log("info", "written after tee closed")
+    assert loguru.close(5) == 0
+    loguru.logger.info("written after every logger closed")
+    content = (tmp_path / "logs" / "logfile.log").read_text()
+    assert content.count("written once") == 1
+    assert content.count("written after tee closed") == 1
+    assert "written after every logger closed" not in content
@@ -1,9 +1,10 @@
+import gc
 import pytest
 from elasticsearch import Elasticsearch, AsyncElasticsearch
 from loguru import logger
 from src.loggingsfactory.loggers.asyncelk import AsyncElk
 from src.loggingsfactory.loggers.elk import Elk
-from src.loggingsfactory.loggers.loguru import Loguru
+from src.loggingsfactory.loggers.loguru import Loguru, filesinks
 from src.loggingsfactory.logging import Loggers
 
 
@@ -148,3 +149,117 @@ async def test_loggers_async_elk(mocker, caplog):
     await es.async_log(level, logdata)
     assert logdata in caplog.text
     assert isinstance(es, AsyncElk)
+
+
+def test_loggers_registry():
+    test = Loggers(appname="registry")
+    assert Loggers(appname="registry", debug=True, version=None) is test
+    assert Loggers.get(appname="registry") is test
+    assert Loggers(appname="registry", minlevel="error") is not test
+    assert Loggers.get(appname="other") is None
+
+    host = ["https://es1.com:9201", "https://es2.com:9201"]
+    config = dict(
+        appname="registry", debug=False, host=host, index="i", username="u", pw="p"
+    )
+    es = Loggers(**config)
+    assert isinstance(es, Elk)
+    assert Loggers(**{**config, "host": list(host)}) is es
+
+    test.close()
+    assert Loggers.get(appname="registry") is None
+
+
+def test_loggers_registry_reused_by_function_scope(mocker):
+    mocker.patch.object(Elasticsearch, "index")
+    mocker.patch.object(Elasticsearch, "close")
+    config = dict(
+        appname="handler",
+        debug=False,
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+    )
+    clients = []
+
+    def handler():
+        Loggers(appname="handler").log("info", "handled")
+        es = Loggers(**config)
+        es.log("info", "handled")
+        clients.append(es.es)
+
+    handler()
+    sinks = {path: sink[:] for path, sink in filesinks.sinks.items()}
+    for _ in range(3):
+        handler()
+        gc.collect()
+    assert filesinks.sinks == sinks
+    assert all(client is clients[0] for client in clients)
+    Loggers.get(appname="handler").close()
+    Loggers.get(**config).close()
+    assert Loggers.get(appname="handler") is None
+    assert Loggers.get(**config) is None
+
+
+def test_loggers_registry_unhashable():
+    pw = bytearray(b"pw")
+    config = dict(
+        appname="registry", debug=False, host="h", index="i", username="u", pw=pw
+    )
+    assert Loggers(**config) is not Loggers(**config)
+    assert Loggers.get(**config) is None
+
+
+def test_loggers_closed_not_reused(mocker):
+    mocker.patch.object(Elasticsearch, "close")
+    config = dict(
+        appname="closed",
+        debug=False,
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+    )
+    with Loggers(**config) as es:
+        assert Loggers.get(**config) is es
+    assert Loggers.get(**config) is None
+    assert Loggers(**config) is not es
+
+
+def test_loggers_shutdown_all(mocker):
+    # the loggers of the other tests are held by the registry until closed
+    Loggers.shutdown_all(5)
+    bulk = mocker.patch.object(Elasticsearch, "bulk")
+    close = mocker.patch.object(Elasticsearch, "close")
+    es = Loggers(
+        appname="shutdown",
+        debug=False,
+        host="https://localhost.com:9201",
+        index="appindex",
+        username="user",
+        pw="pw",
+        buffered=True,
+        flushinterval=10,
+        dedupwindow=60,
+    )
+    es.log("info", "test123")
+    es.log("info", "test123")
+    assert Loggers.shutdown_all(5) == 0
+    assert close.call_count == 1
+    body = "".join(call.kwargs["body"] for call in bulk.call_args_list)
+    assert '"count": 2' in body
+    assert (
+        Loggers.get(
+            appname="shutdown",
+            debug=False,
+            host="https://localhost.com:9201",
+            index="appindex",
+            username="user",
+            pw="pw",
+            buffered=True,
+            flushinterval=10,
+            dedupwindow=60,
+        )
+        is None
+    )